@@ -1,13 +1,20 @@
+import time
+
+_STARTED_AT = time.perf_counter()
+
+import logging
 import tkinter as tk
 from tkinter import ttk
 from constants import Constants
-from utils import setup_logging
+from utils import setup_logging, set_log_level
 from gui.window import (
     create_main_window, 
+    set_window_icon,
     setup_scrollable_area,
 )
 from gui.sections import (
     create_manor_section,
+    create_scanner_status_section,
     create_airman_leaders_section,
     create_charge_quarters_section, 
     create_dynamic_entry_section,
@@ -15,28 +22,73 @@ from gui.sections import (
     create_signature_section, 
     create_email_preview_section,
 )
+from gui.preview import PreviewScheduler, PreviewApplier
+from gui.overlay import LatencyOverlay
+from gui.autocomplete import NAME_COMPLETER
+from gui.form import fill_form, add_lates
+from gui.ledger import RedCardLedgerWindow
 from gui.widgets import (
     layout_widgets_in_grid, 
     create_red_card_late_entry_widgets, 
     create_late_entry_widgets
 )
 from logic.processing import (
-    format_email_body, 
+    EmailRenderer,
+    FormGatherer,
     get_form_data_for_preview, 
     ValidationException
 )
-from logic.actions import check_email_action
+from logic.actions import (
+    check_email_action,
+    archive_report,
+    import_roster_action,
+    import_scans_action,
+    archived_people,
+    report_delivery_failures,
+)
+from logic.metrics import LatencyRecorder, StartupProfile
+from logic.roster import load_saved_roster
+from logic.rooms import ROOM_DIRECTORY, CONFIG_CHECK_INTERVAL
+from logic.drafts import DraftJournal
+from logic.aggregator import DeskPublisher, shift_date
+from logic.outbox import OutboxWorker
+from logic.scan_tail import ScanFollower, status_text
+from logic.redcard import load_ledger
 
 
 log = setup_logging()
 
 
+# Only build widgets for the visible late rows (for nights with very many lates)
+VIRTUALIZE_LATE_ROWS = False
+
+# Show the window with only the manor and CQ sections, and build the rest
+# one section per idle callback once it is on screen
+FAST_START = True
+FAST_START_SECTIONS = {"manor", "cq_members"}
+
+# Time-to-interactive budget; the startup profile is logged as a warning above it
+STARTUP_BUDGET_MS = 1500
+
+# Seconds between checks of the scanner follower for a new status
+SCANNER_STATUS_INTERVAL = 1.0
+
+# Seconds between checks for emails the outbox gave up on
+OUTBOX_CHECK_INTERVAL = 5.0
+
+# Seconds between checks for red-card windows that have just ended
+RED_CARD_CHECK_INTERVAL = 60.0
+
+
 def main():
     """Main function to build the UI and run the application."""
     log.info("Application starting up...")
+    profile = StartupProfile(_STARTED_AT)
+    profile.mark("imports")
     
     # 1. Create the main window
-    window = create_main_window()
+    with profile.phase("window"):
+        window = create_main_window(with_icon=not FAST_START)
     
     # 2. Create main container with two panels
     main_container = ttk.Frame(window)
@@ -58,86 +110,286 @@ def main():
 
     # 5. Create check email callback function
     def check_email_callback():
-        check_email_action(window, ui_elements)
+        build_pending_sections()
+        check_email_action(window, ui_elements, form_gatherer, on_copied=draft_journal.clear, outbox=outbox_worker)
+
+    # Copying a complete preview archives it like a generated email
+    def copy_preview_callback():
+        build_pending_sections()
+        # Read the widgets again; not every edit fires an event
+        form_gatherer.invalidate()
+        result = form_gatherer.gather_ui(ui_elements)
+        if result.valid:
+            archive_report(result.report, email_renderer.render(result.report))
+            draft_journal.clear()
 
     # 6. Create email preview section with check email button
-    preview_text_widget, line_numbers_widget = create_email_preview_section(right_panel, check_email_callback)
+    with profile.phase("preview"):
+        preview_text_widget, line_numbers_widget = create_email_preview_section(right_panel, check_email_callback, copy_preview_callback)
     
+    # Keeps gathered rows and rendered sections between previews so unchanged ones are reused
+    form_gatherer = FormGatherer()
+    email_renderer = EmailRenderer()
+    preview_applier = PreviewApplier(preview_text_widget, line_numbers_widget)
+
+    # Autosaves every edit in the background; the draft is restored at startup
+    # and discarded once the email has been copied
+    draft_journal = DraftJournal()
+
+    # With CQ_AGGREGATOR=host:port set, the form is also shared with the
+    # multi-desk aggregation service (python -m logic.aggregator)
+    desk_publisher = DeskPublisher.from_env()
+
+    # With CQ_SMTP_HOST set, generated emails can be sent; they are queued on
+    # disk and delivered by a background worker, surviving crashes and outages
+    outbox_worker = OutboxWorker.from_env()
+
+    def watch_outbox():
+        report_delivery_failures(window, outbox_worker)
+        window.after(int(OUTBOX_CHECK_INTERVAL * 1000), watch_outbox)
+
+    # With CQ_SCANNER_LOG set, the CAC scanner's log is followed from a
+    # background thread once the roster is loaded; the Tk thread only polls
+    # the follower's version counter and redraws the status line
+    scan_follower = ScanFollower.from_env()
+
+    def add_followed_lates():
+        build_pending_sections()
+        if scan_follower.latest is not None:
+            add_scanned_lates(scan_follower.latest)
+
+    if scan_follower is not None:
+        scanner_status_var = create_scanner_status_section(right_panel, add_followed_lates)
+
+    def watch_scanner(version=0):
+        if scan_follower.version != version:
+            version = scan_follower.version
+            scanner_status_var.set(status_text(scan_follower.latest, scan_follower.updated_at))
+        window.after(int(SCANNER_STATUS_INTERVAL * 1000), watch_scanner, version)
+
+    # Red-card sign-ins and turn-ins are ticked off in the ledger window; once
+    # a window is over, the holders who missed it are added as red-card lates
+    red_card_ledger = load_ledger()
+
+    def sync_red_card_lates():
+        if "red_card_lates" not in ui_elements:
+            return
+        # Rows are added once; later edits or deletions in the form are kept
+        lates = red_card_ledger.new_late_entries()
+        if not lates:
+            return
+        save_ledger()
+        if add_lates(ui_elements["red_card_lates"], lates):
+            on_form_changed()
+
+    def save_ledger():
+        try:
+            red_card_ledger.save()
+        except OSError as e:
+            log.warning(f"Failed to save red-card ledger: {e}")
+
+    def on_ledger_changed():
+        save_ledger()
+        sync_red_card_lates()
+
+    ledger_window = RedCardLedgerWindow(window, red_card_ledger, on_ledger_changed)
+
+    def watch_red_card_windows():
+        nonlocal red_card_ledger
+        if red_card_ledger.shift_day != shift_date():
+            # A new shift starts with an empty ledger
+            red_card_ledger = ledger_window.ledger = load_ledger()
+        sync_red_card_lates()
+        if ledger_window.visible:
+            ledger_window.refresh()
+        window.after(int(RED_CARD_CHECK_INTERVAL * 1000), watch_red_card_windows)
+
+    # Per-stage preview timings, shown with F12 and dumped with Ctrl+F12
+    latency_recorder = LatencyRecorder()
+    LatencyOverlay(window, latency_recorder)
+
+    # Ctrl+Alt+D switches DEBUG logging on and off without a restart
+    def toggle_debug_logging(_event=None):
+        level = logging.INFO if log.isEnabledFor(logging.DEBUG) else logging.DEBUG
+        set_log_level(level)
+        log.info("Log level set to %s.", logging.getLevelName(level))
+
+    window.bind_all("<Control-Alt-d>", toggle_debug_logging)
+
     # Define update_preview early so it can be passed as a callback
     def update_preview():
+        # The preview waits until every section exists
+        if pending_sections:
+            return
         try:
-            form_data = get_form_data_for_preview(ui_elements)
-            email_body = format_email_body(form_data)
+            with latency_recorder.time("gather"):
+                form_data = get_form_data_for_preview(ui_elements, form_gatherer)
+            draft_journal.submit(form_gatherer.snapshot)
+            if desk_publisher is not None:
+                desk_publisher.submit(form_gatherer.snapshot)
+            with latency_recorder.time("format"):
+                email_body = email_renderer.render(form_data)
             
-            # Update main content
-            preview_text_widget.config(state="normal")
-            preview_text_widget.delete("1.0", tk.END)
-            preview_text_widget.insert("1.0", email_body)
-            preview_text_widget.config(state="disabled")
-
-            # Update line numbers
-            line_count = email_body.count('\n') + 1
-            line_numbers_text = "\n".join(str(i) for i in range(1, line_count + 1))
-            line_numbers_widget.config(state="normal")
-            line_numbers_widget.delete("1.0", tk.END)
-            line_numbers_widget.insert("1.0", line_numbers_text)
-            line_numbers_widget.config(state="disabled")
+            # Patch only the changed lines of the preview and gutter
+            with latency_recorder.time("apply"):
+                preview_applier.apply(email_body)
 
         except ValidationException:
             # Don't show errors in preview, just show incomplete data
-            preview_text_widget.config(state="normal")
-            preview_text_widget.delete("1.0", tk.END)
-            preview_text_widget.insert("1.0", "Fill out required fields to see email preview...")
-            preview_text_widget.config(state="disabled")
-            # Clear line numbers
-            line_numbers_widget.config(state="normal")
-            line_numbers_widget.delete("1.0", tk.END)
-            line_numbers_widget.config(state="disabled")
+            preview_applier.apply("Fill out required fields to see email preview...", show_line_numbers=False)
         except Exception as e:
-            log.debug(f"Preview update error: {e}")
+            log.debug("Preview update error: %s", e)
+
+    # All input events funnel through one scheduler so a single user action
+    # only triggers one gather/format/render pass.
+    preview_scheduler = PreviewScheduler(window, update_preview, recorder=latency_recorder)
+
+    def on_form_changed(*_args):
+        form_gatherer.invalidate()
+        preview_scheduler.request()
+
+    # Bay/MTL assignments are re-read when their config file changes; the
+    # preview is refreshed so MTLs and room checks follow without a restart
+    def watch_room_config():
+        if ROOM_DIRECTORY.reload_if_changed():
+            on_form_changed()
+        window.after(int(CONFIG_CHECK_INTERVAL * 1000), watch_room_config)
 
     # 3. Build UI sections and collect widget references
-    manor_var = create_manor_section(scrollable_frame, Constants.manor_options)
-    
-    al_members_entries = create_airman_leaders_section(scrollable_frame, Constants.al_roles)
-    
-    cq_members_entries = create_charge_quarters_section(scrollable_frame, Constants.cq_roles)
-    
-    red_card_lates_entries = create_dynamic_entry_section(
-        parent=scrollable_frame, 
-        title="Red Card Lates",
-        widget_factory=create_red_card_late_entry_widgets,
-        layout_function=lambda p, w: layout_widgets_in_grid(p, w, {"Type": "Late To"}),
-        add_button_text="Add Late"
-    )
-
-    lates_entries = create_dynamic_entry_section(
-        parent=scrollable_frame, 
-        title="Lates",
-        widget_factory=create_late_entry_widgets,
-        layout_function=layout_widgets_in_grid,
-        add_button_text="Add Late"
-    )
-
-    cac_scanner_var, mtl_var, notes_entries = create_notes_section(scrollable_frame, update_preview)
-    
-    signature_entries = create_signature_section(scrollable_frame)
-
-    # 4. Store references to all UI elements
-    ui_elements = {
-        "manor": manor_var,
-        "al_members": al_members_entries,
-        "cq_members": cq_members_entries,
-        "red_card_lates": red_card_lates_entries,
-        "lates": lates_entries,
-        "notes": {
+    ui_elements = {}
+
+    def import_roster_callback():
+        roster = import_roster_action(window)
+        if roster is not None:
+            NAME_COMPLETER.set_roster(roster)
+            if scan_follower is not None:
+                scan_follower.follow(roster)
+
+    def add_scanned_lates(result):
+        added = add_lates(ui_elements["red_card_lates"], result.red_card_lates)
+        added += add_lates(ui_elements["lates"], result.lates)
+        if added:
+            on_form_changed()
+        return added
+
+    def import_scans_callback():
+        # The late sections (and the saved roster) may still be pending
+        build_pending_sections()
+        import_scans_action(window, NAME_COMPLETER.roster, add_scanned_lates)
+
+    def build_manor(parent):
+        ui_elements["manor"] = create_manor_section(
+            parent, lambda: ROOM_DIRECTORY.manor_options, import_roster_callback, import_scans_callback
+        )
+
+    def build_al_members(parent):
+        ui_elements["al_members"] = create_airman_leaders_section(parent, Constants.al_roles)
+
+    def build_cq_members(parent):
+        ui_elements["cq_members"] = create_charge_quarters_section(parent, Constants.cq_roles, on_form_changed)
+
+    def build_red_card_lates(parent):
+        ui_elements["red_card_lates"] = create_dynamic_entry_section(
+            parent=parent, 
+            title="Red Card Lates",
+            widget_factory=create_red_card_late_entry_widgets,
+            layout_function=lambda p, w: layout_widgets_in_grid(p, w, {"Type": "Late To"}),
+            add_button_text="Add Late",
+            update_callback=on_form_changed,
+            virtual=VIRTUALIZE_LATE_ROWS,
+            extra_buttons={"Red Card Ledger...": ledger_window.show},
+        )
+
+    def build_lates(parent):
+        ui_elements["lates"] = create_dynamic_entry_section(
+            parent=parent, 
+            title="Lates",
+            widget_factory=create_late_entry_widgets,
+            layout_function=layout_widgets_in_grid,
+            add_button_text="Add Late",
+            update_callback=on_form_changed,
+            virtual=VIRTUALIZE_LATE_ROWS,
+        )
+
+    def build_notes(parent):
+        cac_scanner_var, mtl_var, notes_entries = create_notes_section(parent, on_form_changed)
+        ui_elements["notes"] = {
             "cac_scanner": cac_scanner_var,
             "on_call_mtl": mtl_var,
             "additional_notes": notes_entries,
-        },
-        "signature": signature_entries,
-    }
-    
+        }
+
+    def build_signature(parent):
+        ui_elements["signature"] = create_signature_section(parent)
+
+    # 4. Store references to all UI elements, in display order. Each section
+    # gets its own holder frame so deferred sections still land in place.
+    section_builders = [
+        ("manor", build_manor),
+        ("al_members", build_al_members),
+        ("cq_members", build_cq_members),
+        ("red_card_lates", build_red_card_lates),
+        ("lates", build_lates),
+        ("notes", build_notes),
+        ("signature", build_signature),
+    ]
+    pending_sections = []
+
+    def build_section(key, builder, holder):
+        with profile.phase(key):
+            builder(holder)
+            bind_update_events({key: ui_elements[key]})
+
+    def build_next_section():
+        if not pending_sections:
+            return
+        build_section(*pending_sections.pop(0))
+        if pending_sections:
+            window.after_idle(build_next_section)
+        else:
+            sections_ready()
+
+    def build_pending_sections():
+        """Builds any deferred sections right away (e.g. before validating)."""
+        while pending_sections:
+            build_section(*pending_sections.pop(0))
+        if "ready" not in profile.marks:
+            sections_ready()
+
+    def sections_ready():
+        if FAST_START:
+            with profile.phase("icon"):
+                set_window_icon(window)
+        with profile.phase("names"):
+            roster = None if NAME_COMPLETER.roster else load_saved_roster()
+            if roster is not None:
+                NAME_COMPLETER.set_roster(roster)
+            NAME_COMPLETER.add_people(archived_people())
+        with profile.phase("draft"):
+            draft = draft_journal.restore()
+            if draft is not None:
+                fill_form(ui_elements, draft)
+                form_gatherer.invalidate()
+            draft_journal.start()
+        if outbox_worker is not None:
+            outbox_worker.start()
+            watch_outbox()
+        if scan_follower is not None:
+            if NAME_COMPLETER.roster is not None:
+                scan_follower.follow(NAME_COMPLETER.roster)
+                scanner_status_var.set(status_text(None))
+            else:
+                scanner_status_var.set("Scanner: import a roster to follow the log")
+            watch_scanner()
+        watch_red_card_windows()
+        profile.mark("ready")
+        if profile.over_budget("interactive", STARTUP_BUDGET_MS):
+            log.warning(f"Time to interactive is over the {STARTUP_BUDGET_MS} ms budget.\n{profile.format_report()}")
+        else:
+            log.info(profile.format_report())
+        preview_scheduler.request()
+        watch_room_config()
+
     # 7. Set up live preview update function (already defined above)
     
     # 8. Bind update function to all relevant widgets
@@ -147,34 +399,50 @@ def main():
             if isinstance(value, dict):
                 bind_update_events(value)
             elif isinstance(value, list):
-                for item in value:
-                    if isinstance(item, dict):
-                        bind_update_events(item)
-                    # Note: We don't bind to list items here because dynamic lists
-                    # (like notes) handle their own binding internally.
+                # Dynamic lists (runners, lates, notes) bind their own rows
+                # as they are added, so they are skipped here.
+                continue
             # For tk.Variable subclasses (StringVar, BooleanVar)
             elif hasattr(value, 'trace_add'):
-                value.trace_add('write', lambda *args: window.after_idle(update_preview))
+                value.trace_add('write', on_form_changed)
             # For tk.Widget subclasses (Entry, Combobox)
             elif hasattr(value, 'bind'):
                 try:
                     # Bind text entry widgets
-                    value.bind('<KeyRelease>', lambda e: window.after_idle(update_preview))
+                    value.bind('<KeyRelease>', on_form_changed, add='+')
                     # Bind combobox selection changes
                     if isinstance(value, ttk.Combobox):
-                        value.bind('<<ComboboxSelected>>', lambda e: window.after_idle(update_preview))
+                        value.bind('<<ComboboxSelected>>', on_form_changed, add='+')
                 except tk.TclError:
                     # Ignore errors for widgets that might be destroyed
                     pass
 
-    bind_update_events(ui_elements)
-    
-    # Initial preview update
-    window.after_idle(update_preview)
+    for key, builder in section_builders:
+        holder = ttk.Frame(scrollable_frame)
+        holder.pack(fill="both", expand=True)
+        if FAST_START and key not in FAST_START_SECTIONS:
+            pending_sections.append((key, builder, holder))
+        else:
+            build_section(key, builder, holder)
+
+    # The first idle callback runs once the window has been drawn; the
+    # deferred sections (and then the initial preview) follow it.
+    window.after_idle(profile.mark, "interactive")
+    if pending_sections:
+        window.after_idle(build_next_section)
+    else:
+        window.after_idle(sections_ready)
 
     # 9. Start the application (removed bottom button section)
     log.info("Starting main application loop.")
     window.mainloop()
+    draft_journal.close()
+    if desk_publisher is not None:
+        desk_publisher.close()
+    if outbox_worker is not None:
+        outbox_worker.close()
+    if scan_follower is not None:
+        scan_follower.close()
     log.info("Application shut down.")
 
 if __name__ == "__main__":
@@ -0,0 +1,193 @@
+"""
+Benchmarks for gathering, validating and formatting shift forms.
+
+Usage
+-----
+    python -m benchmarks.bench_processing                   # run and compare to the baseline
+    python -m benchmarks.bench_processing --save-baseline   # record a new baseline
+    python -m benchmarks.bench_processing --sizes 1 50 --min-time 0.5
+
+Each case drives the real `logic.processing` functions with seeded synthetic
+forms (see `benchmarks.synthetic`) at 1, 50, 500 and 10,000 late rows. Timing
+and allocation are measured in separate passes so tracing does not skew the
+timings. A case is flagged when its time per call is more than `--tolerance`
+slower than the baseline; the exit status is 1 if any case regressed.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+from benchmarks.synthetic import ShiftGenerator
+from logic.processing import (
+    get_form_data,
+    get_form_data_for_preview,
+    format_email_body,
+    get_mtl_from_room,
+)
+
+
+log = logging.getLogger('app.bench')
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SIZES = [1, 50, 500, 10_000]
+
+# Each case runs for at least this long (and at least MIN_ROUNDS times)
+MIN_TIME = 0.2
+MIN_ROUNDS = 3
+
+# Allowed slowdown against the baseline before a case is flagged
+TOLERANCE = 0.25
+
+SEED = 1234
+
+
+def _cases(rows: int, seed: int) -> list[tuple[str, callable]]:
+    """Returns (name, function) pairs for one form size; each call processes `rows` rows."""
+    generator = ShiftGenerator(seed)
+    ui_elements = generator.form(rows)
+    report = get_form_data(ui_elements)
+    lookups = generator.room_lookups(rows)
+
+    def mtl_lookups():
+        for manor, room in lookups:
+            get_mtl_from_room(manor, room)
+
+    return [
+        ("get_form_data", lambda: get_form_data(ui_elements)),
+        ("get_form_data_for_preview", lambda: get_form_data_for_preview(ui_elements)),
+        ("format_email_body", lambda: format_email_body(report)),
+        ("get_mtl_from_room", mtl_lookups),
+    ]
+
+
+def _time(function: callable, min_time: float) -> tuple[float, int]:
+    """Returns the best seconds per call and the number of rounds run."""
+    best = float("inf")
+    rounds = 0
+    started = time.perf_counter()
+    while rounds < MIN_ROUNDS or time.perf_counter() - started < min_time:
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+        rounds += 1
+    return best, rounds
+
+
+def _allocations(function: callable) -> tuple[int, int]:
+    """Returns (peak bytes, allocated blocks still alive) for a single call."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - before, current - before
+
+
+def run(sizes: list[int] = SIZES, min_time: float = MIN_TIME, seed: int = SEED) -> dict:
+    """Runs every case at every size and returns {"<name>/<rows>": result}."""
+    results = {}
+    for rows in sizes:
+        for name, function in _cases(rows, seed):
+            seconds, rounds = _time(function, min_time)
+            peak_bytes, retained_bytes = _allocations(function)
+            results[f"{name}/{rows}"] = {
+                "rows": rows,
+                "seconds": seconds,
+                "rows_per_second": rows / seconds if seconds else 0.0,
+                "peak_bytes": peak_bytes,
+                "retained_bytes": retained_bytes,
+                "rounds": rounds,
+            }
+            log.info(f"{name}/{rows}: {seconds * 1000:.3f} ms over {rounds} rounds.")
+    return results
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    """Returns the stored results, or {} if there is no baseline yet."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: dict, path: str = BASELINE_PATH):
+    data = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float = TOLERANCE) -> list[str]:
+    """Returns the names of cases more than `tolerance` slower than the baseline."""
+    return [
+        case for case, result in results.items()
+        if case in baseline and result["seconds"] > baseline[case]["seconds"] * (1 + tolerance)
+    ]
+
+
+def format_report(results: dict, baseline: dict, regressions: list[str]) -> str:
+    lines = [f"{'case':<34}{'ms/call':>11}{'rows/s':>13}{'peak KiB':>11}{'vs base':>10}"]
+    for case, result in results.items():
+        change = ""
+        if case in baseline and baseline[case]["seconds"]:
+            change = f"{(result['seconds'] / baseline[case]['seconds'] - 1) * 100:+.0f}%"
+            if case in regressions:
+                change += " !"
+        lines.append(
+            f"{case:<34}{result['seconds'] * 1000:>11.3f}{result['rows_per_second']:>13,.0f}"
+            f"{result['peak_bytes'] / 1024:>11.1f}{change:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark form processing and email rendering.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, metavar="ROWS", help="Late row counts to run.")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="Minimum seconds to spend per case.")
+    parser.add_argument("--seed", type=int, default=SEED, help="Seed for the synthetic forms.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare against or save to.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Allowed slowdown, e.g. 0.25 for 25%%.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log each case as it finishes.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, force=True)
+    # Keep per-call debug logging out of the measurements
+    logging.getLogger('app').setLevel(logging.WARNING)
+    log.setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    results = run(args.sizes, args.min_time, args.seed)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(format_report(results, {}, []))
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.tolerance)
+    print(format_report(results, baseline, regressions))
+    if not baseline:
+        print("\nNo baseline yet; run with --save-baseline to record one.")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) more than {args.tolerance:.0%} slower than the baseline.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
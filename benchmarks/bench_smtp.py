@@ -0,0 +1,95 @@
+"""
+SMTP delivery throughput against the local sink.
+
+Usage
+-----
+    python -m benchmarks.bench_smtp
+    python -m benchmarks.bench_smtp --messages 2000 --pool 8 --recipients 5
+
+Sends per-MTL digests built from a synthetic shift through `SmtpSender`,
+once opening a new connection per message and once over the pool, and
+prints messages per second for both. `--fail-every` makes the sink refuse
+every nth message temporarily, so the retry path is measured as well.
+"""
+import sys
+import time
+import logging
+import argparse
+from benchmarks.synthetic import ShiftGenerator
+from logic.delivery import SmtpSender, SmtpSettings
+from logic.digests import shift_digests
+from logic.processing import get_form_data
+from logic.smtp_sink import SmtpSink
+
+
+log = logging.getLogger('app.bench')
+
+
+MESSAGES = 500
+POOL_SIZE = 4
+RECIPIENTS = 3
+LATE_ROWS = 50
+SEED = 1234
+
+
+def _messages(sender: SmtpSender, count: int, recipients: int, rows: int, seed: int) -> list:
+    digests, command_copy = shift_digests(get_form_data(ShiftGenerator(seed).form(rows)), "2026-01-01")
+    bodies = [*digests.items(), ("Command", command_copy)]
+    addresses = [f"desk{i}@example.test" for i in range(recipients)]
+    return [
+        sender.message(f"Accountability digest: {name}", body, addresses)
+        for name, body in (bodies[i % len(bodies)] for i in range(count))
+    ]
+
+
+def _run(port: int, count: int, pool_size: int, recipients: int, rows: int, seed: int, pooled: bool) -> dict:
+    settings = SmtpSettings("127.0.0.1", port, sender="cq@example.test")
+    with SmtpSender(settings, pool_size=pool_size, backoff=0.01) as sender:
+        messages = _messages(sender, count, recipients, rows, seed)
+        started = time.perf_counter()
+        if pooled:
+            errors = sender.send_many(messages)
+        else:
+            errors = []
+            for message in messages:
+                sender.send(message)
+                sender.pool.close()
+                errors.append(None)
+        elapsed = time.perf_counter() - started
+        return {
+            "messages": count,
+            "failed": sum(error is not None for error in errors),
+            "seconds": elapsed,
+            "per_second": count / elapsed if elapsed else 0.0,
+            "connections": sender.pool.connections_opened,
+        }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SMTP delivery against the local sink.")
+    parser.add_argument("--messages", type=int, default=MESSAGES, help="Messages to send per run.")
+    parser.add_argument("--pool", type=int, default=POOL_SIZE, help="Pooled connections (and sending threads).")
+    parser.add_argument("--recipients", type=int, default=RECIPIENTS, help="Recipients per message.")
+    parser.add_argument("--rows", type=int, default=LATE_ROWS, help="Late rows in the synthetic shift.")
+    parser.add_argument("--fail-every", type=int, default=0, help="Sink refuses every Nth message temporarily.")
+    parser.add_argument("--seed", type=int, default=SEED, help="Seed for the synthetic shift.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    sink = SmtpSink(port=0, fail_every=args.fail_every)
+    port = sink.start_in_thread()
+    try:
+        for label, pooled in (("connection per message", False), (f"pool of {args.pool}", True)):
+            result = _run(port, args.messages, args.pool, args.recipients, args.rows, args.seed, pooled)
+            print(
+                f"{label:<24} {result['messages']} messages in {result['seconds']:.2f} s "
+                f"({result['per_second']:,.0f}/s), {result['connections']} connections, {result['failed']} failed"
+            )
+    finally:
+        sink.stop()
+    print(f"sink received {sink.received} messages over {sink.connections} connections")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Loopback load test for the multi-desk aggregation service.
+
+Usage
+-----
+    python -m benchmarks.load_aggregator                        # in-process server
+    python -m benchmarks.load_aggregator --desks 200 --requests 100
+    python -m benchmarks.load_aggregator --address 127.0.0.1:8765
+
+Every simulated desk keeps one connection open and sends `--requests`
+requests over it: mostly report posts (alternating between two versions of
+its report, so every post changes the shift), with every `--read-every`th
+request fetching the consolidated email instead. Throughput and per-request
+latency percentiles are printed; the exit status is 1 if any request
+failed.
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from benchmarks.synthetic import ShiftGenerator
+from logic.aggregator import AggregatorServer
+from logic.metrics import percentile
+from logic.processing import snapshot_ui
+
+
+log = logging.getLogger('app.bench')
+
+
+DESKS = 50
+REQUESTS_PER_DESK = 200
+READ_EVERY = 10
+LATE_ROWS = 20
+SHIFT = "2026-01-01"
+SEED = 1234
+
+
+def _request(method: str, path: str, body: bytes = b"") -> bytes:
+    head = f"{method} {path} HTTP/1.1\r\nHost: loopback\r\nContent-Length: {len(body)}\r\n\r\n"
+    return head.encode("latin-1") + body
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _desk(host: str, port: int, posts: tuple[bytes, bytes], read: bytes, requests: int, read_every: int,
+                latencies: list[float]) -> int:
+    """Runs one desk's requests over a single connection. Returns the number of failures."""
+    reader, writer = await asyncio.open_connection(host, port)
+    failures = 0
+    try:
+        for index in range(requests):
+            started = time.perf_counter()
+            writer.write(read if (index + 1) % read_every == 0 else posts[index % 2])
+            await writer.drain()
+            if await _read_response(reader) != 200:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+    return failures
+
+
+async def run(desks: int = DESKS, requests: int = REQUESTS_PER_DESK, read_every: int = READ_EVERY,
+              rows: int = LATE_ROWS, address: str | None = None, seed: int = SEED) -> dict:
+    """Drives the service with `desks` concurrent connections and returns the measurements."""
+    server = None
+    if address:
+        host, _, port = address.rpartition(":")
+        port = int(port)
+    else:
+        server = AggregatorServer()
+        host, port = "127.0.0.1", await server.start("127.0.0.1", 0)
+
+    generator = ShiftGenerator(seed)
+    bodies = [json.dumps(snapshot_ui(generator.form(rows)).to_dict()).encode() for _ in range(8)]
+    read = _request("GET", f"/shifts/{SHIFT}")
+    posts = [
+        tuple(_request("POST", f"/shifts/{SHIFT}/desks/desk-{desk}", bodies[(desk + step) % len(bodies)]) for step in (0, 1))
+        for desk in range(desks)
+    ]
+
+    latencies = []
+    started = time.perf_counter()
+    failures = await asyncio.gather(*(
+        _desk(host, port, posts[desk], read, requests, read_every, latencies) for desk in range(desks)
+    ))
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        await server.stop()
+
+    latencies.sort()
+    return {
+        "desks": desks,
+        "requests": len(latencies),
+        "failures": sum(failures),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+def format_report(result: dict) -> str:
+    return (
+        f"{result['desks']} desks, {result['requests']} requests in {result['seconds']:.2f} s "
+        f"({result['requests_per_second']:,.0f} req/s), {result['failures']} failed\n"
+        f"latency ms: p50 {result['p50_ms']:.2f}  p95 {result['p95_ms']:.2f}  "
+        f"p99 {result['p99_ms']:.2f}  max {result['max_ms']:.2f}"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the multi-desk aggregation service over loopback.")
+    parser.add_argument("--desks", type=int, default=DESKS, help="Concurrent desks (one connection each).")
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_DESK, help="Requests sent by each desk.")
+    parser.add_argument("--read-every", type=int, default=READ_EVERY, help="Every Nth request fetches the email.")
+    parser.add_argument("--rows", type=int, default=LATE_ROWS, help="Late rows in each desk's report.")
+    parser.add_argument("--address", help="host:port of a running service (default: start one in-process).")
+    parser.add_argument("--seed", type=int, default=SEED, help="Seed for the synthetic reports.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    result = asyncio.run(run(args.desks, args.requests, args.read_every, args.rows, args.address, args.seed))
+    print(format_report(result))
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Seeded synthetic shift forms for benchmarks.
+
+Forms are built from the real dropdown values in `Constants` (ranks, rooms
+derived from `bay_mtls`, late times and types, MTLs, squadrons) and wrapped in
+`FakeVar` objects, so they can be passed anywhere the app passes `ui_elements`.
+"""
+import random
+from constants import Constants
+
+
+LAST_NAMES = ["Smith", "Johnson", "Garcia", "Nguyen", "O'Neil", "Martinez", "Brown", "Lee", "Walker", "Young"]
+FIRST_NAMES = ["Ann", "Bob", "Carlos", "Dana", "Eli", "Fatima", "Grace", "Hiro", "Ivy", "Jamal"]
+REASONS = ["Missed the shuttle", "Appointment ran long", "Forgot to sign in", "Lost track of time"]
+
+
+class FakeVar:
+    """Stands in for an Entry, Combobox or BooleanVar: just `get()` and `set()`."""
+    __slots__ = ("value",)
+
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class ShiftGenerator:
+    """Builds fake `ui_elements` dicts; the same seed always yields the same forms."""
+
+    def __init__(self, seed: int = 0):
+        self.random = random.Random(seed)
+        self.rooms = {manor: [] for manor in Constants.manor_options}
+        for bay_key in Constants.bay_mtls:
+            manor = next(m for m in Constants.manor_options if m[0] == bay_key[0])
+            self.rooms[manor].extend(f"{bay_key[1:]}{number:02d}" for number in range(100))
+
+    def _person(self) -> dict:
+        r = self.random
+        return {
+            "Rank": FakeVar(r.choice(Constants.rank_options)),
+            "Last": FakeVar(r.choice(LAST_NAMES)),
+            "First": FakeVar(r.choice(FIRST_NAMES)),
+            "MI": FakeVar(r.choice(["", "", "A", "J", "Q"])),
+        }
+
+    def _empty_person(self) -> dict:
+        return {key: FakeVar() for key in ("Rank", "Last", "First", "MI")}
+
+    def _late(self, manor: str, red_card: bool) -> dict:
+        r = self.random
+        entry = self._person()
+        entry["Room"] = FakeVar(r.choice(self.rooms[manor]))
+        entry["Time"] = FakeVar(r.choice(Constants.redcard_late_times if red_card else Constants.standard_late_times))
+        if red_card:
+            entry["Type"] = FakeVar(r.choice(Constants.redcard_late_types))
+        entry["Reason"] = FakeVar(r.choice(REASONS))
+        return entry
+
+    def form(self, late_rows: int) -> dict:
+        """
+        Returns a complete, valid form with `late_rows` late entries in total,
+        split roughly evenly between red-card and standard lates.
+        """
+        r = self.random
+        manor = r.choice(Constants.manor_options)
+        red_card_rows = late_rows // 2
+        return {
+            "manor": FakeVar(manor),
+            "al_members": {
+                role: self._person() if role == "AL Cards" or r.random() < 0.5 else self._empty_person()
+                for role in Constants.al_roles
+            },
+            "cq_members": {
+                "CQ Lead": self._person(),
+                "CQ Door Guard": self._person(),
+                "CQ Runner": [self._person() for _ in range(r.randint(1, 3))],
+            },
+            "red_card_lates": [self._late(manor, True) for _ in range(red_card_rows)],
+            "lates": [self._late(manor, False) for _ in range(late_rows - red_card_rows)],
+            "notes": {
+                "cac_scanner": FakeVar(r.random() < 0.2),
+                "on_call_mtl": FakeVar(r.choice(Constants.on_call_mtls)),
+                "additional_notes": [FakeVar(r.choice(["", "All quiet on the floor."])) for _ in range(2)],
+            },
+            "signature": {
+                "Rank": FakeVar(r.choice(Constants.rank_options)),
+                "Last": FakeVar(r.choice(LAST_NAMES)),
+                "First": FakeVar(r.choice(FIRST_NAMES)),
+                "MI": FakeVar(r.choice(["A", "J", "Q"])),
+                "Squadron": FakeVar(r.choice(Constants.squadron_options)),
+                "AFSC/Job": FakeVar(r.choice(Constants.job_options)),
+            },
+        }
+
+    def room_lookups(self, count: int) -> list[tuple[str, str]]:
+        """(manor, room) pairs as typed by users: mixed case, some dashes, a few invalid."""
+        r = self.random
+        pairs = []
+        for _ in range(count):
+            manor = r.choice(Constants.manor_options)
+            room = r.choice(self.rooms[manor])
+            style = r.random()
+            if style < 0.2:
+                room = room.lower()
+            elif style < 0.3:
+                room = f"{room[0]}-{room[1:]}"
+            elif style < 0.35:
+                room = "D199" if manor == "Fosters" else "Z100"
+            pairs.append((manor, room))
+        return pairs
@@ -87,6 +87,8 @@ class Constants:
 
     # MTL assignments by bay and floor
     # FD1/WD1 - Does not exist
+    # manor_options, on_call_mtls and bay_mtls are only defaults: a bays.json
+    # in the user data folder overrides them (see `python -m logic.rooms`)
     bay_mtls = {
         # Fosters - Floor 1
         "FA1": "TSgt Culpepper",
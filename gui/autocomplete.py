@@ -0,0 +1,169 @@
+import logging
+import tkinter as tk
+from logic.fuzzy import NameIndex, person_key
+from logic.models import Person
+from logic.roster import Roster, RosterEntry, MAX_COMPLETIONS
+from gui.widgets import set_widget_value
+
+
+# Delay before hiding the list when the entry loses focus, so a click on the list still lands
+HIDE_DELAY_MS = 150
+
+# Keys handled by the completion list itself rather than treated as typing
+NAVIGATION_KEYS = {"Up", "Down", "Return", "Tab", "Escape", "Shift_L", "Shift_R"}
+
+# Roster fields copied into a row, by widget key
+FILL_FIELDS = {"Rank": "rank", "Last": "last", "First": "first", "MI": "mi", "Room": "room", "Squadron": "squadron"}
+
+
+log = logging.getLogger('app.autocomplete')
+
+
+class NameCompleter:
+    """
+    Drop-down roster completions for the Last field of a person row.
+
+    Names are completed by prefix from the roster first; when nothing
+    starts with what was typed, close spellings from the roster and the
+    archive are offered instead. One list window is shared by every
+    attached row. Picking a name fills
+    whichever of Rank, Last, First, MI, Room and Squadron the row has, then
+    generates a <KeyRelease> on the Last entry so the row's usual update
+    bindings refresh the preview.
+    """
+
+    def __init__(self, roster: Roster | None = None, limit: int = MAX_COMPLETIONS):
+        self.roster = None
+        self.limit = limit
+        self.names = NameIndex()
+        self._archived_keys = set()
+        self._popup = None
+        self._listbox = None
+        self._matches = []
+        self._entries = None
+        self._hide_id = None
+        self._filling = False
+        if roster is not None:
+            self.set_roster(roster)
+
+    def set_roster(self, roster: Roster):
+        """Switches to a new roster, updating the fuzzy index only for names that changed."""
+        self.roster = roster
+        self.names.sync({person_key(entry): entry for entry in roster.entries}, keep=self._archived_keys)
+
+    def add_people(self, people: list[Person]):
+        """Adds archived people to the fuzzy index; roster entries keep their own details."""
+        for person in people:
+            key = person_key(person)
+            if key and key not in self.names:
+                self.names.add(key, RosterEntry(person.rank, person.last, person.first, person.mi))
+                self._archived_keys.add(key)
+
+    def attach(self, entries: dict):
+        """Offers completions while typing in `entries["Last"]`."""
+        last = entries.get("Last")
+        if last is None:
+            return
+        last.bind("<KeyRelease>", lambda e: self._on_key(e, entries), add='+')
+        last.bind("<Down>", lambda e: self._move(1, entries), add='+')
+        last.bind("<Up>", lambda e: self._move(-1, entries), add='+')
+        last.bind("<Return>", lambda e: self._choose(entries), add='+')
+        last.bind("<Tab>", lambda e: self._choose(entries, keep_default=True), add='+')
+        last.bind("<Escape>", lambda e: self.hide(), add='+')
+        last.bind("<FocusOut>", lambda e: self._hide_later(), add='+')
+
+    @property
+    def visible(self) -> bool:
+        return self._popup is not None and bool(self._matches)
+
+    def _on_key(self, event, entries: dict):
+        if self._filling or event.keysym in NAVIGATION_KEYS:
+            return
+        text = entries["Last"].get()
+        matches = self.roster.complete(text, self.limit) if self.roster else []
+        if not matches:
+            matches = [match.payload for match in self.names.search(text, self.limit)]
+        if matches:
+            self._show(entries, matches)
+        else:
+            self.hide()
+
+    def _show(self, entries: dict, matches: list[RosterEntry]):
+        widget = entries["Last"]
+        if self._popup is None:
+            self._popup = tk.Toplevel(widget.winfo_toplevel())
+            self._popup.overrideredirect(True)
+            self._popup.attributes("-topmost", True)
+            self._listbox = tk.Listbox(self._popup, activestyle="dotbox", exportselection=False)
+            self._listbox.pack(fill="both", expand=True)
+            self._listbox.bind("<ButtonRelease-1>", lambda e: self._choose(self._entries))
+        self._cancel_hide()
+        self._entries = entries
+        self._matches = matches
+
+        self._listbox.delete(0, tk.END)
+        self._listbox.insert(tk.END, *(match.label() for match in matches))
+        self._listbox.config(height=len(matches), width=max(len(match.label()) for match in matches) + 2)
+        self._listbox.selection_set(0)
+        x, y = widget.winfo_rootx(), widget.winfo_rooty() + widget.winfo_height()
+        self._popup.geometry(f"+{x}+{y}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def hide(self):
+        self._cancel_hide()
+        self._matches = []
+        self._entries = None
+        if self._popup is not None:
+            self._popup.withdraw()
+
+    def _hide_later(self):
+        if self._popup is not None and self._hide_id is None:
+            self._hide_id = self._popup.after(HIDE_DELAY_MS, self.hide)
+
+    def _cancel_hide(self):
+        if self._hide_id is not None:
+            self._popup.after_cancel(self._hide_id)
+            self._hide_id = None
+
+    def _move(self, step: int, entries: dict):
+        if not self.visible or entries is not self._entries:
+            return None
+        current = self._listbox.curselection()
+        index = (current[0] if current else -step) + step
+        index = max(0, min(index, len(self._matches) - 1))
+        self._listbox.selection_clear(0, tk.END)
+        self._listbox.selection_set(index)
+        self._listbox.see(index)
+        return "break"
+
+    def _choose(self, entries: dict, keep_default: bool = False):
+        if not self.visible or entries is not self._entries:
+            return None
+        current = self._listbox.curselection()
+        match = self._matches[current[0] if current else 0]
+        self.hide()
+        self.fill(entries, match)
+        return None if keep_default else "break"
+
+    def fill(self, entries: dict, match: RosterEntry):
+        """Copies a roster entry into a row's widgets."""
+        log.debug("Filling row from roster: %s", match.label())
+        for key, field in FILL_FIELDS.items():
+            value = getattr(match, field)
+            if key in entries and value:
+                set_widget_value(entries[key], value)
+        self._filling = True
+        try:
+            entries["Last"].event_generate("<KeyRelease>")
+        finally:
+            self._filling = False
+
+
+# Shared by every person row; the roster is set once it has been loaded
+NAME_COMPLETER = NameCompleter()
+
+
+def attach_name_completion(entries: dict):
+    """Adds roster completion to a person row (a dict with a "Last" entry)."""
+    NAME_COMPLETER.attach(entries)
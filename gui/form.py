@@ -0,0 +1,110 @@
+import logging
+from logic.models import LateEntry, Person, ShiftReport
+from gui.rows import FieldProxy
+from gui.widgets import set_widget_value
+
+
+log = logging.getLogger('app.form')
+
+
+# Widget key for each Person/LateEntry attribute
+ROW_KEYS = {
+    "rank": "Rank", "last": "Last", "first": "First", "mi": "MI",
+    "room": "Room", "time": "Time", "type": "Type", "reason": "Reason",
+}
+
+
+def _set(target, value: str):
+    if isinstance(target, FieldProxy) or hasattr(target, "trace_add"):
+        target.set(value)
+    else:
+        set_widget_value(target, value)
+
+
+def row_values(person: Person) -> dict[str, str]:
+    """A person or late as {widget key: value}, for `add_row`."""
+    return {ROW_KEYS[name]: value for name, value in person.to_dict().items() if name in ROW_KEYS}
+
+
+def _fill_row(entries: dict, person: Person):
+    for key, value in row_values(person).items():
+        if key in entries:
+            _set(entries[key], value)
+
+
+def _fill_rows(rows: list, people: list[Person]):
+    # Reuse the rows that already exist, then add the rest
+    for index, person in enumerate(people):
+        if index < len(rows):
+            _fill_row(rows[index], person)
+        else:
+            rows.add_row(row_values(person))
+
+
+def add_lates(rows: list, lates: list[LateEntry]) -> int:
+    """
+    Adds late rows that are not in the form yet, filling blank rows first.
+
+    A late is already there if a row has the same last name, first name and
+    time. Returns how many were added; as with `fill_form`, the caller
+    should refresh the preview afterwards.
+    """
+    def identity(last: str, first: str, time: str) -> tuple[str, str, str]:
+        return last.strip().casefold(), first.strip().casefold(), time.strip()
+
+    present = set()
+    blank = []
+    for entries in rows:
+        values = {key: entries[key].get() for key in ROW_KEYS.values() if key in entries}
+        if not any(value.strip() for value in values.values()):
+            blank.append(entries)
+        else:
+            present.add(identity(values.get("Last", ""), values.get("First", ""), values.get("Time", "")))
+
+    added = 0
+    for late in lates:
+        key = identity(late.last, late.first, late.time)
+        if key in present:
+            continue
+        present.add(key)
+        if blank:
+            _fill_row(blank.pop(0), late)
+        else:
+            rows.add_row(row_values(late))
+        added += 1
+    log.debug(f"Added {added} of {len(lates)} late rows.")
+    return added
+
+
+def fill_form(ui_elements: dict, report: ShiftReport):
+    """
+    Writes a report back into the form, adding rows as needed.
+
+    Existing extra rows are left as they are. Widget edits made here do not
+    fire edit events, so the caller should refresh the preview afterwards.
+    """
+    log.debug("Filling form from report.")
+    _set(ui_elements["manor"], report.manor)
+
+    for team, members in (("al_members", report.al_team), ("cq_members", report.cq_team)):
+        for role, entries in ui_elements[team].items():
+            member = members.get(role)
+            if isinstance(entries, list):
+                _fill_rows(entries, member or [])
+            elif member is not None:
+                _fill_row(entries, member)
+
+    _fill_rows(ui_elements["red_card_lates"], report.red_card_lates)
+    _fill_rows(ui_elements["lates"], report.lates)
+
+    notes = ui_elements["notes"]
+    notes["cac_scanner"].set(report.cac_scanner_unavailable)
+    _set(notes["on_call_mtl"], report.on_call_mtl)
+    for index, note in enumerate(report.additional_notes):
+        if index < len(notes["additional_notes"]):
+            _set(notes["additional_notes"][index], note)
+        else:
+            notes["additional_notes"].add_row(note)
+
+    for key, widget in ui_elements["signature"].items():
+        _set(widget, report.signature.get(key, ""))
@@ -0,0 +1,119 @@
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox
+from logic.redcard import RedCardLedger
+from logic.roster import RosterEntry
+from gui.autocomplete import attach_name_completion
+from gui.widgets import create_person_entry_fields, layout_widgets_in_grid, set_widget_value
+
+
+log = logging.getLogger('app.ledger')
+
+
+class RedCardLedgerWindow:
+    """
+    Window for ticking off red-card sign-ins and turn-ins per window.
+
+    Each active holder gets a row with a sign-in and a turn-in box per
+    red-card window. Every change is written straight into the ledger and
+    reported through `on_change`; the rows are only rebuilt when a holder
+    is added or released.
+    """
+
+    def __init__(self, window: tk.Tk, ledger: RedCardLedger, on_change=None):
+        self.window = window
+        self.ledger = ledger
+        self.on_change = on_change
+        self._top = None
+        self._grid = None
+        self._summary = None
+        self._holder_entries = None
+
+    @property
+    def visible(self) -> bool:
+        return self._top is not None
+
+    def show(self):
+        if self.visible:
+            self._top.lift()
+            return
+        self._top = tk.Toplevel(self.window)
+        self._top.title("Red Card Ledger")
+        self._top.protocol("WM_DELETE_WINDOW", self.hide)
+
+        add_frame = tk.LabelFrame(self._top, text="Add Red-Card Holder", padx=10, pady=5)
+        add_frame.pack(fill="x", padx=10, pady=(10, 5))
+        fields = ttk.Frame(add_frame)
+        fields.pack(side="left", fill="x", expand=True)
+        self._holder_entries = {**create_person_entry_fields(fields), "Room": tk.Entry(fields, width=8)}
+        layout_widgets_in_grid(fields, self._holder_entries)
+        attach_name_completion(self._holder_entries)
+        ttk.Button(add_frame, text="Add Holder", command=self._add_holder).pack(side="right", padx=(5, 0))
+
+        self._grid = ttk.Frame(self._top, padding=(10, 5))
+        self._grid.pack(fill="both", expand=True)
+        self._summary = ttk.Label(self._top, anchor="w", padding=(10, 0, 10, 10))
+        self._summary.pack(fill="x")
+        self.refresh()
+
+    def hide(self):
+        if self._top is not None:
+            self._top.destroy()
+            self._top = None
+
+    def refresh(self):
+        """Rebuilds the holder rows from the ledger."""
+        if self._top is None:
+            return
+        for child in self._grid.winfo_children():
+            child.destroy()
+        ttk.Label(self._grid, text="Holder").grid(row=0, column=0, sticky="w", padx=(0, 10))
+        for index, window in enumerate(self.ledger.windows):
+            ttk.Label(self._grid, text=f"{window}\nIn  Out", justify="center").grid(row=0, column=index + 1, padx=4)
+
+        holders = self.ledger.active_holders()
+        for row, holder in enumerate(holders, start=1):
+            ttk.Label(self._grid, text=holder.label()).grid(row=row, column=0, sticky="w", padx=(0, 10))
+            for index, (window, checks) in enumerate(zip(self.ledger.windows, self.ledger.checks(holder))):
+                cell = ttk.Frame(self._grid)
+                cell.grid(row=row, column=index + 1, padx=4)
+                for side, checked in (("signed_in", checks[0]), ("turned_in", checks[1])):
+                    var = tk.BooleanVar(cell, value=checked)
+                    ttk.Checkbutton(
+                        cell, variable=var, command=lambda h=holder, w=window, s=side, v=var: self._mark(h, w, s, v)
+                    ).pack(side="left")
+            ttk.Button(self._grid, text="Release", command=lambda h=holder: self._release(h)).grid(
+                row=row, column=len(self.ledger.windows) + 1, padx=(10, 0)
+            )
+        if not holders:
+            ttk.Label(self._grid, text="No red cards out.", foreground="grey").grid(row=1, column=0, sticky="w")
+        self._update_summary()
+
+    def _update_summary(self):
+        missed = [f"{window}: {len(self.ledger.missed(window))}" for window in self.ledger.due_windows()]
+        self._summary.config(text=f"Missed so far - {', '.join(missed)}" if missed else "No windows are over yet.")
+
+    def _changed(self):
+        self._update_summary()
+        if self.on_change:
+            self.on_change()
+
+    def _add_holder(self):
+        values = {key: widget.get().strip() for key, widget in self._holder_entries.items()}
+        if not values["Last"] or not values["First"]:
+            messagebox.showwarning("Missing Name", "Enter the holder's last and first name.", parent=self._top)
+            return
+        self.ledger.add_holder(RosterEntry(values["Rank"], values["Last"], values["First"], values["MI"], values["Room"]))
+        for widget in self._holder_entries.values():
+            set_widget_value(widget, "")
+        self.refresh()
+        self._changed()
+
+    def _release(self, holder: RosterEntry):
+        self.ledger.release(holder)
+        self.refresh()
+        self._changed()
+
+    def _mark(self, holder: RosterEntry, window: str, side: str, var: tk.BooleanVar):
+        self.ledger.mark(holder, window, **{side: var.get()})
+        self._changed()
@@ -0,0 +1,82 @@
+import os
+import time
+import logging
+import tkinter as tk
+from tkinter import ttk
+from logic.metrics import LatencyRecorder
+from utils import user_data_path
+
+
+# How often the overlay refreshes while visible
+OVERLAY_REFRESH_MS = 500
+
+TOGGLE_KEY = "<F12>"
+DUMP_KEY = "<Control-F12>"
+
+
+log = logging.getLogger('app.overlay')
+
+
+class LatencyOverlay:
+    """
+    Small always-on-top window with live p50/p95/p99 preview latencies.
+
+    F12 toggles it and Ctrl+F12 dumps the samples to a JSON file next to the
+    other user data. Nothing is refreshed while it is hidden.
+    """
+
+    def __init__(self, window: tk.Tk, recorder: LatencyRecorder):
+        self.window = window
+        self.recorder = recorder
+        self._top = None
+        self._label = None
+        self._refresh_id = None
+        window.bind_all(TOGGLE_KEY, lambda e: self.toggle())
+        window.bind_all(DUMP_KEY, lambda e: self.dump())
+
+    @property
+    def visible(self) -> bool:
+        return self._top is not None
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        if self.visible:
+            return
+        self._top = tk.Toplevel(self.window)
+        self._top.title("Preview Latency")
+        self._top.attributes("-topmost", True)
+        self._top.resizable(False, False)
+        self._top.protocol("WM_DELETE_WINDOW", self.hide)
+        self._label = tk.Label(self._top, font=("Courier", 9), justify="left", anchor="w", padx=8, pady=8)
+        self._label.pack(fill="both")
+        ttk.Button(self._top, text="Dump JSON", command=self.dump).pack(pady=(0, 8))
+        self._refresh()
+
+    def hide(self):
+        if self._refresh_id is not None:
+            self.window.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        if self._top is not None:
+            self._top.destroy()
+            self._top = None
+
+    def dump(self) -> str:
+        """Writes the current samples to a timestamped JSON file and returns its path."""
+        path = user_data_path(f"latency-{time.strftime('%Y%m%d-%H%M%S')}.json")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.recorder.dump_json(path)
+        except OSError as e:
+            log.warning(f"Failed to dump latency samples: {e}")
+        return path
+
+    def _refresh(self):
+        if self._top is None:
+            return
+        self._label.config(text=self.recorder.format_summary())
+        self._refresh_id = self.window.after(OVERLAY_REFRESH_MS, self._refresh)
@@ -0,0 +1,186 @@
+import time
+import difflib
+import logging
+import tkinter as tk
+from logic.metrics import LatencyRecorder
+
+
+# Minimum delay between a change and the preview refresh. One frame at ~60Hz
+# is enough to fold a KeyRelease, a ComboboxSelected and a variable trace
+# from the same user action into a single update. 0 means "next idle".
+PREVIEW_DELAY_MS = 16
+
+
+log = logging.getLogger('app.preview')
+
+
+class PreviewScheduler:
+    """
+    Coalesces preview update requests into a single pending callback.
+
+    Every bound event calls `request()`. Only the first request schedules the
+    callback; any further requests that arrive before it runs are counted as
+    coalesced, since the callback reads the latest widget state anyway.
+
+    With a `recorder`, the time from the first request to the start of the
+    callback ("queue") and to its end ("total") is recorded for every run.
+    """
+
+    def __init__(self, widget: tk.Misc, callback: callable, delay_ms: int = PREVIEW_DELAY_MS,
+                 recorder: LatencyRecorder | None = None):
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self.recorder = recorder
+        self.requested = 0
+        self.coalesced = 0
+        self.runs = 0
+        self._pending = None
+        self._requested_at = 0.0
+
+    @property
+    def pending(self) -> bool:
+        """True while an update is scheduled but has not run yet."""
+        return self._pending is not None
+
+    def request(self, *_args):
+        """Requests a preview update. Accepts and ignores event/trace arguments."""
+        self.requested += 1
+        if self._pending is not None:
+            self.coalesced += 1
+            return
+        self._requested_at = time.perf_counter()
+        if self.delay_ms > 0:
+            self._pending = self.widget.after(self.delay_ms, self._run)
+        else:
+            self._pending = self.widget.after_idle(self._run)
+
+    def flush(self):
+        """Runs a pending update immediately instead of waiting for the timer."""
+        if self._pending is None:
+            return
+        self.cancel()
+        self._run()
+
+    def cancel(self):
+        """Drops the pending update, if any."""
+        if self._pending is None:
+            return
+        try:
+            self.widget.after_cancel(self._pending)
+        except tk.TclError:
+            pass
+        self._pending = None
+
+    def stats(self) -> dict:
+        """Returns the request/coalesce/run counters."""
+        return {
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "runs": self.runs,
+        }
+
+    def _run(self):
+        self._pending = None
+        self.runs += 1
+        started_at = time.perf_counter()
+        try:
+            self.callback()
+        finally:
+            if self.recorder is not None:
+                self.recorder.record("queue", started_at - self._requested_at)
+                self.recorder.record("total", time.perf_counter() - self._requested_at)
+            if self.runs % 100 == 0 and log.isEnabledFor(logging.DEBUG):
+                log.debug("Preview scheduler stats: %s", self.stats())
+
+
+class PreviewApplier:
+    """
+    Patches the preview Text widget and line-number gutter in place.
+
+    Instead of replacing the whole document, the new email is diffed line by
+    line against the last applied one and only the changed ranges are deleted
+    and inserted. Tk then only re-lays out those lines, and the scroll
+    position and selection outside the edited ranges are left alone.
+    """
+
+    def __init__(self, text_widget: tk.Text, line_numbers_widget: tk.Text):
+        self.text_widget = text_widget
+        self.line_numbers_widget = line_numbers_widget
+        self.lines = [""]
+        self.numbered_lines = 0
+        self.last_touched = 0
+
+    def apply(self, content: str, show_line_numbers: bool = True) -> int:
+        """Updates both widgets to show `content` and returns how many lines were touched."""
+        new_lines = content.split("\n")
+        if new_lines == self.lines and self.numbered_lines == (len(new_lines) if show_line_numbers else 0):
+            self.last_touched = 0
+            return 0
+
+        text = self.text_widget
+        first_visible = text.yview()[0]
+        selection = text.tag_ranges("sel")
+
+        text.config(state="normal")
+        touched = self._patch_text(new_lines)
+        text.config(state="disabled")
+        self.lines = new_lines
+
+        self._patch_line_numbers(len(new_lines) if show_line_numbers else 0)
+
+        # Re-apply the previous view; edits above it may have shifted it
+        if selection and not text.tag_ranges("sel"):
+            text.tag_add("sel", *selection)
+        text.yview_moveto(first_visible)
+        self.line_numbers_widget.yview_moveto(first_visible)
+
+        self.last_touched = touched
+        return touched
+
+    def _patch_text(self, new_lines: list[str]) -> int:
+        text = self.text_widget
+        old_lines = self.lines
+        old_count = len(old_lines)
+        matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+        touched = 0
+
+        # Apply from the bottom up so earlier line indices stay valid
+        for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+            if tag == "equal":
+                continue
+            touched += max(i2 - i1, j2 - j1)
+            replacement = new_lines[j1:j2]
+
+            if i2 < old_count:
+                # Range is followed by another line, so every line keeps its newline
+                if i2 > i1:
+                    text.delete(f"{i1 + 1}.0", f"{i2 + 1}.0")
+                if replacement:
+                    text.insert(f"{i1 + 1}.0", "".join(f"{line}\n" for line in replacement))
+            elif i1 == 0:
+                # Range runs to the end of the document from its first line
+                text.delete("1.0", "end-1c")
+                text.insert("1.0", "\n".join(replacement))
+            else:
+                # Range runs to the end of the document; start at the previous line's newline
+                text.delete(f"{i1}.end", "end-1c")
+                if replacement:
+                    text.insert("end-1c", "\n" + "\n".join(replacement))
+        return touched
+
+    def _patch_line_numbers(self, count: int):
+        current = self.numbered_lines
+        if count == current:
+            return
+        gutter = self.line_numbers_widget
+        gutter.config(state="normal")
+        if count > current:
+            numbers = "\n".join(str(i) for i in range(current + 1, count + 1))
+            gutter.insert("end-1c", f"\n{numbers}" if current else numbers)
+        elif count == 0:
+            gutter.delete("1.0", "end-1c")
+        else:
+            gutter.delete(f"{count}.end", "end-1c")
+        gutter.config(state="disabled")
+        self.numbered_lines = count
@@ -0,0 +1,216 @@
+import logging
+import tkinter as tk
+from tkinter import ttk
+from gui.widgets import bind_update_callback, set_widget_value
+from gui.autocomplete import attach_name_completion
+
+
+# Hidden rows kept for reuse per section; extra removed rows are destroyed
+ROW_POOL_LIMIT = 50
+
+# Widget rows materialized at once in virtual mode
+VISIBLE_ROWS = 8
+
+
+log = logging.getLogger('app.rows')
+
+
+class RowList(list):
+    """
+    The rows of a section that builds its own row widgets (runners, notes).
+
+    `add_row(values)` calls back into the section, so callers can add rows
+    the same way as for PooledRows.
+    """
+
+    def __init__(self, add_row_function: callable):
+        super().__init__()
+        self._add_row = add_row_function
+
+    def add_row(self, values=None):
+        return self._add_row(values)
+
+
+class PooledRows(list):
+    """
+    The entry widgets of a dynamic section, one dict per row.
+
+    Removed rows are hidden and kept in a pool instead of being destroyed,
+    and added rows are taken from the pool when possible, so adding and
+    removing a row does not create or destroy any widgets.
+    """
+
+    def __init__(self, container: tk.Widget, widget_factory: callable, layout_function: callable,
+                 update_callback=None, min_rows: int = 1):
+        super().__init__()
+        self.container = container
+        self.widget_factory = widget_factory
+        self.layout_function = layout_function
+        self.update_callback = update_callback
+        self.min_rows = min_rows
+        self._frames = []
+        self._pool = []
+
+    def _build_row(self) -> tuple[ttk.LabelFrame, dict]:
+        row_frame = ttk.LabelFrame(self.container)
+
+        # Create a sub-frame for the top row of widgets
+        top_row_frame = ttk.Frame(row_frame)
+        top_row_frame.pack(fill="x", expand=True)
+
+        entry_widgets = self.widget_factory(top_row_frame, row_frame)
+
+        # Layout only the widgets intended for the top row
+        top_row_widgets = {k: v for k, v in entry_widgets.items() if k != "Reason"}
+        self.layout_function(top_row_frame, top_row_widgets)
+        bind_update_callback(entry_widgets, self.update_callback)
+        attach_name_completion(entry_widgets)
+        return row_frame, entry_widgets
+
+    def add_row(self, values: dict | None = None) -> dict:
+        """Shows a new row at the end, optionally pre-filled, and returns its widgets."""
+        if self._pool:
+            row_frame, entry_widgets = self._pool.pop()
+            for widget in entry_widgets.values():
+                set_widget_value(widget, "")
+        else:
+            row_frame, entry_widgets = self._build_row()
+
+        row_frame.config(text=f"Entry #{len(self) + 1}")
+        row_frame.pack(fill="x", pady=2, padx=5)
+        for key, value in (values or {}).items():
+            if key in entry_widgets:
+                set_widget_value(entry_widgets[key], value)
+
+        self.append(entry_widgets)
+        self._frames.append(row_frame)
+        if self.update_callback:
+            self.update_callback()
+        return entry_widgets
+
+    def remove_last_row(self):
+        """Hides the last row, keeping at least `min_rows`."""
+        if len(self) <= self.min_rows:
+            return
+        log.debug("Removing last row.")
+        entry_widgets = self.pop()
+        row_frame = self._frames.pop()
+        row_frame.pack_forget()
+        if len(self._pool) < ROW_POOL_LIMIT:
+            self._pool.append((row_frame, entry_widgets))
+        else:
+            row_frame.destroy()
+        if self.update_callback:
+            self.update_callback()
+
+
+class FieldProxy:
+    """
+    Stands in for one entry widget of a row in virtual mode.
+
+    While the row is on screen `get()` reads the widget it is bound to;
+    otherwise it returns the value saved when the row scrolled out of view.
+    """
+    __slots__ = ("value", "widget")
+
+    def __init__(self, value: str = ""):
+        self.value = value
+        self.widget = None
+
+    def get(self) -> str:
+        return self.widget.get() if self.widget is not None else self.value
+
+    def set(self, value: str):
+        self.value = value
+        if self.widget is not None:
+            set_widget_value(self.widget, value)
+
+    def bind_widget(self, widget: tk.Widget):
+        self.widget = widget
+        set_widget_value(widget, self.value)
+
+    def unbind_widget(self):
+        if self.widget is not None:
+            self.value = self.widget.get()
+            self.widget = None
+
+
+class VirtualRows(PooledRows):
+    """
+    A dynamic section that only materializes widgets for the visible rows.
+
+    Each entry is a dict of FieldProxy objects, so `snapshot_ui` reads it
+    like real widgets. At most `visible_rows` widget rows exist; paging
+    re-binds them to other entries, which costs O(visible_rows) no matter
+    how many rows the section holds.
+    """
+
+    def __init__(self, container: tk.Widget, widget_factory: callable, layout_function: callable,
+                 update_callback=None, min_rows: int = 1, visible_rows: int = VISIBLE_ROWS):
+        super().__init__(container, widget_factory, layout_function, update_callback, min_rows)
+        self.visible_rows = visible_rows
+        self.first_visible = 0
+        self._slots = []
+        self._keys = None
+
+        nav_frame = ttk.Frame(container)
+        nav_frame.pack(side="bottom", fill="x", pady=(2, 0))
+        ttk.Button(nav_frame, text="Prev", width=6, command=lambda: self.scroll_to(self.first_visible - self.visible_rows)).pack(side="left", padx=5)
+        ttk.Button(nav_frame, text="Next", width=6, command=lambda: self.scroll_to(self.first_visible + self.visible_rows)).pack(side="left")
+        self._position_label = ttk.Label(nav_frame)
+        self._position_label.pack(side="left", padx=10)
+
+    def add_row(self, values: dict | None = None) -> dict:
+        """Appends a new row, optionally pre-filled, and pages to it."""
+        if self._keys is None:
+            self._slots.append(self._build_row())
+            self._keys = list(self._slots[0][1])
+        proxies = {key: FieldProxy() for key in self._keys}
+        for key, value in (values or {}).items():
+            if key in proxies:
+                proxies[key].value = value
+        self.append(proxies)
+
+        last_page = (len(self) - 1) // self.visible_rows * self.visible_rows
+        self.scroll_to(last_page)
+        if self.update_callback:
+            self.update_callback()
+        return proxies
+
+    def remove_last_row(self):
+        """Drops the last row, keeping at least `min_rows`."""
+        if len(self) <= self.min_rows:
+            return
+        log.debug("Removing last virtual row.")
+        for proxy in self.pop().values():
+            proxy.unbind_widget()
+        self.scroll_to(min(self.first_visible, (len(self) - 1) // self.visible_rows * self.visible_rows))
+        if self.update_callback:
+            self.update_callback()
+
+    def scroll_to(self, first: int):
+        """Shows the rows starting at index `first` in the widget slots."""
+        first = max(0, min(first, max(0, len(self) - 1)))
+        for slot_index in range(self.visible_rows):
+            row_index = self.first_visible + slot_index
+            if row_index < len(self):
+                for proxy in self[row_index].values():
+                    proxy.unbind_widget()
+        self.first_visible = first
+
+        for slot_index in range(self.visible_rows):
+            row_index = first + slot_index
+            if row_index >= len(self):
+                if slot_index < len(self._slots):
+                    self._slots[slot_index][0].pack_forget()
+                continue
+            if slot_index >= len(self._slots):
+                self._slots.append(self._build_row())
+            row_frame, entry_widgets = self._slots[slot_index]
+            for key, proxy in self[row_index].items():
+                proxy.bind_widget(entry_widgets[key])
+            row_frame.config(text=f"Entry #{row_index + 1}")
+            row_frame.pack(fill="x", pady=2, padx=5)
+
+        last_shown = min(len(self), first + self.visible_rows)
+        self._position_label.config(text=f"Rows {first + 1 if len(self) else 0}-{last_shown} of {len(self)}")
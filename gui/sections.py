@@ -1,19 +1,29 @@
 import logging
 import tkinter as tk
 from tkinter import ttk
+from collections.abc import Callable
 from constants import Constants
 from gui.widgets import (
     create_combobox, 
     create_person_entry_fields, 
     layout_widgets_in_grid,
+    bind_update_callback,
+    set_widget_value,
 )
+from gui.rows import PooledRows, VirtualRows, RowList
+from gui.autocomplete import attach_name_completion
+from logic.rooms import ROOM_DIRECTORY
 
 
 log = logging.getLogger('app.sections')
 
 
-def create_email_preview_section(parent: tk.Widget, check_email_callback=None) -> tuple[tk.Text, tk.Text]:
-    """Creates the email preview section with a main text widget and a line number widget."""
+def create_email_preview_section(parent: tk.Widget, check_email_callback=None, copy_callback=None) -> tuple[tk.Text, tk.Text]:
+    """
+    Creates the email preview section with a main text widget and a line number widget.
+    
+    `copy_callback` runs after each press of the Copy Email button.
+    """
     log.debug("Creating email preview section.")
     
     frame = tk.LabelFrame(parent, text="Email Preview", padx=10, pady=10)
@@ -83,6 +93,8 @@ def create_email_preview_section(parent: tk.Widget, check_email_callback=None) -
         parent.clipboard_append(content)
         copy_button.config(text="Copied!")
         parent.after(2000, lambda: copy_button.config(text="Copy Email"))
+        if copy_callback:
+            copy_callback()
     
     copy_button = ttk.Button(
         button_frame, 
@@ -102,7 +114,19 @@ def create_email_preview_section(parent: tk.Widget, check_email_callback=None) -
     
     return text_widget, line_numbers
 
-def create_manor_section(parent: tk.Widget, manor_options: list[str]) -> tk.StringVar:
+def create_scanner_status_section(parent: tk.Widget, add_lates_callback=None) -> tk.StringVar:
+    """Creates the live CAC scanner status line and returns its StringVar."""
+    log.debug("Creating scanner status line.")
+    frame = ttk.Frame(parent)
+    frame.pack(side="bottom", fill="x", pady=(5, 0))
+    status_var = tk.StringVar()
+    if add_lates_callback:
+        ttk.Button(frame, text="Add Scanned Lates", command=add_lates_callback).pack(side="right")
+    ttk.Label(frame, textvariable=status_var, anchor="w").pack(side="left", fill="x", expand=True)
+    return status_var
+
+def create_manor_section(parent: tk.Widget, manor_options: list[str] | Callable[[], list[str]], import_roster_callback=None,
+                         import_scans_callback=None) -> tk.StringVar:
     """Creates the manor selection UI and returns the associated StringVar."""
     log.debug("Creating manor selector.")
     frame = ttk.Frame(parent)
@@ -111,6 +135,10 @@ def create_manor_section(parent: tk.Widget, manor_options: list[str]) -> tk.Stri
     manor_var = tk.StringVar()
     manor_combobox = create_combobox(frame, manor_var, manor_options, 15)
     manor_combobox.pack(side="left")
+    if import_scans_callback:
+        ttk.Button(frame, text="Import Scans...", command=import_scans_callback).pack(side="right", padx=(5, 0))
+    if import_roster_callback:
+        ttk.Button(frame, text="Import Roster...", command=import_roster_callback).pack(side="right")
     return manor_var
 
 def create_airman_leaders_section(parent: tk.Widget, roles: list[str]) -> dict:
@@ -127,10 +155,11 @@ def create_airman_leaders_section(parent: tk.Widget, roles: list[str]) -> dict:
         person_entries = create_person_entry_fields(role_frame)
         entries_dict[role] = person_entries
         layout_widgets_in_grid(role_frame, person_entries)
+        attach_name_completion(person_entries)
 
     return entries_dict
 
-def create_charge_quarters_section(parent: tk.Widget, roles: list[str]) -> dict:
+def create_charge_quarters_section(parent: tk.Widget, roles: list[str], update_callback=None) -> dict:
     """Creates the CQ Team section UI."""
     log.debug("Creating CQ Team section.")
     frame = tk.LabelFrame(parent, text="Charge of Quarters")
@@ -144,6 +173,7 @@ def create_charge_quarters_section(parent: tk.Widget, roles: list[str]) -> dict:
         person_entries = create_person_entry_fields(role_frame)
         entries_dict[role] = person_entries
         layout_widgets_in_grid(role_frame, person_entries)
+        attach_name_completion(person_entries)
 
     def create_multi_person_role_ui(role: str):
         log.debug(f"Creating multi-person UI for CQ role: {role}")
@@ -151,15 +181,23 @@ def create_charge_quarters_section(parent: tk.Widget, roles: list[str]) -> dict:
         role_frame.pack(pady=5, padx=5, fill="x")
         container = ttk.Frame(role_frame)
         container.pack(fill="x")
-        entries_dict[role] = []
-
-        def add_new_person_row():
+        def add_new_person_row(values: dict | None = None) -> dict:
             log.debug(f"Adding new person row for {role}.")
             row_frame = ttk.Frame(container)
             row_frame.pack(fill="x", pady=2)
             person_entries = create_person_entry_fields(row_frame)
             entries_dict[role].append(person_entries)
             layout_widgets_in_grid(row_frame, person_entries)
+            bind_update_callback(person_entries, update_callback)
+            attach_name_completion(person_entries)
+            for key, value in (values or {}).items():
+                if key in person_entries:
+                    set_widget_value(person_entries[key], value)
+            if update_callback:
+                update_callback()
+            return person_entries
+
+        entries_dict[role] = RowList(add_new_person_row)
 
         def remove_last_runner():
             if len(entries_dict[role]) <= 1:
@@ -170,6 +208,8 @@ def create_charge_quarters_section(parent: tk.Widget, roles: list[str]) -> dict:
                 # Find one widget to get the parent frame from
                 any_widget = next(iter(last_entries.values()))
                 any_widget.master.destroy()
+                if update_callback:
+                    update_callback()
 
         button_frame = ttk.Frame(role_frame)
         button_frame.pack(fill="x", pady=(5, 5))  # Added 5px bottom padding
@@ -189,56 +229,34 @@ def create_charge_quarters_section(parent: tk.Widget, roles: list[str]) -> dict:
             create_single_person_role_ui(role)
     return entries_dict
 
-def create_dynamic_entry_section(parent: tk.Widget, title: str, widget_factory: callable, layout_function: callable, add_button_text: str) -> list:
-    """Creates a section with a button to dynamically add new entry rows."""
+def create_dynamic_entry_section(parent: tk.Widget, title: str, widget_factory: callable, layout_function: callable, add_button_text: str, update_callback=None, virtual: bool = False,
+                                 extra_buttons: dict[str, Callable] | None = None) -> PooledRows:
+    """
+    Creates a section with a button to dynamically add new entry rows.
+    
+    Returns the list of row widget dicts, which also has `add_row(values)` and
+    `remove_last_row()`. With `virtual=True` only the visible rows get widgets.
+    `extra_buttons` maps button texts to commands shown after the row buttons.
+    """
     log.debug(f"Creating dynamic entry section: {title}")
     frame = tk.LabelFrame(parent, text=title, padx=10, pady=10)
     frame.pack(padx=10, pady=10, fill="both", expand=True)
     container = ttk.Frame(frame)
     container.pack(fill="x")
     
-    entries_list = []
-    rows = 0
-    
-    def add_new_row():
-        log.debug(f"Adding new row in {title} section.")
-        nonlocal rows 
-        rows += 1
-        row_frame = ttk.LabelFrame(container, text=f"Entry #{rows}")
-        row_frame.pack(fill="x", pady=2, padx=5)
-        
-        # Create a sub-frame for the top row of widgets
-        top_row_frame = ttk.Frame(row_frame)
-        top_row_frame.pack(fill="x", expand=True)
-        
-        entry_widgets = widget_factory(top_row_frame, row_frame)
-        entries_list.append(entry_widgets)
-        
-        # Layout only the widgets intended for the top row
-        top_row_widgets = {k: v for k, v in entry_widgets.items() if k != "Reason"}
-        layout_function(top_row_frame, top_row_widgets)
+    rows_class = VirtualRows if virtual else PooledRows
+    entries_list = rows_class(container, widget_factory, layout_function, update_callback)
 
-    add_button = ttk.Button(frame, text=add_button_text, command=add_new_row)
+    add_button = ttk.Button(frame, text=add_button_text, command=entries_list.add_row)
     add_button.pack(side="left", padx=5, pady=(5, 0))
-    
-    def remove_last_row():
-        nonlocal rows 
-        if rows == 1:
-            return
-        if entries_list:
-            rows -= 1
-            log.debug(f"Removing last row in {title} section.")
-            last_widgets = entries_list.pop()
-            # The master of the widgets is the LabelFrame for the row
-            if last_widgets:
-                # Find one widget to get the master from
-                any_widget = next(iter(last_widgets.values()))
-                any_widget.master.master.destroy()
                 
-    remove_button = ttk.Button(frame, text="Remove Last", command=remove_last_row)
+    remove_button = ttk.Button(frame, text="Remove Last", command=entries_list.remove_last_row)
     remove_button.pack(side="left", padx=5, pady=(5, 0))
+
+    for text, command in (extra_buttons or {}).items():
+        ttk.Button(frame, text=text, command=command).pack(side="right", padx=5, pady=(5, 0))
         
-    add_new_row()
+    entries_list.add_row()
     return entries_list
 
 def create_notes_section(parent: tk.Widget, update_callback=None) -> tuple[tk.BooleanVar, tk.StringVar, list]:
@@ -261,15 +279,14 @@ def create_notes_section(parent: tk.Widget, update_callback=None) -> tuple[tk.Bo
 
     ttk.Label(frame, text="On-Call MTL:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
     mtl_var = tk.StringVar()
-    create_combobox(frame, mtl_var, Constants.on_call_mtls, 25).grid(row=1, column=1, sticky="w", padx=5, pady=5)
+    create_combobox(frame, mtl_var, lambda: ROOM_DIRECTORY.on_call_mtls, 25).grid(row=1, column=1, sticky="w", padx=5, pady=5)
 
     notes_container = ttk.Frame(frame)
     notes_container.grid(row=2, column=0, columnspan=2, sticky="ew", padx=5, pady=(10, 0))
     
-    notes_entries = []
     rows = 0
     
-    def add_note_field():
+    def add_note_field(value: str | None = None) -> ttk.Entry:
         log.debug("Adding new note field.")
         nonlocal rows
         rows += 1
@@ -279,11 +296,17 @@ def create_notes_section(parent: tk.Widget, update_callback=None) -> tuple[tk.Bo
         ttk.Label(row, text="Note:").pack(side="left", padx=(0, 5))
         entry = ttk.Entry(row)
         entry.pack(side="left", fill="x", expand=True)
+        if value:
+            entry.insert(0, value)
         notes_entries.append(entry)
         
         # Bind update callback to new entry if provided
+        bind_update_callback({"Note": entry}, update_callback)
         if update_callback:
-            entry.bind('<KeyRelease>', lambda e: parent.after_idle(update_callback))
+            update_callback()
+        return entry
+
+    notes_entries = RowList(add_note_field)
     
     def remove_last_note_field():
         nonlocal rows 
@@ -297,7 +320,7 @@ def create_notes_section(parent: tk.Widget, update_callback=None) -> tuple[tk.Bo
             notes_container.update_idletasks()
             # Trigger update after removal
             if update_callback:
-                parent.after_idle(update_callback)
+                update_callback()
     
     button_row = ttk.Frame(frame)
     button_row.grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=(5, 0))
@@ -335,4 +358,5 @@ def create_signature_section(parent: tk.Widget) -> dict:
             colspan = 3 if key == "AFSC/Job" else 1
             widgets[key].grid(row=r, column=col, columnspan=colspan, sticky="ew", padx=5, pady=2)
             col += colspan
+    attach_name_completion(widgets)
     return widgets
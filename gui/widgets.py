@@ -1,4 +1,6 @@
 import logging
+import functools
+from collections.abc import Callable
 import tkinter as tk
 from tkinter import ttk
 from constants import Constants
@@ -7,27 +9,56 @@ from constants import Constants
 log = logging.getLogger('app.widgets')
 
 
-def create_combobox(parent: tk.Widget, variable: tk.StringVar, values: list[str], width: int) -> ttk.Combobox:
-    """Generic factory for creating a readonly ttk.Combobox."""
-    log.debug(f"Creating combobox in {parent.winfo_class()} with {len(values)} values.")
+@functools.cache
+def _with_blank_option(values: tuple[str, ...]) -> tuple[str, ...]:
+    """Automatic blank value addition, computed once per distinct options list."""
+    if not values or values[0] != '':
+        return ('', *values)
+    return values
+
+def create_combobox(parent: tk.Widget, variable: tk.StringVar, values: list[str] | Callable[[], list[str]], width: int) -> ttk.Combobox:
+    """
+    Generic factory for creating a readonly ttk.Combobox.
+
+    `values` may be a function returning the options, in which case they
+    are fetched again every time the list is opened.
+    """
+    options = values() if callable(values) else values
+    log.debug("Creating combobox with %d values.", len(options))
     
-    # Automatic Blank Value Addition ---
-    new_values = list(values) 
-    if not new_values or new_values[0] != '':
-        new_values.insert(0, '')
     variable.set('')
     
-    return ttk.Combobox(
+    combobox = ttk.Combobox(
         parent, 
         textvariable=variable, 
-        values=new_values, 
+        values=_with_blank_option(tuple(options)), 
         state="readonly", 
         width=width
     )
+    if callable(values):
+        combobox.configure(postcommand=lambda: combobox.configure(values=_with_blank_option(tuple(values()))))
+    return combobox
+
+def set_widget_value(widget: tk.Widget, value: str):
+    """Sets the text of an Entry or (readonly) Combobox."""
+    if isinstance(widget, ttk.Combobox):
+        widget.set(value)
+    else:
+        widget.delete(0, tk.END)
+        widget.insert(0, value)
+
+def bind_update_callback(widgets: dict[str, tk.Widget], update_callback=None):
+    """Binds an update callback to the edit events of every widget in a row."""
+    if not update_callback:
+        return
+    for widget in widgets.values():
+        widget.bind('<KeyRelease>', lambda e: update_callback(), add='+')
+        if isinstance(widget, ttk.Combobox):
+            widget.bind('<<ComboboxSelected>>', lambda e: update_callback(), add='+')
 
 def create_person_entry_fields(parent: tk.Widget) -> dict[str, tk.Widget]:
     """Creates a standard set of widgets for entering a person's details."""
-    log.debug(f"Creating person entry fields in {parent.winfo_class()}.")
+    log.debug("Creating person entry fields.")
     return {
         "Rank": create_combobox(parent, tk.StringVar(parent), Constants.rank_options, 12),
         "Last": tk.Entry(parent, width=15), 
@@ -70,7 +101,7 @@ def create_late_entry_widgets(parent: tk.Widget, bottom_parent: tk.Widget) -> di
 
 def layout_widgets_in_grid(parent: tk.Widget, widgets: dict[str, tk.Widget], custom_labels: dict = None):
     """Lays out labels and widgets in a grid format."""
-    log.debug(f"Laying out {len(widgets)} widgets in grid for {parent.winfo_class()}.")
+    log.debug("Laying out %d widgets in grid.", len(widgets))
     if custom_labels is None:
         custom_labels = {}
     col = 0
@@ -12,15 +12,27 @@ ICON_PATH = "assets/app_icon.png"
 log = logging.getLogger('app.window')
 
 
-def create_main_window() -> tk.Tk:
-    """Creates and configures the main application window."""
-    log.debug(f"Creating main window with title: '{TITLE}'")
+def create_main_window(with_icon: bool = True) -> tk.Tk:
+    """
+    Creates and configures the main application window.
+
+    Decoding the icon PNG is one of the slowest startup steps; pass
+    `with_icon=False` and call `set_window_icon` later to keep it off the
+    path to the first frame.
+    """
+    log.debug("Creating main window with title: '%s'", TITLE)
     
     window = tk.Tk()
     window.title(TITLE)
     window.state('zoomed')  # Start maximized
     window.minsize(1200, 600)  # Minimum size to prevent too small windows
-    
+
+    if with_icon:
+        set_window_icon(window)
+    return window
+
+def set_window_icon(window: tk.Tk):
+    """Sets the window icon from the bundled PNG."""
     try:
         icon_path = resource_path(ICON_PATH)
         app_icon = tk.PhotoImage(file=icon_path)
@@ -29,8 +41,6 @@ def create_main_window() -> tk.Tk:
     
     except Exception as e:
         log.warning(f"Failed to set window icon: {e}")
-        
-    return window
 
 def setup_scrollable_area(parent: tk.Widget) -> tuple[ttk.Frame, tk.Canvas]:
     """Creates a scrollable area and returns the content frame and canvas."""
@@ -1,22 +1,140 @@
+import os
+import csv
+import shutil
 import logging
+import sqlite3
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 from logic.processing import (
     get_form_data, 
     format_email_body, 
+    FormGatherer,
     ValidationException
 )
+from logic.archive import ShiftArchive
+from logic.aggregator import shift_date
+from logic.outbox import OutboxWorker
+from logic.models import Person, ShiftReport
+from logic.roster import Roster, ROSTER_PATH
+from logic.scans import Reconciliation, default_curfew, reconcile_file
+from constants import Constants
 
 
 log = logging.getLogger('app.actions')
 
 
-def check_email_action(main_window: tk.Tk, ui_elements: dict):
-    """Validates the form and shows either errors or success message with option to generate."""
+# Opened on first use so startup does not touch the disk
+_archive = None
+_last_archived_body = None
+
+
+def archive_report(report: ShiftReport, email_body: str):
+    """Saves a validated report to the local shift archive, once per distinct email."""
+    global _archive, _last_archived_body
+    if email_body == _last_archived_body:
+        return
+    try:
+        if _archive is None:
+            _archive = ShiftArchive()
+        _archive.save_report(report, email_body=email_body)
+        _last_archived_body = email_body
+    except (sqlite3.Error, OSError) as e:
+        log.warning(f"Failed to archive report: {e}")
+
+
+def archived_people() -> list[Person]:
+    """Everyone in the local shift archive, for name matching; empty if it cannot be read."""
+    global _archive
+    try:
+        if _archive is None:
+            _archive = ShiftArchive()
+        return _archive.people()
+    except (sqlite3.Error, OSError) as e:
+        log.warning(f"Failed to read people from the archive: {e}")
+        return []
+
+
+def import_roster_action(main_window: tk.Tk) -> Roster | None:
+    """Asks for a roster CSV, loads it and keeps a copy to load at the next startup."""
+    log.info("Import Roster action triggered.")
+    path = filedialog.askopenfilename(
+        parent=main_window,
+        title="Import Roster",
+        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+    )
+    if not path:
+        return None
+
+    try:
+        roster = Roster.load(path)
+        os.makedirs(os.path.dirname(ROSTER_PATH), exist_ok=True)
+        shutil.copyfile(path, ROSTER_PATH)
+    except (OSError, ValueError, csv.Error) as e:
+        log.warning(f"Roster import failed: {e}")
+        messagebox.showerror("Roster Import Failed", f"Could not import {os.path.basename(path)}:\n\n{e}")
+        return None
+
+    messagebox.showinfo("Roster Imported", f"Loaded {len(roster)} trainees.\n\nStart typing a last name to pick from the roster.")
+    return roster
+
+
+def import_scans_action(main_window: tk.Tk, roster: Roster | None, add_lates_callback) -> Reconciliation | None:
+    """
+    Asks for a CAC scanner export and a curfew, and reconciles the scans
+    against the roster. `add_lates_callback(result)` puts the lates in the
+    form and returns how many rows it added.
+    """
+    log.info("Import Scans action triggered.")
+    if roster is None:
+        messagebox.showwarning("No Roster", "Import a roster first; scans are matched to trainees by name.")
+        return None
+    path = filedialog.askopenfilename(
+        parent=main_window,
+        title="Import CAC Scans",
+        filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+    )
+    if not path:
+        return None
+
+    curfew = simpledialog.askstring(
+        "Curfew",
+        f"Curfew for this shift ({', '.join(Constants.standard_late_times)}):",
+        initialvalue=default_curfew(shift_date()),
+        parent=main_window,
+    )
+    if curfew is None:
+        return None
+    curfew = curfew.strip()
+    if curfew not in Constants.standard_late_times:
+        messagebox.showerror("Invalid Curfew", f"Curfew must be one of {', '.join(Constants.standard_late_times)}.")
+        return None
+
+    try:
+        result = reconcile_file(path, roster, curfew, shift_date())
+    except (OSError, ValueError, UnicodeDecodeError, csv.Error) as e:
+        log.warning(f"Scan import failed: {e}")
+        messagebox.showerror("Scan Import Failed", f"Could not read {os.path.basename(path)}:\n\n{e}")
+        return None
+
+    added = add_lates_callback(result)
+    messagebox.showinfo(
+        "Scans Imported",
+        f"{result.summary()}.\n\nAdded {added} late row(s). Fill in the reasons before sending.",
+    )
+    return result
+
+
+def check_email_action(main_window: tk.Tk, ui_elements: dict, gatherer: FormGatherer | None = None, on_copied=None,
+                       outbox: OutboxWorker | None = None):
+    """
+    Validates the form and shows either errors or success message with option to generate.
+    `on_copied` runs after the generated email is copied (or queued for sending) and archived.
+    With an `outbox`, the result window can also send the email.
+    """
     log.info("Check Email action triggered.")
     
     try:
-        form_data = get_form_data(ui_elements)
+        form_data = get_form_data(ui_elements, gatherer)
         # If we get here, validation passed
         log.info("Validation passed successfully.")
         
@@ -29,7 +147,18 @@ def check_email_action(main_window: tk.Tk, ui_elements: dict):
         
         if result:  # User clicked "Yes"
             email_body = format_email_body(form_data)
-            display_result(main_window, email_body)
+            def copied():
+                archive_report(form_data, email_body)
+                if on_copied:
+                    on_copied()
+
+            def send(text: str) -> bool:
+                subject = f"{form_data.manor} Accountability - {shift_date():%d %b %Y}"
+                queued = outbox.enqueue(subject, text)
+                copied()
+                return queued
+
+            display_result(main_window, email_body, copied, send if outbox else None)
         
     except ValidationException as e:
         log.warning("Validation failed, showing error message.")
@@ -40,8 +169,25 @@ def check_email_action(main_window: tk.Tk, ui_elements: dict):
         )
         
         
-def display_result(parent_window: tk.Tk, content: str):
-    """Creates a new window to display the generated email body."""
+def report_delivery_failures(main_window: tk.Tk, outbox: OutboxWorker):
+    """Tells the user about queued emails that could not be delivered."""
+    failures = outbox.take_failures()
+    if not failures:
+        return
+    details = "\n\n".join(f"{subject}:\n{error}" for subject, error in failures)
+    messagebox.showerror(
+        "Email Not Sent",
+        f"{len(failures)} queued email(s) could not be delivered:\n\n{details}\n\n"
+        "Generate the email again and copy it to send it another way.",
+        parent=main_window,
+    )
+
+
+def display_result(parent_window: tk.Tk, content: str, copy_callback=None, send_callback=None):
+    """
+    Creates a new window to display the generated email body. `copy_callback` runs after each copy.
+    With `send_callback`, a Send button passes it the text, and it returns False if that text was already queued.
+    """
     log.debug("Displaying result window.")
     result_window = tk.Toplevel(parent_window)
     result_window.title("Generated Email Body")
@@ -57,10 +203,22 @@ def display_result(parent_window: tk.Tk, content: str):
         parent_window.clipboard_append(text_area.get("1.0", tk.END))
         copy_button.config(text="Copied!")
         parent_window.after(2000, lambda: copy_button.config(text="Copy to Clipboard"))
+        if copy_callback:
+            copy_callback()
 
     copy_button = ttk.Button(result_window, text="Copy to Clipboard", command=copy_to_clipboard)
     copy_button.pack(pady=5)
 
+    def send_email():
+        log.info("Queueing email for sending.")
+        # Only writes to the outbox; the background worker does the sending
+        queued = send_callback(text_area.get("1.0", "end-1c"))
+        send_button.config(text="Queued for Sending" if queued else "Already Queued", state="disabled")
+
+    if send_callback:
+        send_button = ttk.Button(result_window, text="Send Email", command=send_email)
+        send_button.pack(pady=(0, 5))
+
 
 def generate_email_action(main_window: tk.Tk, ui_elements: dict):
     """Orchestrates the process of generating and displaying the email."""
@@ -69,7 +227,7 @@ def generate_email_action(main_window: tk.Tk, ui_elements: dict):
     try:
         form_data = get_form_data(ui_elements)
         email_body = format_email_body(form_data)
-        display_result(main_window, email_body)
+        display_result(main_window, email_body, lambda: archive_report(form_data, email_body))
         
     except ValidationException as e:
         log.warning("Validation failed, showing error message.")
@@ -0,0 +1,394 @@
+"""
+Local service that merges the reports of several desks into one email per shift.
+
+Usage
+-----
+    python -m logic.aggregator --port 8765
+
+Each running app posts its (possibly partial) report when CQ_AGGREGATOR is
+set to the service's host:port. The HTTP/1.1 API keeps connections open
+between requests:
+
+    POST   /shifts/<YYYY-MM-DD>/desks/<desk>   body: ShiftReport.to_dict() JSON
+    DELETE /shifts/<YYYY-MM-DD>/desks/<desk>
+    GET    /shifts/<YYYY-MM-DD>                consolidated email (text/plain)
+    GET    /shifts/<YYYY-MM-DD>/report         merged reports per manor (JSON)
+    GET    /health
+"""
+import os
+import sys
+import json
+import socket
+import asyncio
+import logging
+import argparse
+import threading
+import http.client
+from datetime import date, datetime, timedelta
+from urllib.parse import quote, unquote
+from logic.models import Person, ShiftReport
+from logic.processing import FormGatherer, EmailRenderer
+from logic.rooms import ROOM_DIRECTORY
+
+
+log = logging.getLogger('app.aggregator')
+
+
+DEFAULT_PORT = 8765
+
+# Requests larger than this are refused
+MAX_BODY_BYTES = 1024 * 1024
+
+# Idle keep-alive connections are closed after this many seconds
+IDLE_TIMEOUT = 30
+
+# Shifts run overnight; before this hour a report still belongs to yesterday's shift
+SHIFT_ROLLOVER_HOUR = 6
+
+# Minimum seconds between two posts from one desk
+PUBLISH_INTERVAL = 2.0
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def shift_date(now: datetime | None = None) -> date:
+    """The date a shift is filed under; early-morning hours count to the previous day."""
+    now = now or datetime.now()
+    if now.hour < SHIFT_ROLLOVER_HOUR:
+        return (now - timedelta(days=1)).date()
+    return now.date()
+
+
+def _identity(person: Person) -> tuple:
+    return (person.last.casefold(), person.first.casefold(), person.mi.casefold())
+
+
+def _unique_people(people) -> list:
+    seen = set()
+    unique = []
+    for person in people:
+        key = _identity(person) + (getattr(person, "time", ""),)
+        if person.is_empty() or key in seen:
+            continue
+        seen.add(key)
+        unique.append(person)
+    return unique
+
+
+def merge_reports(reports: list[ShiftReport]) -> ShiftReport:
+    """
+    Merges the reports of one manor's desks, in submission order.
+
+    Lates and runners are combined with each airman listed once per late
+    time; single roles, the on-call MTL and the signature come from the
+    first desk that filled them in; notes are combined without repeats.
+    """
+    merged = ShiftReport(manor=reports[0].manor if reports else "")
+    for report in reports:
+        for team_name in ("al_team", "cq_team"):
+            team = getattr(merged, team_name)
+            for role, member in getattr(report, team_name).items():
+                if isinstance(member, list):
+                    team[role] = _unique_people([*team.get(role, []), *member])
+                elif member is not None and role not in team:
+                    team[role] = member
+        merged.red_card_lates.extend(report.red_card_lates)
+        merged.lates.extend(report.lates)
+        merged.cac_scanner_unavailable = merged.cac_scanner_unavailable or report.cac_scanner_unavailable
+        merged.on_call_mtl = merged.on_call_mtl or report.on_call_mtl
+        merged.additional_notes.extend(note for note in report.additional_notes if note not in merged.additional_notes)
+        if not any(merged.signature.values()):
+            merged.signature = dict(report.signature)
+    merged.red_card_lates = _unique_people(merged.red_card_lates)
+    merged.lates = _unique_people(merged.lates)
+    return merged
+
+
+class ShiftBoard:
+    """
+    The latest report from every desk, grouped by shift date.
+
+    Reports are normalized with the form's own preview formatting when they
+    arrive; merged reports and emails are cached until a desk of that
+    shift posts again.
+    """
+
+    def __init__(self):
+        self._shifts = {}
+        self._bodies = {}
+        self._merged = {}
+        self._emails = {}
+        self._rooms_version = ROOM_DIRECTORY.version
+        self._gatherer = FormGatherer()
+        self._renderer = EmailRenderer()
+
+    def __len__(self):
+        return len(self._shifts)
+
+    def submit(self, day: str, desk: str, report: ShiftReport) -> int:
+        """Stores a desk's report, replacing its previous one. Returns the shift's desk count."""
+        desks = self._shifts.setdefault(day, {})
+        desks.pop(desk, None)
+        desks[desk] = self._gatherer.gather(report).preview
+        self._invalidate(day)
+        return len(desks)
+
+    def submit_json(self, day: str, desk: str, body: bytes) -> int:
+        """Like `submit`, from a JSON body; a body identical to the desk's last one is not re-parsed."""
+        if self._bodies.get((day, desk)) != body:
+            self.submit(day, desk, ShiftReport.from_dict(json.loads(body)))
+            self._bodies[day, desk] = body
+        return len(self._shifts[day])
+
+    def remove(self, day: str, desk: str) -> bool:
+        self._bodies.pop((day, desk), None)
+        desks = self._shifts.get(day, {})
+        if desks.pop(desk, None) is None:
+            return False
+        if not desks:
+            del self._shifts[day]
+        self._invalidate(day)
+        return True
+
+    def _invalidate(self, day: str):
+        self._merged.pop(day, None)
+        self._emails.pop(day, None)
+
+    def merged(self, day: str) -> dict[str, ShiftReport] | None:
+        """The shift's merged report per manor, or None if no desk has posted."""
+        if day not in self._shifts:
+            return None
+        if day not in self._merged:
+            by_manor = {}
+            for report in self._shifts[day].values():
+                by_manor.setdefault(report.manor, []).append(report)
+            self._merged[day] = {manor: merge_reports(reports) for manor, reports in sorted(by_manor.items())}
+        return self._merged[day]
+
+    def email(self, day: str) -> str | None:
+        """The consolidated email; one block per manor when several manors posted."""
+        # Cached emails name MTLs from the old bay tables
+        if self._rooms_version != ROOM_DIRECTORY.version:
+            self._emails.clear()
+            self._rooms_version = ROOM_DIRECTORY.version
+        if day not in self._emails:
+            merged = self.merged(day)
+            if merged is None:
+                return None
+            if len(merged) == 1:
+                self._emails[day] = self._renderer.render(next(iter(merged.values())))
+            else:
+                self._emails[day] = "\n\n".join(
+                    f"===== {manor or 'No Manor'} =====\n\n{self._renderer.render(report)}"
+                    for manor, report in merged.items()
+                )
+        return self._emails[day]
+
+
+class AggregatorServer:
+    """Minimal keep-alive HTTP/1.1 front end for a ShiftBoard."""
+
+    def __init__(self, board: ShiftBoard | None = None):
+        self.board = board or ShiftBoard()
+        self.requests_served = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> int:
+        """Starts listening and returns the bound port (useful with port 0)."""
+        self._server = await asyncio.start_server(self._handle, host, port, reuse_address=True)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    writer.write(self._response(413, {"error": "Request body too large."}, keep_alive=False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                status, payload = self.dispatch(method, target, body)
+                self.requests_served += 1
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _response(status: int, payload, keep_alive: bool) -> bytes:
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    def dispatch(self, method: str, target: str, body: bytes) -> tuple[int, object]:
+        """Routes one request to the board. Returns (status, str or JSON-able payload)."""
+        parts = [unquote(part) for part in target.split("?")[0].strip("/").split("/")]
+        if parts == ["health"]:
+            return 200, {"shifts": len(self.board), "requests": self.requests_served}
+        if len(parts) < 2 or parts[0] != "shifts":
+            return 404, {"error": "Not found."}
+        try:
+            day = date.fromisoformat(parts[1]).isoformat()
+        except ValueError:
+            return 400, {"error": f"Invalid shift date '{parts[1]}'."}
+
+        if len(parts) == 4 and parts[2] == "desks":
+            desk = parts[3]
+            if method == "POST":
+                try:
+                    desks = self.board.submit_json(day, desk, body)
+                except (ValueError, AttributeError, TypeError) as e:
+                    return 400, {"error": f"Malformed report: {e}"}
+                return 200, {"shift": day, "desk": desk, "desks": desks}
+            if method == "DELETE":
+                return (200, {"removed": desk}) if self.board.remove(day, desk) else (404, {"error": "No such desk."})
+            return 405, {"error": "Use POST or DELETE."}
+
+        if method != "GET":
+            return 405, {"error": "Use GET."}
+        if len(parts) == 2:
+            email = self.board.email(day)
+            return (200, email) if email is not None else (404, {"error": "No reports for this shift."})
+        if len(parts) == 3 and parts[2] == "report":
+            merged = self.board.merged(day)
+            if merged is None:
+                return 404, {"error": "No reports for this shift."}
+            return 200, {manor: report.to_dict() for manor, report in merged.items()}
+        return 404, {"error": "Not found."}
+
+
+class DeskPublisher:
+    """
+    Posts this desk's latest report to the aggregator from a background thread.
+
+    `submit` only stores the report; at most one post per `interval` is
+    made, over a single reused connection. Failures are logged and retried
+    with the next report.
+    """
+
+    def __init__(self, address: str, desk: str | None = None, interval: float = PUBLISH_INTERVAL):
+        host, _, port = address.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port or DEFAULT_PORT)
+        self.desk = desk or f"{socket.gethostname()}-{os.getpid()}"
+        self.interval = interval
+        self._latest = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._stopping = False
+        self._connection = None
+        self._thread = threading.Thread(target=self._run, name="desk-publisher", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_env(cls) -> "DeskPublisher | None":
+        """Creates a publisher if CQ_AGGREGATOR=host:port is set (CQ_DESK_ID names the desk)."""
+        address = os.environ.get("CQ_AGGREGATOR")
+        return cls(address, os.environ.get("CQ_DESK_ID")) if address else None
+
+    def submit(self, report: ShiftReport):
+        with self._lock:
+            self._latest = report
+        self._wake.set()
+
+    def close(self):
+        self._stopping = True
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(5)
+
+    def _run(self):
+        last_sent = None
+        while not self._stopping:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                report, self._latest = self._latest, None
+            if report is not None and report is not last_sent:
+                self._post(report)
+                last_sent = report
+                # Reports submitted meanwhile only replace `_latest`; `_wake`
+                # cannot cut this short, only `close` can
+                self._stopped.wait(self.interval)
+        # Send the last edits made before closing
+        if self._latest is not None and self._latest is not last_sent:
+            self._post(self._latest)
+        if self._connection is not None:
+            self._connection.close()
+
+    def _post(self, report: ShiftReport):
+        path = f"/shifts/{shift_date().isoformat()}/desks/{quote(self.desk, safe='')}"
+        body = json.dumps(report.to_dict())
+        try:
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=5)
+            self._connection.request("POST", path, body, {"Content-Type": "application/json"})
+            response = self._connection.getresponse()
+            response.read()
+            if response.status != 200:
+                log.warning(f"Aggregator rejected report: HTTP {response.status}.")
+        except (OSError, http.client.HTTPException) as e:
+            log.debug("Failed to post report to aggregator: %s", e)
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Merge reports from several desks into one email per shift.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default loopback only).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT}).")
+    parser.add_argument("--verbose", action="store_true", help="Log requests to stderr.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, force=True)
+
+    async def serve():
+        server = AggregatorServer()
+        port = await server.start(args.host, args.port)
+        print(f"Aggregator listening on {args.host}:{port}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Late-trend analytics over the shift archive.
+
+Usage
+-----
+    python -m logic.analytics --since 2025-01-01 --top 10
+"""
+import sys
+import logging
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+from itertools import accumulate, compress
+from logic.archive import ShiftArchive, ARCHIVE_PATH
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; group-bys fall back to Counter over array slices
+    np = None
+
+
+log = logging.getLogger('app.analytics')
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Columns that can be grouped by
+DIMENSIONS = ["airman", "bay", "mtl", "time_slot", "kind", "manor", "weekday"]
+
+class LateColumns:
+    """
+    Late events stored column-wise, sorted by day.
+
+    Every text column is dictionary-encoded: `codes[name]` is an int array and
+    `labels[name]` maps each code back to its text. Days are proleptic
+    ordinals, so date ranges are contiguous slices found by bisection.
+    """
+    __slots__ = ("days", "codes", "labels", "_label_codes")
+
+    def __init__(self):
+        self.days = array("i")
+        self.codes = {name: array("i") for name in DIMENSIONS if name != "weekday"}
+        self.labels = {name: [] for name in DIMENSIONS if name != "weekday"}
+        self._label_codes = {name: {} for name in self.labels}
+
+    def __len__(self):
+        return len(self.days)
+
+    def append(self, day: int, **values: str):
+        """Appends one event. Events must be appended in day order."""
+        self.days.append(day)
+        for name, value in values.items():
+            label_codes = self._label_codes[name]
+            code = label_codes.get(value)
+            if code is None:
+                code = label_codes[value] = len(self.labels[name])
+                self.labels[name].append(value)
+            self.codes[name].append(code)
+
+    def code_of(self, name: str, value: str) -> int | None:
+        """Returns the code for a label, or None if it never occurs."""
+        return self._label_codes[name].get(value)
+
+
+def _airman_label(last: str, first: str, mi: str) -> str:
+    name = f"{last}, {first}"
+    if mi:
+        name += f" {mi}"
+    return name
+
+
+def load_lates(archive: ShiftArchive, start: date | str | None = None, end: date | str | None = None) -> LateColumns:
+    """Streams late events out of the archive into a LateColumns table."""
+    columns = LateColumns()
+    for row in archive.lates_between(start, end):
+        columns.append(
+            date.fromisoformat(row["shift_date"]).toordinal(),
+            airman=_airman_label(row["last"], row["first"], row["mi"]),
+            bay=row["bay_key"] or "<Unknown Bay>",
+            mtl=row["mtl"],
+            time_slot=row["late_time"],
+            kind=row["kind"],
+            manor=row["manor"],
+        )
+    log.debug(f"Loaded {len(columns)} late events for analytics.")
+    return columns
+
+
+class LateAnalytics:
+    """Group-by counts and rolling windows over a LateColumns table."""
+
+    def __init__(self, columns: LateColumns):
+        self.columns = columns
+        if np is not None:
+            self._days = np.frombuffer(columns.days, dtype=np.int32) if len(columns) else np.empty(0, np.int32)
+            self._codes = {
+                name: np.frombuffer(codes, dtype=np.int32) if len(codes) else np.empty(0, np.int32)
+                for name, codes in columns.codes.items()
+            }
+
+    def _range(self, start, end) -> tuple[int, int]:
+        days = self.columns.days
+        lo = 0 if start is None else bisect_left(days, _ordinal(start))
+        hi = len(days) if end is None else bisect_right(days, _ordinal(end))
+        return lo, hi
+
+    def count_by(self, dimension: str, start=None, end=None, kind: str | None = None) -> list[tuple[str, int]]:
+        """
+        Counts lates per value of `dimension`, most frequent first.
+
+        `kind` limits the count to "red_card" or "standard" lates; red-card
+        windows are `count_by("time_slot", kind="red_card")`.
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension '{dimension}'. Use one of: {', '.join(DIMENSIONS)}.")
+        lo, hi = self._range(start, end)
+        kind_code = None
+        if kind is not None:
+            kind_code = self.columns.code_of("kind", kind)
+            if kind_code is None:
+                return []
+
+        if dimension == "weekday":
+            labels = WEEKDAYS
+            values = self._weekdays(lo, hi)
+        else:
+            labels = self.columns.labels[dimension]
+            values = self._codes[dimension][lo:hi] if np is not None else self.columns.codes[dimension][lo:hi]
+
+        if np is not None:
+            if kind_code is not None:
+                values = values[self._codes["kind"][lo:hi] == kind_code]
+            counts = np.bincount(values, minlength=len(labels)).tolist()
+            result = [(labels[i], count) for i, count in enumerate(counts) if count]
+        else:
+            if kind_code is not None:
+                kinds = self.columns.codes["kind"][lo:hi]
+                values = compress(values, (code == kind_code for code in kinds))
+            result = [(labels[i], count) for i, count in Counter(values).items()]
+
+        result.sort(key=lambda item: (-item[1], item[0]))
+        return result
+
+    def _weekdays(self, lo: int, hi: int):
+        # date(1, 1, 1) has ordinal 1 and is a Monday
+        if np is not None:
+            return (self._days[lo:hi] - 1) % 7
+        return array("i", ((day - 1) % 7 for day in self.columns.days[lo:hi]))
+
+    def per_airman(self, start=None, end=None) -> list[tuple[str, int]]:
+        return self.count_by("airman", start, end)
+
+    def per_bay(self, start=None, end=None) -> list[tuple[str, int]]:
+        return self.count_by("bay", start, end)
+
+    def per_mtl(self, start=None, end=None) -> list[tuple[str, int]]:
+        return self.count_by("mtl", start, end)
+
+    def per_time_slot(self, start=None, end=None, kind: str | None = None) -> list[tuple[str, int]]:
+        return self.count_by("time_slot", start, end, kind)
+
+    def per_weekday(self, start=None, end=None) -> list[tuple[str, int]]:
+        return self.count_by("weekday", start, end)
+
+    def daily_counts(self, start=None, end=None, dimension: str | None = None, value: str | None = None) -> list[tuple[date, int]]:
+        """Lates per calendar day (including days with none), optionally for one dimension value."""
+        lo, hi = self._range(start, end)
+        if lo >= hi and (start is None or end is None):
+            return []
+        first = _ordinal(start) if start is not None else self.columns.days[lo]
+        last = _ordinal(end) if end is not None else self.columns.days[hi - 1]
+        if last < first:
+            return []
+
+        code = None
+        if dimension is not None:
+            if dimension not in self.columns.labels:
+                raise ValueError(f"Cannot filter daily counts by '{dimension}'.")
+            code = self.columns.code_of(dimension, value)
+            if code is None:
+                return [(date.fromordinal(day), 0) for day in range(first, last + 1)]
+
+        if np is not None:
+            offsets = self._days[lo:hi] - first
+            if code is not None:
+                offsets = offsets[self._codes[dimension][lo:hi] == code]
+            counts = np.bincount(offsets, minlength=last - first + 1).tolist()
+        else:
+            counts = [0] * (last - first + 1)
+            days = self.columns.days[lo:hi]
+            if code is not None:
+                days = compress(days, (c == code for c in self.columns.codes[dimension][lo:hi]))
+            for day in days:
+                counts[day - first] += 1
+        return [(date.fromordinal(first + i), count) for i, count in enumerate(counts)]
+
+    def rolling(self, window_days: int = 7, start=None, end=None, dimension: str | None = None,
+                value: str | None = None) -> list[tuple[date, int]]:
+        """Trailing `window_days` sum of lates for every day in the range."""
+        daily = self.daily_counts(start, end, dimension, value)
+        totals = [0, *accumulate(count for _, count in daily)]
+        return [
+            (day, totals[i + 1] - totals[max(0, i + 1 - window_days)])
+            for i, (day, _) in enumerate(daily)
+        ]
+
+
+def _ordinal(value: date | str) -> int:
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize archived lates.")
+    parser.add_argument("--archive", default=ARCHIVE_PATH, metavar="DB", help="Shift archive to read.")
+    parser.add_argument("--since", help="First shift date (YYYY-MM-DD). Defaults to one year ago.")
+    parser.add_argument("--until", help="Last shift date (YYYY-MM-DD).")
+    parser.add_argument("--top", type=int, default=10, help="Rows to show per table.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+
+    since = args.since or (date.today() - timedelta(days=365)).isoformat()
+    with ShiftArchive(args.archive) as archive:
+        analytics = LateAnalytics(load_lates(archive, since, args.until))
+
+    print(f"{len(analytics.columns)} lates since {since}")
+    tables = [
+        ("Airman", analytics.per_airman()),
+        ("Bay", analytics.per_bay()),
+        ("MTL", analytics.per_mtl()),
+        ("Red-Card Window", analytics.per_time_slot(kind="red_card")),
+        ("Curfew", analytics.per_time_slot(kind="standard")),
+        ("Weekday", analytics.per_weekday()),
+    ]
+    for title, rows in tables:
+        print(f"\n{title}:")
+        for label, count in rows[:args.top] or [("N/A", 0)]:
+            print(f"  {count:6d}  {label}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
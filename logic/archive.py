@@ -0,0 +1,320 @@
+import os
+import sqlite3
+import logging
+from datetime import date, datetime
+from logic.models import Person, LateEntry, ShiftReport
+from logic.rooms import ROOM_DIRECTORY
+from logic.schema import FORM_SCHEMA
+from utils import user_data_path
+
+
+ARCHIVE_PATH = user_data_path("archive.db")
+
+# Shifts written per transaction by `save_reports`
+BATCH_SIZE = 500
+
+
+log = logging.getLogger('app.archive')
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shifts (
+    id INTEGER PRIMARY KEY,
+    shift_date TEXT NOT NULL,
+    manor TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    cac_scanner_unavailable INTEGER NOT NULL DEFAULT 0,
+    on_call_mtl TEXT NOT NULL DEFAULT '',
+    sig_rank TEXT NOT NULL DEFAULT '',
+    sig_last TEXT NOT NULL DEFAULT '',
+    sig_first TEXT NOT NULL DEFAULT '',
+    sig_mi TEXT NOT NULL DEFAULT '',
+    sig_squadron TEXT NOT NULL DEFAULT '',
+    sig_job TEXT NOT NULL DEFAULT '',
+    email_body TEXT
+);
+
+CREATE TABLE IF NOT EXISTS team_members (
+    id INTEGER PRIMARY KEY,
+    shift_id INTEGER NOT NULL REFERENCES shifts(id) ON DELETE CASCADE,
+    team TEXT NOT NULL,
+    role TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    rank TEXT NOT NULL,
+    last TEXT NOT NULL,
+    first TEXT NOT NULL,
+    mi TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS lates (
+    id INTEGER PRIMARY KEY,
+    shift_id INTEGER NOT NULL REFERENCES shifts(id) ON DELETE CASCADE,
+    shift_date TEXT NOT NULL,
+    manor TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    rank TEXT NOT NULL,
+    last TEXT NOT NULL,
+    first TEXT NOT NULL,
+    mi TEXT NOT NULL,
+    room TEXT NOT NULL,
+    bay_key TEXT NOT NULL,
+    mtl TEXT NOT NULL,
+    late_time TEXT NOT NULL,
+    late_type TEXT NOT NULL,
+    reason TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id INTEGER PRIMARY KEY,
+    shift_id INTEGER NOT NULL REFERENCES shifts(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_shifts_date ON shifts(shift_date);
+CREATE INDEX IF NOT EXISTS idx_shifts_manor_date ON shifts(manor, shift_date);
+CREATE INDEX IF NOT EXISTS idx_team_members_shift ON team_members(shift_id);
+CREATE INDEX IF NOT EXISTS idx_team_members_name ON team_members(last COLLATE NOCASE, first COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_lates_shift ON lates(shift_id);
+CREATE INDEX IF NOT EXISTS idx_lates_date ON lates(shift_date);
+CREATE INDEX IF NOT EXISTS idx_lates_airman ON lates(last COLLATE NOCASE, first COLLATE NOCASE, shift_date);
+CREATE INDEX IF NOT EXISTS idx_lates_manor_date ON lates(manor, shift_date);
+CREATE INDEX IF NOT EXISTS idx_lates_room ON lates(manor, room);
+CREATE INDEX IF NOT EXISTS idx_lates_bay ON lates(bay_key, shift_date);
+CREATE INDEX IF NOT EXISTS idx_lates_mtl ON lates(mtl, shift_date);
+CREATE INDEX IF NOT EXISTS idx_notes_shift ON notes(shift_id);
+"""
+
+# shifts column -> signature field
+SIGNATURE_COLUMNS = {
+    "sig_rank": "Rank",
+    "sig_last": "Last",
+    "sig_first": "First",
+    "sig_mi": "MI",
+    "sig_squadron": "Squadron",
+    "sig_job": "AFSC/Job",
+}
+
+LATE_COLUMNS = (
+    "shift_id, shift_date, manor, kind, rank, last, first, mi, "
+    "room, bay_key, mtl, late_time, late_type, reason"
+)
+
+
+def _iso_date(value: date | str | None) -> str:
+    if value is None:
+        return date.today().isoformat()
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid shift date {value!r}")
+    return date.fromisoformat(value).isoformat()
+
+
+class ShiftArchive:
+    """
+    Local SQLite archive of every validated report.
+
+    Shifts, team members, lates and notes live in their own tables. Lates
+    carry the shift date and manor so per-airman, per-room, per-bay and
+    per-MTL queries over a date range are answered from a single index.
+    """
+
+    def __init__(self, path: str = ARCHIVE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+        log.debug(f"Shift archive opened at {path}.")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def save_report(self, report: ShiftReport, shift_date: date | str | None = None, email_body: str | None = None) -> int:
+        """Archives a single validated report and returns its shift id."""
+        with self.connection:
+            shift_id = self._insert(self.connection.cursor(), report, shift_date, email_body)
+        log.info(f"Archived shift {shift_id} ({report.manor}, {len(report.red_card_lates) + len(report.lates)} lates).")
+        return shift_id
+
+    def save_reports(self, items, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Archives many (report, shift_date, email_body) tuples.
+
+        Shifts are committed in batches of `batch_size`, so bulk imports do
+        not pay one fsync per shift. Returns the number of shifts saved.
+        """
+        saved = 0
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                saved += self._insert_batch(batch)
+                batch = []
+        if batch:
+            saved += self._insert_batch(batch)
+        log.info(f"Archived {saved} shifts.")
+        return saved
+
+    def _insert_batch(self, batch: list) -> int:
+        with self.connection:
+            cursor = self.connection.cursor()
+            for report, shift_date, email_body in batch:
+                self._insert(cursor, report, shift_date, email_body)
+        return len(batch)
+
+    def _insert(self, cursor: sqlite3.Cursor, report: ShiftReport, shift_date, email_body: str | None) -> int:
+        shift_date = _iso_date(shift_date)
+        signature = report.signature
+        cursor.execute(
+            "INSERT INTO shifts (shift_date, manor, created_at, cac_scanner_unavailable, on_call_mtl, "
+            "sig_rank, sig_last, sig_first, sig_mi, sig_squadron, sig_job, email_body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                shift_date, report.manor, datetime.now().isoformat(timespec="seconds"),
+                int(bool(report.cac_scanner_unavailable)), report.on_call_mtl,
+                *(signature.get(field, "") for field in SIGNATURE_COLUMNS.values()), email_body,
+            ),
+        )
+        shift_id = cursor.lastrowid
+
+        members = []
+        for team in ("al_team", "cq_team"):
+            for role, value in getattr(report, team).items():
+                people = value if isinstance(value, list) else [value]
+                for position, person in enumerate(people):
+                    members.append((shift_id, team, role, position, person.rank, person.last, person.first, person.mi))
+        cursor.executemany(
+            "INSERT INTO team_members (shift_id, team, role, position, rank, last, first, mi) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            members,
+        )
+
+        lates = []
+        for kind, entries in (("red_card", report.red_card_lates), ("standard", report.lates)):
+            for late in entries:
+                info = ROOM_DIRECTORY.lookup(report.manor, late.room)
+                bay_key = info.bay_key if info else ""
+                mtl = info.mtl if info else ROOM_DIRECTORY.mtl_for(report.manor, late.room)
+                lates.append((
+                    shift_id, shift_date, report.manor, kind,
+                    late.rank, late.last, late.first, late.mi,
+                    late.room, bay_key, mtl, late.time, late.type, late.reason,
+                ))
+        cursor.executemany(f"INSERT INTO lates ({LATE_COLUMNS}) VALUES ({', '.join('?' * 14)})", lates)
+
+        cursor.executemany(
+            "INSERT INTO notes (shift_id, position, text) VALUES (?, ?, ?)",
+            [(shift_id, position, text) for position, text in enumerate(report.additional_notes)],
+        )
+        return shift_id
+
+    def _lates(self, where: str, params: tuple, start, end) -> list[sqlite3.Row]:
+        clauses = [where] if where else []
+        if start is not None:
+            clauses.append("shift_date >= ?")
+            params += (_iso_date(start),)
+        if end is not None:
+            clauses.append("shift_date <= ?")
+            params += (_iso_date(end),)
+        sql = "SELECT * FROM lates"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY shift_date, id"
+        return self.connection.execute(sql, params).fetchall()
+
+    def lates_for_airman(self, last: str, first: str | None = None, start=None, end=None) -> list[sqlite3.Row]:
+        """All lates for an airman (case-insensitive name match), optionally within a date range."""
+        if first:
+            return self._lates("last = ? COLLATE NOCASE AND first = ? COLLATE NOCASE", (last, first), start, end)
+        return self._lates("last = ? COLLATE NOCASE", (last,), start, end)
+
+    def lates_for_room(self, manor: str, room: str, start=None, end=None) -> list[sqlite3.Row]:
+        return self._lates("manor = ? AND room = ?", (manor, room), start, end)
+
+    def lates_for_bay(self, bay_key: str, start=None, end=None) -> list[sqlite3.Row]:
+        return self._lates("bay_key = ?", (bay_key,), start, end)
+
+    def lates_for_mtl(self, mtl: str, start=None, end=None) -> list[sqlite3.Row]:
+        return self._lates("mtl = ?", (mtl,), start, end)
+
+    def lates_between(self, start=None, end=None, manor: str | None = None) -> list[sqlite3.Row]:
+        if manor:
+            return self._lates("manor = ?", (manor,), start, end)
+        return self._lates("", (), start, end)
+
+    def shifts_between(self, start=None, end=None, manor: str | None = None, with_email: bool = False) -> list[sqlite3.Row]:
+        clauses, params = [], ()
+        if manor:
+            clauses.append("manor = ?")
+            params += (manor,)
+        if start is not None:
+            clauses.append("shift_date >= ?")
+            params += (_iso_date(start),)
+        if end is not None:
+            clauses.append("shift_date <= ?")
+            params += (_iso_date(end),)
+        sql = "SELECT id, shift_date, manor, created_at, sig_rank, sig_last, sig_first"
+        sql += ", email_body FROM shifts" if with_email else " FROM shifts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self.connection.execute(sql + " ORDER BY shift_date, id", params).fetchall()
+
+    def people(self) -> list[Person]:
+        """Every distinct person in archived teams and lates, most often seen first."""
+        rows = self.connection.execute(
+            """
+            SELECT MAX(rank) AS rank, last, first, mi, COUNT(*) AS seen FROM (
+                SELECT rank, last, first, mi FROM lates
+                UNION ALL
+                SELECT rank, last, first, mi FROM team_members
+            )
+            GROUP BY last COLLATE NOCASE, first COLLATE NOCASE, mi COLLATE NOCASE
+            ORDER BY seen DESC
+            """
+        ).fetchall()
+        return [Person(row["rank"], row["last"], row["first"], row["mi"]) for row in rows]
+
+    def load_report(self, shift_id: int) -> ShiftReport | None:
+        """Rebuilds an archived shift as a ShiftReport."""
+        shift = self.connection.execute("SELECT * FROM shifts WHERE id = ?", (shift_id,)).fetchone()
+        if shift is None:
+            return None
+        report = ShiftReport(
+            manor=shift["manor"],
+            cac_scanner_unavailable=bool(shift["cac_scanner_unavailable"]),
+            on_call_mtl=shift["on_call_mtl"],
+            signature={field: shift[column] for column, field in SIGNATURE_COLUMNS.items()},
+        )
+        members = self.connection.execute(
+            "SELECT * FROM team_members WHERE shift_id = ? ORDER BY id", (shift_id,)
+        ).fetchall()
+        for row in members:
+            person = Person(row["rank"], row["last"], row["first"], row["mi"])
+            team = getattr(report, row["team"])
+            if FORM_SCHEMA.role_spec(row["team"], row["role"]).multiple:
+                team.setdefault(row["role"], []).append(person)
+            else:
+                team[row["role"]] = person
+        for row in self._lates("shift_id = ?", (shift_id,), None, None):
+            late = LateEntry(
+                row["rank"], row["last"], row["first"], row["mi"],
+                room=row["room"], time=row["late_time"], type=row["late_type"], reason=row["reason"],
+            )
+            (report.red_card_lates if row["kind"] == "red_card" else report.lates).append(late)
+        report.additional_notes = [
+            row["text"] for row in self.connection.execute(
+                "SELECT text FROM notes WHERE shift_id = ? ORDER BY position", (shift_id,)
+            )
+        ]
+        return report
@@ -0,0 +1,287 @@
+"""
+Batch rendering of accountability emails from JSONL or CSV shift records.
+
+Usage
+-----
+    python -m logic.batch shifts.jsonl --out emails/
+    python -m logic.batch --format csv --jobs 4 < shifts.csv
+
+JSONL records use the `ShiftReport.to_dict()` layout. CSV records use the same
+layout flattened into dotted column names, with list positions as numbers:
+
+    manor, al_team.AL Cards.rank, cq_team.CQ Runner.0.last, lates.0.room,
+    notes.cac_scanner_unavailable, notes.additional_notes.0, signature.Rank, ...
+
+An optional `id` field/column names the output file; otherwise the record
+number is used. With `--archive`, valid records are also saved to the shift
+archive under their optional `date` field (YYYY-MM-DD, default today).
+"""
+import os
+import re
+import sys
+import csv
+import json
+import logging
+import argparse
+from datetime import date
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from logic.archive import ShiftArchive, ARCHIVE_PATH, BATCH_SIZE
+from logic.fuzzy import NameIndex
+from logic.models import ShiftReport
+from logic.roster import Roster
+from logic.processing import (
+    format_email_body,
+    FormGatherer,
+    GatherResult,
+)
+
+
+log = logging.getLogger('app.batch')
+
+
+# Printed between emails when writing to stdout
+RECORD_SEPARATOR = "\n" + "=" * 72 + "\n"
+
+# Records handed to a worker process at once, and chunks in flight per worker
+CHUNK_SIZE = 64
+CHUNKS_IN_FLIGHT_PER_JOB = 2
+
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+
+
+def _unflatten(row: dict) -> dict:
+    """Turns dotted CSV column names back into the nested record layout."""
+    record = {}
+    for column, value in row.items():
+        if column is None or value is None or value == "":
+            continue
+        keys = column.split(".")
+        node = record
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = value
+    return _lists_from_indexes(record)
+
+
+def _lists_from_indexes(node):
+    """Converts dicts keyed by "0", "1", ... into lists, in index order."""
+    if not isinstance(node, dict):
+        return node
+    node = {key: _lists_from_indexes(value) for key, value in node.items()}
+    if node and all(key.isdigit() for key in node):
+        return [node[key] for key in sorted(node, key=int)]
+    return node
+
+
+def read_records(stream, fmt: str = "jsonl"):
+    """Yields one record dict at a time from a JSONL or CSV text stream."""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            record = _unflatten(row)
+            notes = record.get("notes") or {}
+            flag = str(notes.get("cac_scanner_unavailable", "")).strip().lower()
+            notes["cac_scanner_unavailable"] = flag in TRUE_VALUES
+            record["notes"] = notes
+            yield record
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            # Keep the record count aligned; the renderer reports the error
+            yield {"_error": f"Invalid JSON on line {line_number}: {e}"}
+            continue
+        if isinstance(record, dict):
+            yield record
+        else:
+            yield {"_error": f"Line {line_number} is not a JSON object"}
+
+
+def gather_record(record: dict) -> GatherResult:
+    """Validates one record. Malformed records come back as a result with errors."""
+    if error := record.get("_error"):
+        return GatherResult(None, None, [error])
+    try:
+        return FormGatherer().gather(ShiftReport.from_dict(record))
+    except (AttributeError, TypeError) as e:
+        return GatherResult(None, None, [f"Malformed record: {e}"])
+
+
+def render_record(record: dict) -> tuple[str | None, list[str], ShiftReport | None]:
+    """Validates and formats one record. Returns (email body, errors, report)."""
+    result = gather_record(record)
+    if result.errors:
+        return None, result.errors, None
+    return format_email_body(result.report), [], result.report
+
+
+def _render_chunk(records: list[dict]) -> list[tuple[str | None, list[str], ShiftReport | None]]:
+    return [render_record(record) for record in records]
+
+
+def _chunks(records, size: int):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_records(records, jobs: int = 1):
+    """
+    Yields (record, email body, errors, report) in input order.
+
+    With `jobs > 1` rendering is spread over a process pool. Only a bounded
+    number of chunks is in flight at once, so memory stays constant no matter
+    how many records are streamed through.
+    """
+    if jobs <= 1:
+        for record in records:
+            yield (record, *render_record(record))
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        in_flight = deque()
+        for chunk in _chunks(records, CHUNK_SIZE):
+            in_flight.append((chunk, executor.submit(_render_chunk, chunk)))
+            if len(in_flight) >= jobs * CHUNKS_IN_FLIGHT_PER_JOB:
+                chunk, future = in_flight.popleft()
+                yield from ((record, *result) for record, result in zip(chunk, future.result()))
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            yield from ((record, *result) for record, result in zip(chunk, future.result()))
+
+
+def roster_warnings(report: ShiftReport, names: NameIndex) -> list[str]:
+    """Flags team members and lates whose name is not on the roster, with the closest spellings."""
+    people = [*report.red_card_lates, *report.lates]
+    for member in (*report.al_team.values(), *report.cq_team.values()):
+        people.extend(member if isinstance(member, list) else [member])
+
+    warnings = []
+    for person in people:
+        name = f"{person.last}, {person.first}" if person.first else person.last
+        if names.has_name(name):
+            continue
+        matches = names.search(name, limit=3)
+        warning = f"'{name}' is not on the roster"
+        if matches:
+            warning += "; did you mean " + " or ".join(f"'{match.payload.label()}'" for match in matches) + "?"
+        warnings.append(warning)
+    return warnings
+
+
+def _archive_date(record: dict) -> tuple[str | None, list[str]]:
+    # The archive files shifts by date, so a date it cannot read fails the record
+    value = record.get("date")
+    if value in (None, ""):
+        return None, []
+    if isinstance(value, str):
+        try:
+            return date.fromisoformat(value).isoformat(), []
+        except ValueError:
+            pass
+    return None, [f"Invalid date {value!r} (expected YYYY-MM-DD)"]
+
+
+def _output_name(record: dict, index: int) -> str:
+    record_id = str(record.get("id") or f"{index:06d}")
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", record_id) + ".txt"
+
+
+def run_batch(stream, fmt: str = "jsonl", out_dir: str | None = None, jobs: int = 1, output=None,
+              archive: ShiftArchive | None = None, names: NameIndex | None = None) -> tuple[int, int]:
+    """
+    Renders every record in `stream`, writing emails to `out_dir` or `output`.
+
+    Valid records are also saved to `archive` if given, in batches, and
+    checked against the roster `names` if given.
+    Returns (rendered, failed) counts. Validation errors and roster warnings go to stderr.
+    """
+    output = output or sys.stdout
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    to_archive = []
+    rendered = failed = 0
+    records = render_records(read_records(stream, fmt), jobs)
+    for index, (record, email_body, errors, report) in enumerate(records, start=1):
+        shift_day = None
+        if not errors and archive is not None:
+            shift_day, errors = _archive_date(record)
+        if errors:
+            failed += 1
+            print(f"Record {index}: " + "; ".join(errors), file=sys.stderr)
+            continue
+        rendered += 1
+        if out_dir:
+            path = os.path.join(out_dir, _output_name(record, index))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(email_body)
+        else:
+            if rendered > 1:
+                output.write(RECORD_SEPARATOR)
+            output.write(email_body)
+            output.write("\n")
+        if names is not None:
+            for warning in roster_warnings(report, names):
+                print(f"Record {index}: {warning}", file=sys.stderr)
+        if archive is not None:
+            to_archive.append((report, shift_day, email_body))
+            if len(to_archive) >= BATCH_SIZE:
+                archive.save_reports(to_archive)
+                to_archive = []
+
+    if archive is not None and to_archive:
+        archive.save_reports(to_archive)
+
+    log.info(f"Batch finished: {rendered} rendered, {failed} failed.")
+    return rendered, failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Render accountability emails from JSONL/CSV shift records.")
+    parser.add_argument("input", nargs="?", default="-", help="Input file, or '-' for stdin (default).")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format. Guessed from the file extension if omitted.")
+    parser.add_argument("--out", metavar="DIR", help="Write one .txt file per record into DIR instead of stdout.")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes to render with (default 1).")
+    parser.add_argument("--archive", nargs="?", const=ARCHIVE_PATH, metavar="DB", help="Also save valid records to the shift archive (default location if DB is omitted).")
+    parser.add_argument("--roster", metavar="CSV", help="Warn about names that are not on this roster, with suggested spellings.")
+    parser.add_argument("--verbose", action="store_true", help="Log progress to stderr.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S',
+        force=True
+    )
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    names = None
+    if args.roster:
+        names = NameIndex()
+        names.add_people(Roster.load(args.roster).entries)
+    archive = ShiftArchive(args.archive) if args.archive else None
+    try:
+        if args.input == "-":
+            _, failed = run_batch(sys.stdin, fmt, args.out, args.jobs, archive=archive, names=names)
+        else:
+            with open(args.input, newline="", encoding="utf-8") as f:
+                _, failed = run_batch(f, fmt, args.out, args.jobs, archive=archive, names=names)
+    finally:
+        if archive is not None:
+            archive.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
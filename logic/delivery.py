@@ -0,0 +1,238 @@
+"""
+Optional SMTP delivery of generated emails.
+
+Nothing is sent unless an SMTP server is configured through the environment:
+
+    CQ_SMTP_HOST, CQ_SMTP_PORT (default 25), CQ_SMTP_FROM,
+    CQ_SMTP_USER / CQ_SMTP_PASSWORD (optional login),
+    CQ_SMTP_STARTTLS=1 (upgrade the connection before logging in),
+    CQ_SMTP_TO (comma-separated default recipients of the full email)
+
+Connections are pooled and reused across messages; each message goes out
+in one SMTP transaction for all of its recipients. Transient failures
+(dropped connections, 4xx replies) are retried with exponential backoff,
+permanent ones (5xx) are not.
+"""
+import os
+import time
+import queue
+import random
+import smtplib
+import logging
+import threading
+import contextlib
+from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor
+
+
+log = logging.getLogger('app.delivery')
+
+
+POOL_SIZE = 4
+RETRIES = 3
+
+# Seconds before the first retry; doubled (with jitter) for each further one
+BACKOFF = 0.5
+
+# Idle pooled connections are checked with NOOP before reuse after this many seconds
+IDLE_CHECK = 30.0
+
+TIMEOUT = 15.0
+
+# Connection-level errors worth retrying on a fresh connection
+TRANSIENT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class DeliveryError(Exception):
+    """A message could not be delivered (after retries, if the failure was transient)."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        self.permanent = permanent
+        super().__init__(message)
+
+
+class SmtpSettings:
+    """Where and how to connect, and who sends."""
+    __slots__ = ("host", "port", "sender", "username", "password", "starttls", "recipients", "timeout")
+
+    def __init__(self, host: str, port: int = 25, sender: str = "", username: str = "", password: str = "",
+                 starttls: bool = False, recipients: list[str] = (), timeout: float = TIMEOUT):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.recipients = list(recipients)
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls) -> "SmtpSettings | None":
+        """Settings from the CQ_SMTP_* variables, or None if CQ_SMTP_HOST is not set."""
+        host = os.environ.get("CQ_SMTP_HOST")
+        if not host:
+            return None
+        return cls(
+            host=host,
+            port=int(os.environ.get("CQ_SMTP_PORT") or 25),
+            sender=os.environ.get("CQ_SMTP_FROM", ""),
+            username=os.environ.get("CQ_SMTP_USER", ""),
+            password=os.environ.get("CQ_SMTP_PASSWORD", ""),
+            starttls=os.environ.get("CQ_SMTP_STARTTLS", "") not in ("", "0"),
+            recipients=split_addresses(os.environ.get("CQ_SMTP_TO", "")),
+        )
+
+
+def split_addresses(text: str) -> list[str]:
+    return [address.strip() for address in text.replace(";", ",").split(",") if address.strip()]
+
+
+def build_message(subject: str, body: str, sender: str, recipients: list[str]) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = ", ".join(recipients)
+    message.set_content(body)
+    return message
+
+
+class SmtpPool:
+    """
+    At most `size` open SMTP connections, shared between threads.
+
+    `connection()` hands out an idle connection (or opens one) and takes it
+    back afterwards; a connection that failed is closed instead of being
+    returned, so the next caller starts fresh.
+    """
+
+    def __init__(self, settings: SmtpSettings, size: int = POOL_SIZE):
+        self.settings = settings
+        self.size = size
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self) -> smtplib.SMTP:
+        settings = self.settings
+        connection = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+        connection.ehlo()
+        if settings.starttls:
+            connection.starttls()
+            connection.ehlo()
+        if settings.username:
+            connection.login(settings.username, settings.password)
+        self.connections_opened += 1
+        log.debug("Opened SMTP connection to %s:%d.", settings.host, settings.port)
+        return connection
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                connection, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - idle_since < IDLE_CHECK:
+                return connection
+            try:
+                if connection.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(connection)
+
+    @staticmethod
+    def _discard(connection: smtplib.SMTP):
+        with contextlib.suppress(smtplib.SMTPException, OSError):
+            connection.quit()
+        connection.close()
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self._slots:
+            connection = self._checkout()
+            try:
+                yield connection
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # The server answered, and smtplib has reset the transaction
+                self._idle.put((connection, time.monotonic()))
+                raise
+            except BaseException:
+                self._discard(connection)
+                raise
+            self._idle.put((connection, time.monotonic()))
+
+    def close(self):
+        """Closes every idle connection."""
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+
+class SmtpSender:
+    """Sends messages through a pool, retrying transient failures with backoff."""
+
+    def __init__(self, settings: SmtpSettings, pool_size: int = POOL_SIZE, retries: int = RETRIES,
+                 backoff: float = BACKOFF):
+        self.settings = settings
+        self.pool = SmtpPool(settings, pool_size)
+        self.retries = retries
+        self.backoff = backoff
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+
+    def message(self, subject: str, body: str, recipients: list[str] | None = None) -> EmailMessage:
+        """Builds a message from the configured sender (to the default recipients if none are given)."""
+        return build_message(subject, body, self.settings.sender, recipients or self.settings.recipients)
+
+    def send(self, message: EmailMessage):
+        """
+        Delivers one message to all of its recipients in a single transaction.
+
+        Raises DeliveryError once the retries are used up, or straight away
+        for a permanent refusal.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.pool.connection() as connection:
+                    refused = connection.send_message(message)
+                if refused:
+                    log.warning("Some recipients were refused: %s", ", ".join(refused))
+                return
+            except smtplib.SMTPRecipientsRefused as e:
+                raise DeliveryError(f"All recipients refused: {', '.join(e.recipients)}", permanent=True) from e
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code >= 500:
+                    raise DeliveryError(f"Server refused message: {e.smtp_code} {e.smtp_error!r}", permanent=True) from e
+                error = e
+            except (*TRANSIENT_ERRORS, OSError) as e:
+                error = e
+            attempt += 1
+            if attempt > self.retries:
+                raise DeliveryError(f"Delivery failed after {attempt} attempts: {error}") from error
+            delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+            log.info("Send failed (%s); retrying in %.1f s.", error, delay)
+            time.sleep(delay)
+
+    def send_many(self, messages: list[EmailMessage]) -> list[DeliveryError | None]:
+        """Sends messages concurrently over the pool. Returns None or the error for each message."""
+        def send_one(message):
+            try:
+                self.send(message)
+            except DeliveryError as e:
+                log.warning(f"Failed to deliver '{message['Subject']}': {e}")
+                return e
+            return None
+
+        with ThreadPoolExecutor(max_workers=self.pool.size, thread_name_prefix="smtp") as executor:
+            return list(executor.map(send_one, messages))
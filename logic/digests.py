@@ -0,0 +1,207 @@
+"""
+Per-MTL digests: each MTL gets only the lates from their own bays.
+
+Usage
+-----
+    python -m logic.digests --report shift.json             # one shift (ShiftReport JSON)
+    python -m logic.digests --since 2025-06-01 --until 2025-06-07 --out digests/
+    python -m logic.digests --report shift.json --send recipients.json
+
+Lates are routed to the MTL that the room directory resolves for their room
+in one pass, so the work grows linearly with the number of lates. Lates in
+bays without an assigned MTL go to an "Unassigned" digest, and a full
+command copy (every shift's email) is produced alongside.
+"""
+import os
+import re
+import sys
+import json
+import logging
+import argparse
+from datetime import date
+from logic.archive import ShiftArchive, ARCHIVE_PATH
+from logic.delivery import SmtpSender, SmtpSettings
+from logic.models import LateEntry, ShiftReport
+from logic.processing import format_email_body, _format_person
+from logic.rooms import ROOM_DIRECTORY
+
+
+log = logging.getLogger('app.digests')
+
+
+# Digest name for lates whose bay has no MTL (or whose room did not resolve)
+UNASSIGNED = "Unassigned"
+
+# File name of the full copy written next to the digests
+COMMAND_COPY_NAME = "command.txt"
+
+# Key of the command copy's recipients in a --send recipients file
+COMMAND = "Command"
+
+KIND_TITLES = {"red_card": "Red-Card Lates", "standard": "Lates"}
+
+
+def report_lates(report: ShiftReport, shift_date: date | str = ""):
+    """Yields (shift_date, manor, kind, late) for every late in a report."""
+    shift_date = str(shift_date)
+    for late in report.red_card_lates:
+        yield shift_date, report.manor, "red_card", late
+    for late in report.lates:
+        yield shift_date, report.manor, "standard", late
+
+
+def archived_lates(archive: ShiftArchive, start=None, end=None):
+    """Yields (shift_date, manor, kind, late) for archived lates, oldest shift first."""
+    for row in archive.lates_between(start, end):
+        late = LateEntry(row["rank"], row["last"], row["first"], row["mi"],
+                         row["room"], row["late_time"], row["late_type"], row["reason"])
+        yield row["shift_date"], row["manor"], row["kind"], late
+
+
+def route_lates(lates) -> dict[str, dict[str, list[tuple[str, LateEntry]]]]:
+    """
+    Groups lates by MTL and kind in a single pass.
+
+    Returns {mtl: {kind: [(shift_date, late), ...]}} with lates kept in
+    input order. Each distinct (manor, room) is only resolved once.
+    """
+    lates = list(lates)
+    mtls = ROOM_DIRECTORY.resolve_many([manor for _, manor, _, _ in lates], [late.room for *_, late in lates])
+    routed = {}
+    for (shift_date, _, kind, late), mtl in zip(lates, mtls):
+        if mtl in ("N/A", "<Unknown MTL>"):
+            mtl = UNASSIGNED
+        routed.setdefault(mtl, {}).setdefault(kind, []).append((shift_date, late))
+    return routed
+
+
+def _digest_line(shift_date: str, kind: str, late: LateEntry, dated: bool) -> str:
+    missed = late.time
+    if kind == "red_card" and late.type:
+        missed += " " + ("Sign-in & Turn-in" if late.type == "Both" else late.type)
+    reason = late.reason.strip() or "No reason provided"
+    when = f"{shift_date} - " if dated else ""
+    return f"- {when}{_format_person(late) or late.last} - {late.room} - Missed {missed} - {reason}"
+
+
+def format_digest(mtl: str, lates_by_kind: dict[str, list], period: str = "") -> str:
+    """A short email body for one MTL. Lines are dated when they span several shifts."""
+    dates = {shift_date for lates in lates_by_kind.values() for shift_date, _ in lates}
+    dated = len(dates) > 1
+    total = sum(len(lates) for lates in lates_by_kind.values())
+    heading = "Lates in bays without an assigned MTL" if mtl == UNASSIGNED else f"Lates in {mtl}'s bays"
+    lines = [f"{heading}{f' ({period})' if period else ''}: {total}"]
+    for kind, title in KIND_TITLES.items():
+        if lates := lates_by_kind.get(kind):
+            lines += ["", f"{title}:"]
+            lines += [_digest_line(shift_date, kind, late, dated) for shift_date, late in lates]
+    return "\n".join(lines)
+
+
+def build_digests(lates, period: str = "") -> dict[str, str]:
+    """Routes lates and formats one digest per MTL, ordered by MTL name (Unassigned last)."""
+    routed = route_lates(lates)
+    order = sorted(routed, key=lambda mtl: (mtl == UNASSIGNED, mtl))
+    return {mtl: format_digest(mtl, routed[mtl], period) for mtl in order}
+
+
+def shift_digests(report: ShiftReport, shift_date: date | str = "") -> tuple[dict[str, str], str]:
+    """Digests for a single shift plus its full email as the command copy."""
+    return build_digests(report_lates(report, shift_date), str(shift_date)), format_email_body(report)
+
+
+def archive_digests(archive: ShiftArchive, start=None, end=None) -> tuple[dict[str, str], str]:
+    """Digests for every archived shift in a date range plus all of their emails as the command copy."""
+    period = " to ".join(str(day) for day in (start, end) if day)
+    digests = build_digests(archived_lates(archive, start, end), period)
+    emails = []
+    for shift in archive.shifts_between(start, end, with_email=True):
+        body = shift["email_body"] or format_email_body(archive.load_report(shift["id"]))
+        emails.append(f"===== {shift['shift_date']} {shift['manor']} =====\n\n{body}")
+    return digests, "\n\n".join(emails)
+
+
+def digest_file_name(mtl: str) -> str:
+    """'TSgt Poe' -> 'tsgt-poe.txt'."""
+    return re.sub(r"[^a-z0-9]+", "-", mtl.casefold()).strip("-") + ".txt"
+
+
+def write_digests(digests: dict[str, str], command_copy: str, out_dir: str) -> list[str]:
+    """Writes one file per MTL plus the command copy. Returns the paths written."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, text in [*((digest_file_name(mtl), text) for mtl, text in digests.items()), (COMMAND_COPY_NAME, command_copy)]:
+        path = os.path.join(out_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        paths.append(path)
+    return paths
+
+
+def send_digests(digests: dict[str, str], command_copy: str, recipients: dict[str, list[str]],
+                 settings: SmtpSettings, period: str = "") -> tuple[int, int]:
+    """
+    Emails each digest to its MTL's addresses and the command copy to
+    `recipients["Command"]` (or the configured default recipients).
+    Digests without addresses are skipped. Returns (messages sent, failures).
+    """
+    suffix = f" ({period})" if period else ""
+    with SmtpSender(settings) as sender:
+        messages = [
+            sender.message(f"Accountability lates: {mtl}{suffix}", text, recipients[mtl])
+            for mtl, text in digests.items() if recipients.get(mtl)
+        ]
+        skipped = [mtl for mtl in digests if not recipients.get(mtl)]
+        if skipped:
+            log.warning("No addresses for: %s", ", ".join(skipped))
+        if command_recipients := recipients.get(COMMAND) or settings.recipients:
+            messages.append(sender.message(f"Accountability email{suffix}", command_copy, command_recipients))
+        errors = sender.send_many(messages)
+    failed = sum(error is not None for error in errors)
+    return len(messages) - failed, failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Split lates into one digest per MTL.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--report", metavar="JSON", help="A single shift's report (ShiftReport JSON layout).")
+    source.add_argument("--archive", default=ARCHIVE_PATH, metavar="DB", help="Shift archive to read.")
+    parser.add_argument("--date", default=date.today().isoformat(), help="Shift date shown for --report.")
+    parser.add_argument("--since", help="First archived shift date (YYYY-MM-DD).")
+    parser.add_argument("--until", help="Last archived shift date (YYYY-MM-DD).")
+    parser.add_argument("--out", metavar="DIR", help="Write one file per MTL and command.txt here instead of printing.")
+    parser.add_argument("--send", metavar="JSON", help="Email the digests through the CQ_SMTP_* server; the file maps "
+                                                       "MTL names (and 'Command') to lists of addresses.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+
+    if args.report:
+        with open(args.report, encoding="utf-8") as f:
+            digests, command_copy = shift_digests(ShiftReport.from_dict(json.load(f)), args.date)
+    else:
+        with ShiftArchive(args.archive) as archive:
+            digests, command_copy = archive_digests(archive, args.since, args.until)
+
+    if args.send:
+        settings = SmtpSettings.from_env()
+        if settings is None:
+            print("Set CQ_SMTP_HOST (and CQ_SMTP_FROM) to send digests.", file=sys.stderr)
+            return 2
+        with open(args.send, encoding="utf-8") as f:
+            recipients = json.load(f)
+        period = args.date if args.report else " to ".join(day for day in (args.since, args.until) if day)
+        sent, failed = send_digests(digests, command_copy, recipients, settings, period)
+        print(f"Sent {sent} message(s); {failed} failed.", file=sys.stderr)
+        return 1 if failed else 0
+    if args.out:
+        paths = write_digests(digests, command_copy, args.out)
+        print(f"Wrote {len(digests)} digest(s) and {COMMAND_COPY_NAME} to {args.out}", file=sys.stderr)
+        log.debug("Digest files: %s", paths)
+    else:
+        print("\n\n".join([*digests.values(), f"===== Command Copy =====\n\n{command_copy}"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from logic.models import ShiftReport
+from utils import user_data_path
+
+
+log = logging.getLogger('app.drafts')
+
+
+DRAFT_DIR = user_data_path("drafts")
+SNAPSHOT_NAME = "draft.json"
+JOURNAL_NAME = "draft.journal"
+
+# Edits arriving within this window are written as one journal entry
+FLUSH_INTERVAL = 0.5
+
+# Journal entries written before they are folded into a new snapshot
+COMPACT_EVERY = 200
+
+_STOP = object()
+_CLEAR = object()
+
+
+def flatten(data, path: tuple = ()) -> dict[tuple, object]:
+    """Turns nested dicts/lists into {path tuple: leaf value}; list positions are ints."""
+    if isinstance(data, dict):
+        items = data.items()
+    elif isinstance(data, list):
+        items = enumerate(data)
+    else:
+        return {path: data}
+    flat = {}
+    for key, value in items:
+        flat.update(flatten(value, path + (key,)))
+    if not flat:
+        flat[path] = [] if isinstance(data, list) else {}
+    return flat
+
+
+def unflatten(flat: dict[tuple, object]):
+    """Inverse of `flatten`."""
+    root = {}
+    for path, value in flat.items():
+        if not path:
+            return value
+        node = root
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return _lists_from_positions(root)
+
+
+def _lists_from_positions(node):
+    if not isinstance(node, dict):
+        return node
+    node = {key: _lists_from_positions(value) for key, value in node.items()}
+    if node and all(isinstance(key, int) for key in node):
+        return [node[key] for key in sorted(node)]
+    return node
+
+
+def _diff(old: dict, new: dict) -> tuple[list, list]:
+    changed = [[list(path), value] for path, value in new.items() if old.get(path, _STOP) != value]
+    removed = [list(path) for path in old.keys() - new.keys()]
+    return changed, removed
+
+
+class DraftJournal:
+    """
+    Crash-safe autosave of the form in progress.
+
+    `submit` only queues a report snapshot; a background thread keeps the
+    newest one per `flush_interval`, diffs it field by field against the
+    last saved state and appends the changes as one JSON line to the
+    journal. Every `compact_every` entries the full state is written to a
+    snapshot file (atomically) and the journal is truncated. `restore`
+    replays snapshot + journal, ignoring a final line torn by a crash.
+    """
+
+    def __init__(self, directory: str = DRAFT_DIR, flush_interval: float = FLUSH_INTERVAL,
+                 compact_every: int = COMPACT_EVERY):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_NAME)
+        self.journal_path = os.path.join(directory, JOURNAL_NAME)
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.entries_written = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._state = {}
+        self._journal = None
+        self._entries_since_snapshot = 0
+        self._last_submitted = None
+        self._valid_journal_length = None
+
+    def restore(self) -> ShiftReport | None:
+        """Returns the saved draft, or None if there is none. Call before `start`."""
+        state = {}
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                state = flatten(json.load(f)["report"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"Ignoring unreadable draft snapshot: {e}")
+
+        applied = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                valid_length = 0
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        log.warning("Draft journal ends in a partial entry; ignoring it.")
+                        # Cut it off before appending, or the next entry would be glued to it
+                        self._valid_journal_length = valid_length
+                        break
+                    valid_length += len(line)
+                    for path, value in entry["set"]:
+                        state[tuple(path)] = value
+                    for path in entry["del"]:
+                        state.pop(tuple(path), None)
+                    applied += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning(f"Failed to read draft journal: {e}")
+
+        self._state = state
+        self._entries_since_snapshot = applied
+        # A draft of an untouched form is not worth restoring
+        if not any(state.values()):
+            return None
+        log.info(f"Restored draft from snapshot and {applied} journal entries.")
+        return ShiftReport.from_dict(unflatten(state))
+
+    def start(self):
+        """Starts the background writer."""
+        if self._thread is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if self._valid_journal_length is not None:
+            self._journal.truncate(self._valid_journal_length)
+            self._valid_journal_length = None
+        self._thread = threading.Thread(target=self._run, name="draft-journal", daemon=True)
+        self._thread.start()
+
+    def submit(self, report: ShiftReport):
+        """Queues the current form contents. Cheap enough for every edit."""
+        if report is not None and report is not self._last_submitted:
+            self._last_submitted = report
+            self._queue.put(report)
+
+    def clear(self):
+        """Discards the saved draft, e.g. once the shift's email has been sent."""
+        self._last_submitted = None
+        self._queue.put(_CLEAR)
+
+    def close(self, timeout: float = 5.0):
+        """Writes out pending edits and stops the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            latest = None
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                if item is _CLEAR:
+                    latest = None
+                    self._clear_files()
+                else:
+                    latest = item
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if latest is not None:
+                try:
+                    self._write(latest)
+                except (OSError, TypeError, ValueError) as e:
+                    log.warning(f"Failed to save draft: {e}")
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _write(self, report: ShiftReport):
+        state = flatten(report.to_dict())
+        changed, removed = _diff(self._state, state)
+        if not changed and not removed:
+            return
+        self._journal.write(json.dumps({"set": changed, "del": removed}) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._state = state
+        self.entries_written += 1
+        self._entries_since_snapshot += 1
+        if self._entries_since_snapshot >= self.compact_every:
+            self._compact(report)
+
+    def _compact(self, report: ShiftReport):
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "report": report.to_dict()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # A crash before the truncate only replays entries already in the snapshot
+        self._journal.truncate(0)
+        self._entries_since_snapshot = 0
+        log.debug("Draft snapshot written.")
+
+    def _clear_files(self):
+        self._state = {}
+        self._entries_since_snapshot = 0
+        self._journal.truncate(0)
+        try:
+            os.remove(self.snapshot_path)
+        except FileNotFoundError:
+            pass
+        log.info("Draft cleared.")
@@ -0,0 +1,127 @@
+"""
+Writes a fake CAC scanner log, for trying out the live scanner tail.
+
+Usage
+-----
+    python -m logic.fake_scanner scans.csv --roster roster.csv --rate 20 --speed 60
+    CQ_SCANNER_LOG=scans.csv python app.py
+
+Scans of random trainees are appended as the scanner would, on a simulated
+clock that runs `speed` times faster than real time. `--rotate-every n`
+renames the log every n scans and starts a new one, and `--split-lines`
+writes each line in two flushes, so readers see unfinished lines.
+"""
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+from logic.aggregator import shift_date
+from logic.models import Person
+from logic.roster import Roster, load_saved_roster
+
+
+log = logging.getLogger('app.fake_scanner')
+
+
+HEADER = "Timestamp,Last,First,MI,Event\n"
+
+# Scan events and how often each is written
+EVENTS = {"IN": 45, "OUT": 45, "RC Sign-in": 5, "RC Turn-in": 5}
+
+SYNTHETIC_TRAINEES = 300
+
+
+def synthetic_people(count: int = SYNTHETIC_TRAINEES) -> list[Person]:
+    return [Person("AB", f"Trainee{index:03d}", "Test", chr(65 + index % 26)) for index in range(count)]
+
+
+class FakeScanner:
+    """Appends scans to a log file, one line per `scan()`."""
+
+    def __init__(self, path: str, people: list[Person], start: datetime, speed: float = 1.0,
+                 split_lines: bool = False, seed: int | None = None):
+        self.path = path
+        self.people = people
+        self.start = start
+        self.speed = speed
+        self.split_lines = split_lines
+        self.random = random.Random(seed)
+        self.written = 0
+        self.rotations = 0
+        self._began = time.monotonic()
+        self._events = list(EVENTS)
+        self._weights = list(EVENTS.values())
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create()
+
+    def _create(self):
+        with open(self.path, "w", newline="", encoding="utf-8") as f:
+            f.write(HEADER)
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=(time.monotonic() - self._began) * self.speed)
+
+    def line(self) -> str:
+        person = self.random.choice(self.people)
+        event = self.random.choices(self._events, self._weights)[0]
+        return f"{self.now():%Y-%m-%d %H:%M:%S},{person.last},{person.first},{person.mi},{event}\n"
+
+    def scan(self):
+        line = self.line()
+        with open(self.path, "a", newline="", encoding="utf-8") as f:
+            if self.split_lines:
+                middle = len(line) // 2
+                f.write(line[:middle])
+                f.flush()
+                time.sleep(0.005)
+                line = line[middle:]
+            f.write(line)
+        self.written += 1
+
+    def rotate(self) -> str:
+        """Moves the log aside, as a scanner does at a size limit, and starts a new one."""
+        self.rotations += 1
+        moved = f"{self.path}.{self.rotations}"
+        os.replace(self.path, moved)
+        self._create()
+        log.info(f"Rotated scanner log to {moved}.")
+        return moved
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Append fake CAC scans to a log file.")
+    parser.add_argument("log", help="Log file to write.")
+    parser.add_argument("--roster", help="Roster CSV to draw trainees from (default: the saved roster, or made-up names).")
+    parser.add_argument("--rate", type=float, default=5.0, help="Scans per real second.")
+    parser.add_argument("--speed", type=float, default=60.0, help="Simulated seconds per real second.")
+    parser.add_argument("--start", default="20:00", help="Simulated clock start (HH:MM on the current shift day).")
+    parser.add_argument("--count", type=int, default=0, help="Stop after this many scans (default: run until stopped).")
+    parser.add_argument("--rotate-every", type=int, default=0, help="Rotate the log every N scans.")
+    parser.add_argument("--split-lines", action="store_true", help="Write each line in two parts.")
+    parser.add_argument("--seed", type=int, help="Random seed.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, force=True)
+    roster = Roster.load(args.roster) if args.roster else load_saved_roster()
+    people = roster.entries if roster else synthetic_people()
+    hour, _, minute = args.start.partition(":")
+    start = datetime.combine(shift_date(), datetime.min.time()).replace(hour=int(hour), minute=int(minute or 0))
+    scanner = FakeScanner(args.log, people, start, args.speed, args.split_lines, args.seed)
+    print(f"Writing scans of {len(people)} trainees to {args.log}", file=sys.stderr)
+    try:
+        while not args.count or scanner.written < args.count:
+            scanner.scan()
+            if args.rotate_every and scanner.written % args.rotate_every == 0:
+                scanner.rotate()
+            time.sleep(1 / args.rate)
+    except KeyboardInterrupt:
+        pass
+    print(f"Wrote {scanner.written} scans ({scanner.rotations} rotations).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
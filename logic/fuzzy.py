@@ -0,0 +1,228 @@
+import re
+import heapq
+import logging
+from collections import Counter
+from logic.models import Person
+
+
+log = logging.getLogger('app.fuzzy')
+
+
+# Characters per n-gram
+GRAM_SIZE = 3
+
+# Most names scored by edit distance per query, taken by shared n-grams
+MAX_CANDIDATES = 2000
+
+MAX_MATCHES = 8
+
+# Queries shorter than this are left to prefix completion
+MIN_QUERY_LENGTH = 3
+
+# Queries up to this long allow one typo by default, longer ones two
+SHORT_QUERY_LENGTH = 5
+
+_NON_NAME = re.compile(r"[^\w,' -]+")
+
+
+def normalize_name(name: str) -> str:
+    """Casefolds a name and collapses whitespace, keeping 'last, first mi' punctuation."""
+    name = _NON_NAME.sub("", name.casefold())
+    return " ".join(name.split()).replace(" ,", ",")
+
+
+def person_key(person: Person) -> str:
+    """The 'last, first mi' key a person is indexed under."""
+    return normalize_name(f"{person.last}, {person.first} {person.mi}").rstrip(", ")
+
+
+def _grams(text: str, pad_end: bool = True) -> set[str]:
+    # Names are padded on both sides so short names and word edges count;
+    # a query is only padded in front, since it may be a partial name
+    padded = " " * (GRAM_SIZE - 1) + text + (" " if pad_end else "")
+    return {padded[i:i + GRAM_SIZE] for i in range(len(padded) - GRAM_SIZE + 1)}
+
+
+def edit_distance(a: str, b: str, limit: int | None = None, prefix: bool = False) -> int:
+    """
+    Optimal-string-alignment distance: insertions, deletions, substitutions
+    and adjacent transpositions each cost 1.
+
+    With `prefix`, returns the distance from `a` to the closest prefix of
+    `b` instead, which is what a half-typed name should be scored by. Stops
+    early and returns `limit + 1` once the distance must exceed `limit`.
+    """
+    if prefix and limit is not None:
+        b = b[:len(a) + limit]
+    elif limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous) if prefix else previous[-1]
+
+
+class FuzzyMatch:
+    """One ranked result of `NameIndex.search`."""
+    __slots__ = ("key", "payload", "distance", "score")
+
+    def __init__(self, key: str, payload, distance: int, score: float):
+        self.key = key
+        self.payload = payload
+        self.distance = distance
+        self.score = score
+
+    def __repr__(self):
+        return f"FuzzyMatch({self.key!r}, distance={self.distance}, score={self.score:.2f})"
+
+
+class NameIndex:
+    """
+    Trigram index over normalized 'last, first mi' names for typo-tolerant lookup.
+
+    The n-grams of distinct surnames are indexed, so a query only scores the
+    surnames that share enough n-grams with what was typed to be within
+    reach. Surnames are scored by edit distance to their closest prefix (so
+    a half-typed, misspelled name still matches), and anything typed after
+    a comma is scored against the first names of the surviving entries.
+    Names can be added and discarded one at a time, so a changed roster is
+    applied as a diff.
+    """
+
+    def __init__(self):
+        self._payloads = {}
+        self._keys_by_last = {}
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._payloads)
+
+    def __contains__(self, key: str):
+        return key in self._payloads
+
+    def keys(self) -> set[str]:
+        return set(self._payloads)
+
+    def add(self, key: str, payload=None):
+        """Indexes `key` (already normalized), replacing the payload if it is already there."""
+        if key not in self._payloads:
+            last = key.partition(",")[0]
+            keys = self._keys_by_last.get(last)
+            if keys is None:
+                keys = self._keys_by_last[last] = set()
+                for gram in _grams(last):
+                    self._postings.setdefault(gram, set()).add(last)
+            keys.add(key)
+        self._payloads[key] = payload
+
+    def discard(self, key: str):
+        if key not in self._payloads:
+            return
+        del self._payloads[key]
+        last = key.partition(",")[0]
+        keys = self._keys_by_last[last]
+        keys.discard(key)
+        if keys:
+            return
+        del self._keys_by_last[last]
+        for gram in _grams(last):
+            lasts = self._postings[gram]
+            lasts.discard(last)
+            if not lasts:
+                del self._postings[gram]
+
+    def add_people(self, people, payload_factory=None):
+        """Indexes Person objects under their 'last, first mi' key."""
+        for person in people:
+            key = person_key(person)
+            if key:
+                self.add(key, payload_factory(person) if payload_factory else person)
+
+    def sync(self, items: dict, keep: set[str] = frozenset()):
+        """
+        Makes the index hold exactly `items` ({key: payload}) plus the keys in
+        `keep`, touching only the names that were added or removed.
+        """
+        stale = self._payloads.keys() - items.keys() - keep
+        for key in stale:
+            self.discard(key)
+        added = 0
+        for key, payload in items.items():
+            if key not in self._payloads:
+                added += 1
+            self.add(key, payload)
+        log.debug("Name index synced: %d added, %d removed, %d total.", added, len(stale), len(self))
+
+    def has_name(self, query: str) -> bool:
+        """
+        True if a 'last' or 'last, first' name is indexed exactly. The first
+        name must match in full; only a trailing middle initial may be left
+        out. Unlike `search`, this works for names of any length.
+        """
+        last, _, first = normalize_name(query).partition(",")
+        first = first.strip()
+        for key in self._keys_by_last.get(last.strip(), ()):
+            rest = key.partition(",")[2].strip()
+            given, _, initial = rest.rpartition(" ")
+            if not first or rest == first or (given == first and len(initial) == 1):
+                return True
+        return False
+
+    def search(self, query: str, limit: int = MAX_MATCHES, max_distance: int | None = None) -> list[FuzzyMatch]:
+        """Returns up to `limit` names close to `query`, best first."""
+        query = normalize_name(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        if max_distance is None:
+            max_distance = 1 if len(query) <= SHORT_QUERY_LENGTH else 2
+        query_last, comma, query_first = query.partition(",")
+        query_first = query_first.strip()
+        # Once a comma is typed the surname is complete
+        last_is_complete = bool(comma)
+
+        # A surname within `max_distance` edits shares all but at most
+        # GRAM_SIZE * max_distance of the query's n-grams
+        query_grams = _grams(query_last, pad_end=last_is_complete)
+        min_shared = max(1, len(query_grams) - GRAM_SIZE * max_distance)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+        candidates = sorted(
+            ((count, last) for last, count in shared.items() if count >= min_shared),
+            key=lambda item: -item[0],
+        )[:MAX_CANDIDATES]
+
+        matches = []
+        # Negated distances of the best `limit` matches so far (a max-heap)
+        best = []
+        for count, last in candidates:
+            # Surnames sharing fewer n-grams cannot be closer than this, so
+            # stop once `limit` strictly better matches have been found
+            lower_bound = -(-(len(query_grams) - count) // GRAM_SIZE)
+            if len(best) >= limit and -best[0] < lower_bound:
+                break
+            distance = edit_distance(query_last, last, max_distance, prefix=not last_is_complete)
+            if distance > max_distance:
+                continue
+            for key in self._keys_by_last[last]:
+                total = distance
+                if query_first:
+                    first = key.partition(",")[2].strip()
+                    total += edit_distance(query_first, first, max_distance - distance, prefix=True)
+                if total <= max_distance:
+                    matches.append(FuzzyMatch(key, self._payloads[key], total, 1 - total / len(query)))
+                    if len(best) < limit:
+                        heapq.heappush(best, -total)
+                    elif total < -best[0]:
+                        heapq.heapreplace(best, -total)
+        matches.sort(key=lambda match: (match.distance, match.key))
+        return matches[:limit]
@@ -0,0 +1,151 @@
+import math
+import json
+import time
+import logging
+from array import array
+from contextlib import contextmanager
+
+
+# Samples kept per stage; older samples are overwritten
+SAMPLE_CAPACITY = 1024
+
+# Stages of the preview path, in order
+PREVIEW_STAGES = ["queue", "gather", "format", "apply", "total"]
+
+
+log = logging.getLogger('app.metrics')
+
+
+class RingBuffer:
+    """
+    Fixed-size buffer of float samples.
+
+    There is a single writer (the Tk main thread) and the write is one array
+    store plus one integer increment, so no lock is needed. Readers copy the
+    buffer and may at worst miss the newest sample.
+    """
+    __slots__ = ("capacity", "_samples", "_count")
+
+    def __init__(self, capacity: int = SAMPLE_CAPACITY):
+        self.capacity = capacity
+        self._samples = array("d", bytes(8 * capacity))
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self) -> int:
+        """Samples ever added, including overwritten ones."""
+        return self._count
+
+    def add(self, value: float):
+        self._samples[self._count % self.capacity] = value
+        self._count += 1
+
+    def values(self) -> list[float]:
+        """Returns the retained samples, oldest first."""
+        count = self._count
+        if count <= self.capacity:
+            return self._samples[:count].tolist()
+        start = count % self.capacity
+        return (self._samples[start:] + self._samples[:start]).tolist()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class LatencyRecorder:
+    """Collects per-stage latency samples (in seconds) and summarizes them."""
+
+    def __init__(self, stages: list[str] = PREVIEW_STAGES, capacity: int = SAMPLE_CAPACITY):
+        self.buffers = {stage: RingBuffer(capacity) for stage in stages}
+
+    def record(self, stage: str, seconds: float):
+        buffer = self.buffers.get(stage)
+        if buffer is None:
+            buffer = self.buffers[stage] = RingBuffer(next(iter(self.buffers.values())).capacity)
+        buffer.add(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        """Times the enclosed block as one sample of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def summary(self) -> dict:
+        """Returns {stage: {count, p50, p95, p99, max}} with times in milliseconds."""
+        result = {}
+        for stage, buffer in self.buffers.items():
+            values = sorted(buffer.values())
+            result[stage] = {
+                "count": buffer.total,
+                "p50": percentile(values, 50) * 1000,
+                "p95": percentile(values, 95) * 1000,
+                "p99": percentile(values, 99) * 1000,
+                "max": (values[-1] if values else 0.0) * 1000,
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """Summary as aligned text lines, for the debug overlay."""
+        lines = [f"{'stage':<8}{'n':>7}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<8}{stats['count']:>7}{stats['p50']:>9.2f}{stats['p95']:>9.2f}{stats['p99']:>9.2f}")
+        return "\n".join(lines)
+
+    def dump_json(self, path: str, include_samples: bool = True):
+        """Writes the summary (and the raw samples, in seconds) to a JSON file."""
+        data = {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "summary": self.summary()}
+        if include_samples:
+            data["samples"] = {stage: buffer.values() for stage, buffer in self.buffers.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        log.info(f"Latency samples written to {path}.")
+
+    def reset(self):
+        for stage, buffer in self.buffers.items():
+            self.buffers[stage] = RingBuffer(buffer.capacity)
+
+
+class StartupProfile:
+    """
+    Durations of the named startup phases plus milestones since process start.
+
+    Phases are timed with `phase(name)`; milestones such as "interactive"
+    are recorded with `mark(name)` as seconds since `started_at`.
+    """
+
+    def __init__(self, started_at: float | None = None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.phases = []
+        self.marks = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name: str):
+        self.marks[name] = time.perf_counter() - self.started_at
+
+    def over_budget(self, mark: str, budget_ms: float) -> bool:
+        return mark in self.marks and self.marks[mark] * 1000 > budget_ms
+
+    def format_report(self) -> str:
+        """Phases in the order they ran, then the milestones, in milliseconds."""
+        lines = ["Startup profile (ms):"]
+        lines.extend(f"  {name:<22}{seconds * 1000:>9.1f}" for name, seconds in self.phases)
+        lines.extend(f"  @{name:<21}{seconds * 1000:>9.1f}" for name, seconds in self.marks.items())
+        return "\n".join(lines)
@@ -0,0 +1,211 @@
+import logging
+
+
+log = logging.getLogger('app.models')
+
+
+SIGNATURE_FIELDS = [
+    "Rank",
+    "Last", "First", "MI",
+    "Squadron",
+    "AFSC/Job"
+]
+
+
+class Person:
+    """A rank and name as entered for a team member or a late."""
+    __slots__ = ("rank", "last", "first", "mi")
+
+    def __init__(self, rank: str = "", last: str = "", first: str = "", mi: str = ""):
+        self.rank = rank
+        self.last = last
+        self.first = first
+        self.mi = mi
+
+    def is_empty(self) -> bool:
+        """True if none of the name/rank fields were filled in."""
+        return not (self.rank or self.last or self.first or self.mi)
+
+    def astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._fields())
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self._fields()}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**{name: data.get(name) or "" for name in cls._fields()})
+
+    @classmethod
+    def _fields(cls) -> tuple[str, ...]:
+        # Includes the slots of every base class, in declaration order
+        fields = ()
+        for klass in reversed(cls.__mro__):
+            fields += getattr(klass, "__slots__", ())
+        return fields
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+
+class LateEntry(Person):
+    """A single Red-Card or Standard late row. `type` is empty for Standard Lates."""
+    __slots__ = ("room", "time", "type", "reason")
+
+    def __init__(self, rank: str = "", last: str = "", first: str = "", mi: str = "",
+                 room: str = "", time: str = "", type: str = "", reason: str = ""):
+        super().__init__(rank, last, first, mi)
+        self.room = room
+        self.time = time
+        self.type = type
+        self.reason = reason
+
+
+class ShiftReport:
+    """
+    Everything needed to build one accountability email, without any widgets.
+
+    `cq_team["CQ Runner"]` holds a list of Person, every other role holds a
+    single Person. `signature` maps the signature field names to their text.
+    """
+    __slots__ = (
+        "manor",
+        "al_team",
+        "cq_team",
+        "red_card_lates",
+        "lates",
+        "cac_scanner_unavailable",
+        "on_call_mtl",
+        "additional_notes",
+        "signature",
+    )
+
+    def __init__(self, manor: str = "", al_team: dict = None, cq_team: dict = None,
+                 red_card_lates: list = None, lates: list = None,
+                 cac_scanner_unavailable: bool = False, on_call_mtl: str = "",
+                 additional_notes: list = None, signature: dict = None):
+        self.manor = manor
+        self.al_team = al_team if al_team is not None else {}
+        self.cq_team = cq_team if cq_team is not None else {}
+        self.red_card_lates = red_card_lates if red_card_lates is not None else []
+        self.lates = lates if lates is not None else []
+        self.cac_scanner_unavailable = cac_scanner_unavailable
+        self.on_call_mtl = on_call_mtl
+        self.additional_notes = additional_notes if additional_notes is not None else []
+        self.signature = signature if signature is not None else {field: "" for field in SIGNATURE_FIELDS}
+
+    def to_dict(self) -> dict:
+        """Returns a plain, JSON-serializable dictionary."""
+        def team_to_dict(team: dict) -> dict:
+            return {
+                role: [p.to_dict() for p in value] if isinstance(value, list) else value.to_dict()
+                for role, value in team.items()
+            }
+        return {
+            "manor": self.manor,
+            "al_team": team_to_dict(self.al_team),
+            "cq_team": team_to_dict(self.cq_team),
+            "red_card_lates": [late.to_dict() for late in self.red_card_lates],
+            "lates": [late.to_dict() for late in self.lates],
+            "notes": {
+                "cac_scanner_unavailable": self.cac_scanner_unavailable,
+                "on_call_mtl": self.on_call_mtl,
+                "additional_notes": list(self.additional_notes),
+            },
+            "signature": dict(self.signature),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ShiftReport":
+        """Builds a report from the dictionary layout produced by `to_dict`."""
+        def team_from_dict(team: dict) -> dict:
+            return {
+                role: [Person.from_dict(p) for p in value] if isinstance(value, list) else Person.from_dict(value)
+                for role, value in (team or {}).items()
+            }
+        notes = data.get("notes") or {}
+        signature = {field: "" for field in SIGNATURE_FIELDS}
+        signature.update(data.get("signature") or {})
+        return cls(
+            manor=data.get("manor") or "",
+            al_team=team_from_dict(data.get("al_team")),
+            cq_team=team_from_dict(data.get("cq_team")),
+            red_card_lates=[LateEntry.from_dict(late) for late in data.get("red_card_lates") or []],
+            lates=[LateEntry.from_dict(late) for late in data.get("lates") or []],
+            cac_scanner_unavailable=bool(notes.get("cac_scanner_unavailable")),
+            on_call_mtl=notes.get("on_call_mtl") or "",
+            additional_notes=list(notes.get("additional_notes") or []),
+            signature=signature,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, ShiftReport):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return (
+            f"ShiftReport(manor={self.manor!r}, red_card_lates={len(self.red_card_lates)}, "
+            f"lates={len(self.lates)})"
+        )
+
+
+def _snapshot_person(entries: dict) -> Person:
+    return Person(
+        rank=entries["Rank"].get(),
+        last=entries["Last"].get(),
+        first=entries["First"].get(),
+        mi=entries["MI"].get(),
+    )
+
+
+def _snapshot_late(entries: dict) -> LateEntry:
+    return LateEntry(
+        rank=entries["Rank"].get(),
+        last=entries["Last"].get(),
+        first=entries["First"].get(),
+        mi=entries["MI"].get(),
+        room=entries["Room"].get(),
+        time=entries["Time"].get(),
+        type=entries["Type"].get() if "Type" in entries else "",
+        reason=entries["Reason"].get(),
+    )
+
+
+def snapshot_ui(ui_elements: dict) -> ShiftReport:
+    """
+    Reads every input widget exactly once and returns the raw, unvalidated report.
+
+    This is the only place that calls `.get()` on the widgets; everything in
+    `logic.processing` works on the returned ShiftReport.
+    """
+    log.debug("Taking UI snapshot.")
+    notes_vars = ui_elements["notes"]
+
+    cq_team = {}
+    for role, entries in ui_elements["cq_members"].items():
+        if isinstance(entries, list):
+            cq_team[role] = [_snapshot_person(runner_set) for runner_set in entries]
+        else:
+            cq_team[role] = _snapshot_person(entries)
+
+    return ShiftReport(
+        manor=ui_elements["manor"].get(),
+        al_team={role: _snapshot_person(entries) for role, entries in ui_elements["al_members"].items()},
+        cq_team=cq_team,
+        red_card_lates=[_snapshot_late(entry_set) for entry_set in ui_elements["red_card_lates"]],
+        lates=[_snapshot_late(entry_set) for entry_set in ui_elements["lates"]],
+        cac_scanner_unavailable=bool(notes_vars["cac_scanner"].get()),
+        on_call_mtl=notes_vars["on_call_mtl"].get(),
+        additional_notes=[note.get() for note in notes_vars["additional_notes"]],
+        signature={key: widget.get() for key, widget in ui_elements["signature"].items()},
+    )
@@ -0,0 +1,283 @@
+"""
+Durable outbox for emails, drained by a background worker.
+
+A message is written to a local SQLite queue before anything is sent, and
+moves through pending -> sending -> sent, or back to pending with a later
+`next_attempt` when the server could not be reached, or to failed once it
+is refused or out of attempts. Each message carries an idempotency key, so
+queueing the same email twice sends it once. After a crash only messages
+left in "sending" need attention; they are found through an index on the
+state and queued again with the same Message-ID, so a mail server can
+recognize a repeat.
+"""
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from logic.delivery import SmtpSender, SmtpSettings, DeliveryError
+from utils import user_data_path
+
+
+log = logging.getLogger('app.outbox')
+
+
+OUTBOX_PATH = user_data_path("outbox.db")
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+# Attempts before a message that keeps failing is marked failed
+MAX_ATTEMPTS = 8
+
+# Seconds before the first retry; doubled for each further attempt, up to RETRY_CAP
+RETRY_BASE = 5.0
+RETRY_CAP = 600.0
+
+# Longest the worker sleeps when nothing is due
+POLL_INTERVAL = 30.0
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    recipients TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL DEFAULT 0,
+    last_error TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+-- Finds due and interrupted messages without reading the sent ones
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox(state, next_attempt);
+"""
+
+
+def idempotency_key(*parts: str) -> str:
+    """A stable key for an email, e.g. from its recipients, subject and body."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class Outbox:
+    """
+    The queue on disk. Each thread should open its own Outbox on the same path.
+
+    Every state change is a single UPDATE guarded by the expected current
+    state, so a message is never claimed twice.
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=10)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def enqueue(self, subject: str, body: str, recipients: list[str], key: str | None = None) -> bool:
+        """Queues a message. Returns False if a message with the same key was already queued."""
+        key = key or idempotency_key(",".join(recipients), subject, body)
+        now = _now()
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO outbox (key, subject, body, recipients, state, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, subject, body, json.dumps(recipients), PENDING, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, now: float | None = None) -> sqlite3.Row | None:
+        """Moves the oldest due pending message to sending and returns it."""
+        now = time.time() if now is None else now
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT * FROM outbox WHERE state = ? AND next_attempt <= ? ORDER BY next_attempt LIMIT 1",
+                (PENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = self.connection.execute(
+                "UPDATE outbox SET state = ?, attempts = attempts + 1, updated_at = ? WHERE id = ? AND state = ?",
+                (SENDING, _now(), row["id"], PENDING),
+            ).rowcount
+        return row if claimed else None
+
+    def _transition(self, message_id: int, state: str, **fields):
+        assignments = "".join(f", {name} = ?" for name in fields)
+        with self.connection:
+            self.connection.execute(
+                f"UPDATE outbox SET state = ?, updated_at = ?{assignments} WHERE id = ? AND state = ?",
+                (state, _now(), *fields.values(), message_id, SENDING),
+            )
+
+    def mark_sent(self, message_id: int):
+        self._transition(message_id, SENT, last_error="")
+
+    def mark_retry(self, message_id: int, error: str, delay: float):
+        self._transition(message_id, PENDING, last_error=error, next_attempt=time.time() + delay)
+
+    def mark_failed(self, message_id: int, error: str):
+        self._transition(message_id, FAILED, last_error=error)
+
+    def recover(self) -> int:
+        """Requeues messages left in sending by a crash. Returns how many."""
+        with self.connection:
+            count = self.connection.execute(
+                "UPDATE outbox SET state = ?, updated_at = ? WHERE state = ?", (PENDING, _now(), SENDING)
+            ).rowcount
+        if count:
+            log.info(f"Requeued {count} message(s) interrupted while sending.")
+        return count
+
+    def retry_failed(self) -> int:
+        """Gives every failed message a fresh set of attempts."""
+        with self.connection:
+            return self.connection.execute(
+                "UPDATE outbox SET state = ?, attempts = 0, next_attempt = 0, updated_at = ? WHERE state = ?",
+                (PENDING, _now(), FAILED),
+            ).rowcount
+
+    def next_due(self) -> float | None:
+        """When the next pending message is due (epoch seconds), or None if nothing is pending."""
+        row = self.connection.execute(
+            "SELECT MIN(next_attempt) FROM outbox WHERE state = ?", (PENDING,)
+        ).fetchone()
+        return row[0]
+
+    def counts(self) -> dict[str, int]:
+        rows = self.connection.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall()
+        return {PENDING: 0, SENDING: 0, SENT: 0, FAILED: 0, **{state: count for state, count in rows}}
+
+
+def retry_delay(attempts: int) -> float:
+    return min(RETRY_CAP, RETRY_BASE * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+
+
+class OutboxWorker:
+    """
+    Sends queued messages from a daemon thread.
+
+    The Tk thread only calls `enqueue`/`notify`, which write one row and
+    set an event; the worker opens its own connection to the outbox and
+    to the SMTP server. Transient failures are retried by the outbox (so
+    the schedule survives restarts) rather than inside the sender.
+    """
+
+    def __init__(self, settings: SmtpSettings, path: str = OUTBOX_PATH, max_attempts: int = MAX_ATTEMPTS):
+        self.settings = settings
+        self.path = path
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.failed = 0
+        # (subject, error) of messages given up on, until `take_failures` collects them
+        self._failures = deque()
+        self._outbox = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "OutboxWorker | None":
+        """A worker for the CQ_SMTP_* server, or None if delivery is not configured."""
+        settings = SmtpSettings.from_env()
+        if settings is None:
+            return None
+        if not settings.recipients:
+            log.warning("CQ_SMTP_HOST is set but CQ_SMTP_TO is empty; sending emails is turned off.")
+            return None
+        return cls(settings)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, subject: str, body: str, recipients: list[str] | None = None, key: str | None = None) -> bool:
+        """Queues a message (to the configured recipients by default) and wakes the worker."""
+        if self._outbox is None:
+            self._outbox = Outbox(self.path)
+        queued = self._outbox.enqueue(subject, body, recipients or self.settings.recipients, key)
+        self.notify()
+        return queued
+
+    def notify(self):
+        self._wake.set()
+
+    def take_failures(self) -> list[tuple[str, str]]:
+        """(subject, error) of each message given up on since the last call."""
+        failures = []
+        while self._failures:
+            failures.append(self._failures.popleft())
+        return failures
+
+    def close(self, timeout: float = 5.0):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._outbox is not None:
+            self._outbox.close()
+            self._outbox = None
+
+    def _run(self):
+        with Outbox(self.path) as outbox, SmtpSender(self.settings, pool_size=1, retries=0) as sender:
+            outbox.recover()
+            while not self._stopping:
+                message = outbox.claim()
+                if message is not None:
+                    self._deliver(outbox, sender, message)
+                    continue
+                due = outbox.next_due()
+                wait = POLL_INTERVAL if due is None else min(POLL_INTERVAL, max(0.0, due - time.time()))
+                self._wake.wait(wait)
+                self._wake.clear()
+
+    def _deliver(self, outbox: Outbox, sender: SmtpSender, row: sqlite3.Row):
+        message = sender.message(row["subject"], row["body"], json.loads(row["recipients"]))
+        # The same Message-ID on every attempt lets a server drop a repeat after a crash
+        message["Message-ID"] = f"<{idempotency_key(row['key'])[:32]}@cq-accountability>"
+        try:
+            sender.send(message)
+        except DeliveryError as e:
+            attempts = row["attempts"] + 1
+            if e.permanent or attempts >= self.max_attempts:
+                outbox.mark_failed(row["id"], str(e))
+                self.failed += 1
+                self._failures.append((row["subject"], str(e)))
+                log.warning(f"Giving up on '{row['subject']}': {e}")
+            else:
+                delay = retry_delay(attempts)
+                outbox.mark_retry(row["id"], str(e), delay)
+                log.info("Sending '%s' failed (%s); retrying in %.1f s.", row["subject"], e, delay)
+            return
+        outbox.mark_sent(row["id"])
+        self.sent += 1
+        log.info("Sent '%s'.", row["subject"])
@@ -1,6 +1,7 @@
-import re
 import logging
-from constants import Constants 
+from logic.models import Person, LateEntry, ShiftReport, snapshot_ui
+from logic.schema import FORM_SCHEMA, FormSchema, LateSectionSpec
+from logic.rooms import ROOM_DIRECTORY, ROOM_FORMAT, normalize_room
 
 
 log = logging.getLogger('app.processing')
@@ -38,23 +39,6 @@ CQ_ROLE_ORDER = [
     "CQ Runner"
 ]
 
-REQUIRED_AL_ROLES = [
-    "AL Cards"
-]
-
-REQUIRED_CQ_ROLES = [
-    "CQ Lead", 
-    "CQ Door Guard"
-]
-
-REQUIRE_SIGNATURE_FIELDS = [
-    "Rank", 
-    "Last", "First", "MI", 
-    "AFSC/Job", 
-    "Squadron"
-]
-
-
 class ValidationException(Exception):
     """Custom exception to hold a list of validation errors."""
     def __init__(self, errors: list[str]):
@@ -64,56 +48,45 @@ class ValidationException(Exception):
 
 def get_mtl_from_room(manor: str, room_number: str) -> str:
     """Parses a manor and room number to find the corresponding MTL."""
-    if not manor or not room_number:
-        return "N/A"
-
-    # 1. Get the first letter of the Manor (F or W)
-    manor_char = manor[0].upper()
-
-    # 2. Get the Bay and Floor from the room number (e.g., C1 from "C116")
-    cleaned_room = room_number.upper().replace(" ", "").replace("-", "")
-    if len(cleaned_room) < 2:
-        return "N/A"
-    bay_and_floor = cleaned_room[:2]
-
-    # 3. Combine them into the key (e.g., "FC1")
-    bay_key = f"{manor_char}{bay_and_floor}"
-    
-    return Constants.bay_mtls.get(bay_key, "<Unknown MTL>")
+    return ROOM_DIRECTORY.mtl_for(manor, room_number)
 
 
-def _validate_room_number(room: str) -> str:
+def _validate_room_number(room: str, manor: str = "") -> str:
     """
     Validates and formats a room number.
     
-    A valid format is a letter (A-C) followed by floor (1-3) and two digits (e.g., 'C116').
+    A valid format is a letter (A-D) followed by floor (1-3) and two digits (e.g., 'C116'),
+    and the bay must exist in the selected manor (or in either manor if none is selected yet).
     """
-    cleaned_room = room.upper().strip().replace(" ", "").replace("-", "")
-    
-    # Pattern: [A-D] [1-3] [0-9]{2}
-    if not re.fullmatch(r"[A-D][1-3]\d{2}", cleaned_room):
-        raise ValidationException(f"Invalid room format: '{room}'. Must be like 'A101', 'B205', etc.")
-        
-    return cleaned_room
+    cleaned_room = normalize_room(room)
+    if manor:
+        if info := ROOM_DIRECTORY.lookup(manor, cleaned_room):
+            return info.room
+    elif ROOM_FORMAT.fullmatch(cleaned_room) and ROOM_DIRECTORY.exists_in_any_manor(cleaned_room):
+        return cleaned_room
+
+    if not ROOM_FORMAT.fullmatch(cleaned_room):
+        raise ValidationException([f"Invalid room format: '{room}'. Must be like 'A101', 'B205', etc."])
+    raise ValidationException([f"Invalid room: '{room}'. Bay {cleaned_room[:2]} does not exist in {manor or 'either manor'}."])
 
 
-def _get_person_data(entries: dict, role_context: str, is_late_entry: bool) -> dict | None:
+def _get_person_data(person: Person, role_context: str) -> Person | None:
     """
-    Extracts, formats, and validates data from a set of person entry widgets.
+    Formats and validates a person taken from a report snapshot.
     
     Returns None if all name/rank fields are empty.
     """
-    rank = entries["Rank"].get()
-    last = entries["Last"].get().strip()
-    first = entries["First"].get().strip()
-    mi = entries["MI"].get().strip()
+    rank = person.rank
+    last = person.last.strip()
+    first = person.first.strip()
+    mi = person.mi.strip()
 
     if not rank and not last and not first and not mi:
         return None
     
     # Validation: If any data is entered, Rank/Last Name are required.
     if not rank or not last:
-        raise ValidationException(f"Missing Rank/Last Name for entry: {role_context}")
+        raise ValidationException([f"Missing Rank/Last Name for entry: {role_context}"])
 
     # Auto-formatting
     last = last.title()
@@ -121,241 +94,262 @@ def _get_person_data(entries: dict, role_context: str, is_late_entry: bool) -> d
     if mi:
         mi = mi[0].upper() # Just take the first character and capitalize
 
-    return {
-        "rank": rank,
-        "last": last,
-        "first": first,
-        "mi": mi,
-    }
+    return Person(rank, last, first, mi)
 
 
-def get_form_data(ui_elements: dict) -> dict:
-    """Gathers all data from the UI widgets into a dictionary and validates inputs."""
-    log.debug("Gathering form data.")
-    data = {"al_team": {}, "cq_team": {}, "red_card_lates": [], "lates": [], "manor": ui_elements["manor"].get()}
-    errors = []
-
-    # Unpack UI elements for clarity
-    al_members = ui_elements["al_members"]
-    cq_members = ui_elements["cq_members"]
-    red_card_lates = ui_elements["red_card_lates"]
-    lates = ui_elements["lates"]
-    notes_vars = ui_elements["notes"]
-    signature = ui_elements["signature"]
-    
-    # 0. Manor selection check
-    if not data["manor"]:
-        errors.append("Please select a Manor (Winters or Fosters).")
-
-    # 1. AL Team
-    for role, entries in al_members.items():
-        try:
-            if person_data := _get_person_data(entries, role, False):
-                data["al_team"][role] = person_data
-        except ValueError as e:
-            errors.append(str(e))
-    
-    for role in REQUIRED_AL_ROLES:
-        if role not in data["al_team"]:
-            errors.append(f"Required: Please fill out **{role}**.")
-
-    # 2. CQ Team
-    for role, entries in cq_members.items():
-        try:
-            if role == "CQ Runner":
-                runner_data = [_get_person_data(runner_set, "CQ Runner", False) for runner_set in entries]
-                data["cq_team"][role] = [r for r in runner_data if r]
+def _get_late_data(person: Person, late: LateEntry, room: str, is_red_card: bool) -> LateEntry:
+    """Combines a formatted person with the late-specific fields of its row."""
+    return LateEntry(
+        person.rank, person.last, person.first, person.mi,
+        room=room,
+        time=late.time,
+        type=late.type if is_red_card else "", # Empty string for Standard Lates
+        reason=late.reason.strip(),
+    )
+
+
+class GatherResult:
+    """
+    Outcome of a single pass over a report snapshot.
+
+    `preview` holds every row that can be shown, even if incomplete. `report`
+    holds only the rows that passed validation and is final once `errors` is
+    empty.
+    """
+    __slots__ = ("preview", "report", "errors")
+
+    def __init__(self, preview: ShiftReport, report: ShiftReport, errors: list[str]):
+        self.preview = preview
+        self.report = report
+        self.errors = errors
+
+    @property
+    def valid(self) -> bool:
+        return not self.errors
+
+
+class FormGatherer:
+    """
+    Walks a report once using FORM_SCHEMA and produces preview data and the
+    full list of validation errors together.
+
+    Per-row results are cached by the row's raw content, so a row is only
+    re-validated after one of its fields is edited. `gather_ui` additionally
+    keeps the last result until `invalidate()` is called by an edit event,
+    so a Check Email click right after a preview does not read the widgets
+    again.
+    """
+
+    # Upper bound on cached row results before the cache is reset
+    MAX_CACHED_ROWS = 4096
+
+    def __init__(self, schema: FormSchema = FORM_SCHEMA):
+        self.schema = schema
+        self._rows = {}
+        self._rooms_version = ROOM_DIRECTORY.version
+        self._result = None
+        # The raw snapshot behind the last `gather_ui` result
+        self.snapshot = None
+        self.row_hits = 0
+        self.row_misses = 0
+
+    @property
+    def dirty(self) -> bool:
+        """True if the next `gather_ui` call has to read the widgets."""
+        return self._result is None
+
+    def invalidate(self, *_args):
+        """Marks the UI as edited. Accepts and ignores event/trace arguments."""
+        self._result = None
+
+    def gather_ui(self, ui_elements: dict) -> GatherResult:
+        """Snapshots the UI (only if it changed since the last call) and gathers it."""
+        if self._result is None:
+            self.snapshot = snapshot_ui(ui_elements)
+            self._result = self.gather(self.snapshot)
+        return self._result
+
+    def gather(self, report: ShiftReport) -> GatherResult:
+        """Formats and validates a raw report snapshot in one pass."""
+        log.debug("Gathering report.")
+        # Cached rooms were validated against the old bay tables
+        if self._rooms_version != ROOM_DIRECTORY.version:
+            self._rows.clear()
+            self._rooms_version = ROOM_DIRECTORY.version
+        preview = ShiftReport(manor=report.manor)
+        valid = ShiftReport(manor=report.manor)
+        errors = []
+
+        # 0. Manor selection check
+        if not report.manor:
+            errors.append("Please select a Manor (Winters or Fosters).")
+
+        # 1. AL Team and CQ Team
+        for team in ("al_team", "cq_team"):
+            self._gather_team(team, getattr(report, team), preview, valid, errors)
+
+        # 2. Lates Sections
+        for spec in self.schema.late_sections:
+            preview_lates = getattr(preview, spec.key)
+            valid_lates = getattr(valid, spec.key)
+            for i, late in enumerate(getattr(report, spec.key)):
+                preview_late, valid_late, row_errors = self._late_row(spec, i, late, report.manor)
+                errors.extend(row_errors)
+                if preview_late:
+                    preview_lates.append(preview_late)
+                if valid_late:
+                    valid_lates.append(valid_late)
+
+        # 3. Notes and Signature (all signature inputs are required)
+        additional_notes = [note.strip() for note in report.additional_notes if note.strip()]
+        signature = {key: value.strip() for key, value in report.signature.items()}
+        for data in (preview, valid):
+            data.cac_scanner_unavailable = report.cac_scanner_unavailable
+            data.on_call_mtl = report.on_call_mtl
+            data.additional_notes = additional_notes
+            data.signature = signature
+
+        missing_fields = [
+            field for field in self.schema.required_signature_fields
+            if not signature.get(field)
+        ]
+        if missing_fields:
+            errors.append(f"Signature section requires all inputs. Missing: {', '.join(missing_fields)}.")
+
+        return GatherResult(preview, valid, errors)
+
+    def _cached_row(self, key: tuple, compute: callable):
+        result = self._rows.get(key)
+        if result is not None:
+            self.row_hits += 1
+            return result
+        self.row_misses += 1
+        if len(self._rows) >= self.MAX_CACHED_ROWS:
+            self._rows.clear()
+        result = self._rows[key] = compute()
+        return result
+
+    def _person(self, person: Person, context: str) -> tuple[Person | None, list[str]]:
+        def compute():
+            try:
+                return _get_person_data(person, context), []
+            except ValidationException as e:
+                return None, e.errors
+        return self._cached_row(("person", context, person.astuple()), compute)
+
+    def _gather_team(self, team: str, members: dict, preview: ShiftReport, valid: ShiftReport, errors: list[str]):
+        preview_team = getattr(preview, team)
+        valid_team = getattr(valid, team)
+        for role, value in members.items():
+            if isinstance(value, list):
+                people = []
+                for person in value:
+                    person_data, person_errors = self._person(person, role)
+                    errors.extend(person_errors)
+                    if person_data:
+                        people.append(person_data)
+                valid_team[role] = people
+                if people:
+                    preview_team[role] = people
             else:
-                if person_data := _get_person_data(entries, role, False):
-                    data["cq_team"][role] = person_data
-        except ValueError as e:
-            errors.append(str(e))
-    
-    for role in REQUIRED_CQ_ROLES:
-        if role not in data["cq_team"]:
-            errors.append(f"Required: Please fill out **{role}**.")
+                person_data, person_errors = self._person(value, role)
+                errors.extend(person_errors)
+                if person_data:
+                    preview_team[role] = valid_team[role] = person_data
 
-    # Check for at least one CQ Runner
-    if not data["cq_team"].get("CQ Runner"):
-        errors.append("Required: Please fill out at least one **CQ Runner**.")
+        roles = self.schema.al_roles if team == "al_team" else self.schema.cq_roles
+        for spec in roles.values():
+            if spec.required and not valid_team.get(spec.role):
+                errors.append(spec.missing_error())
 
+    def _late_row(self, spec: LateSectionSpec, index: int, late: LateEntry, manor: str) -> tuple:
+        context = f"{spec.title} Row {index+1}"
 
-    # 2. Lates Sections
-    for key, entries in [("red_card_lates", red_card_lates), ("lates", lates)]:
-        is_red_card = (key == "red_card_lates")
-        title = "Red-Card Lates" if is_red_card else "Standard Lates"
-        
-        for i, entry_set in enumerate(entries):
-            context = f"{title} Row {i+1}"
+        def compute():
             try:
-                if person_data := _get_person_data(entry_set, context, is_late_entry=True):
-                    late_data = person_data.copy()
-                    
-                    # Get and validate Room
-                    raw_room = entry_set["Room"].get()
-                    late_data["room"] = _validate_room_number(raw_room)
-                    
-                    # Check for other required fields
-                    missing_fields = []
-                    if not entry_set["Time"].get(): missing_fields.append("Time")
-                    if not entry_set["Reason"].get(): missing_fields.append("Reason")
-                    
-                    late_type = ""
-                    if is_red_card:
-                        # For Red-Card Lates, 'Type/Late To' is required and collected
-                        late_type = entry_set["Type"].get()
-                        if not late_type:
-                            missing_fields.append("Type/Late To")
-                    
-                    if missing_fields:
-                        errors.append(f"{context}: Missing required field(s): {', '.join(missing_fields)}")
-                        continue
-                        
-                    late_data.update({
-                        "time": entry_set["Time"].get(),
-                        "type": late_type, # Empty string for Standard Lates
-                        "reason": entry_set["Reason"].get().strip(),
-                    })
-                    data[key].append(late_data)
-            except ValueError as e:
-                # Only append the error if data was partially entered
-                if not entry_set["Rank"].get() and not entry_set["Last"].get():
-                     continue 
-                errors.append(str(e))
-
-
-    # 3. Notes and Signature (all signature inputs now required)
-    data["notes"] = {
-        "cac_scanner_unavailable": notes_vars["cac_scanner"].get(),
-        "on_call_mtl": notes_vars["on_call_mtl"].get(),
-        "additional_notes": [note.get().strip() for note in notes_vars["additional_notes"] if note.get().strip()],
-    }
-    
-    data["signature"] = {key: widget.get().strip() for key, widget in signature.items()}
-    
-    missing_fields = [
-        field for field in REQUIRE_SIGNATURE_FIELDS 
-        if not data["signature"].get(field)
-    ]
-    
-    if missing_fields:
-        errors.append(f"Signature section requires all inputs. Missing: {', '.join(missing_fields)}.")
+                person_data = _get_person_data(late, context)
+            except ValidationException as e:
+                return None, None, e.errors
+            if not person_data:
+                return None, None, []
+
+            # Invalid rooms are still shown in the preview as typed
+            try:
+                room = _validate_room_number(late.room, manor)
+                room_errors = []
+            except ValidationException as e:
+                room = late.room
+                room_errors = e.errors
+            preview_late = _get_late_data(person_data, late, room, spec.has_type)
+            if room_errors:
+                return preview_late, None, room_errors
+
+            missing_fields = [label for attr, label in spec.required_fields if not getattr(late, attr)]
+            if missing_fields:
+                return preview_late, None, [f"{context}: Missing required field(s): {', '.join(missing_fields)}"]
+            return preview_late, preview_late, []
+
+        return self._cached_row((spec.key, index, manor, late.astuple()), compute)
+
+
+def validate_report(report: ShiftReport) -> ShiftReport:
+    """Validates a raw report snapshot and returns the formatted report. Raises ValidationException."""
+    return _validated(FormGatherer().gather(report))
+
+
+def preview_report(report: ShiftReport) -> ShiftReport:
+    """
+    Formats a raw report snapshot for preview purposes, ignoring validation errors.
+    Returns partial data even if some fields are incomplete.
+    """
+    return FormGatherer().gather(report).preview
 
-    # Raise all collected errors
-    if errors:
-        log.error(f"Validation failed with {len(errors)} errors.")
-        raise ValidationException(errors)
 
+def _validated(result: GatherResult) -> ShiftReport:
+    if result.errors:
+        log.error("Validation failed with %d errors.", len(result.errors))
+        raise ValidationException(list(result.errors))
     log.debug("Finished gathering and validating form data.")
-    return data
+    return result.report
+
+
+def get_form_data(ui_elements: dict, gatherer: FormGatherer | None = None) -> ShiftReport:
+    """
+    Gathers all data from the UI widgets into a report and validates inputs.
+
+    The widgets are always read again, even with a `gatherer`: edits such as
+    a mouse paste fire no event, so its cached result may be stale. Its
+    per-row cache is still reused.
+    """
+    log.debug("Gathering form data.")
+    gatherer = gatherer or FormGatherer()
+    gatherer.invalidate()
+    return _validated(gatherer.gather_ui(ui_elements))
 
 
-def get_form_data_for_preview(ui_elements: dict) -> dict:
+def get_form_data_for_preview(ui_elements: dict, gatherer: FormGatherer | None = None) -> ShiftReport:
     """
     Gathers form data for preview purposes, ignoring validation errors.
     Returns partial data even if some fields are incomplete.
     """
     log.debug("Gathering form data for preview.")
-    data = {"al_team": {}, "cq_team": {}, "red_card_lates": [], "lates": [], "manor": ui_elements["manor"].get()}
-
-    # Unpack UI elements for clarity
-    al_members = ui_elements["al_members"]
-    cq_members = ui_elements["cq_members"]
-    red_card_lates = ui_elements["red_card_lates"]
-    lates = ui_elements["lates"]
-    notes_vars = ui_elements["notes"]
-    signature = ui_elements["signature"]
-    
-    # 1. AL Team - ignore validation errors
-    for role, entries in al_members.items():
-        try:
-            if person_data := _get_person_data(entries, role, False):
-                data["al_team"][role] = person_data
-        except:
-            pass
-
-    # 2. CQ Team - ignore validation errors
-    for role, entries in cq_members.items():
-        try:
-            if role == "CQ Runner":
-                runner_data = []
-                for runner_set in entries:
-                    try:
-                        if person_data := _get_person_data(runner_set, "CQ Runner", False):
-                            runner_data.append(person_data)
-                    except:
-                        pass
-                if runner_data:
-                    data["cq_team"][role] = runner_data
-            else:
-                try:
-                    if person_data := _get_person_data(entries, role, False):
-                        data["cq_team"][role] = person_data
-                except:
-                    pass
-        except:
-            pass
-
-    # 2. Lates Sections - ignore validation errors
-    for key, entries in [("red_card_lates", red_card_lates), ("lates", lates)]:
-        is_red_card = (key == "red_card_lates")
-        
-        for entry_set in entries:
-            try:
-                if person_data := _get_person_data(entry_set, "", is_late_entry=True):
-                    late_data = person_data.copy()
-                    
-                    # Get room, time, reason - use what's available
-                    raw_room = entry_set["Room"].get()
-                    if raw_room:
-                        try:
-                            late_data["room"] = _validate_room_number(raw_room)
-                        except:
-                            late_data["room"] = raw_room  # Use raw value if validation fails
-                    else:
-                        late_data["room"] = ""
-                    
-                    late_data["time"] = entry_set["Time"].get()
-                    late_data["reason"] = entry_set["Reason"].get().strip()
-                    
-                    if is_red_card:
-                        late_data["type"] = entry_set["Type"].get()
-                    else:
-                        late_data["type"] = ""
-                        
-                    data[key].append(late_data)
-            except:
-                pass
-
-    # 3. Notes and Signature
-    data["notes"] = {
-        "cac_scanner_unavailable": notes_vars["cac_scanner"].get(),
-        "on_call_mtl": notes_vars["on_call_mtl"].get(),
-        "additional_notes": [note.get().strip() for note in notes_vars["additional_notes"] if note.get().strip()],
-    }
-    
-    data["signature"] = {key: widget.get().strip() for key, widget in signature.items()}
+    return (gatherer or FormGatherer()).gather_ui(ui_elements).preview
 
-    return data
 
-
-def _format_person(person_data: dict) -> str | None:
+def _format_person(person: Person) -> str | None:
     """Formats a person's data into a 'Rank Last, First MI' string."""
-    if not person_data or not person_data.get("rank"):
+    if not person or not person.rank:
         return None
-    rank = RANK_MAPPINGS.get(person_data["rank"], "")
-    name_part = f"{person_data.get('last', '')}, {person_data.get('first', '')}"
-    if mi := person_data.get("mi"):
+    rank = RANK_MAPPINGS.get(person.rank, "")
+    name_part = f"{person.last}, {person.first}"
+    if mi := person.mi:
         name_part += f" {mi}" # Add a period for middle initial
     return f"{rank} {name_part.strip()}"
 
 
-def format_email_body(data: dict) -> str:
-    """Formats the collected data into the final email body string."""
-    log.debug("Formatting email body.")
+def _format_team_section(al_team: dict, cq_team: dict) -> list[str]:
+    """Formats the combined AL/CQ team block (AL Team + CQ Team in order)."""
     parts = []
-    
-    # Combined Team Display (AL Team + CQ Team in order)
     for role in CQ_ROLE_ORDER:
         if role is None:
             # Add a separator only if there's content and it doesn't already end with a separator
@@ -364,7 +358,7 @@ def format_email_body(data: dict) -> str:
             continue
         
         # Check AL team first, then CQ team
-        role_data = data["al_team"].get(role) or data["cq_team"].get(role)
+        role_data = al_team.get(role) or cq_team.get(role)
         
         # Special handling for roles that should always appear even if empty
         if role in ["AL Cards", "CQ Lead", "CQ Door Guard", "CQ Runner"]:
@@ -392,64 +386,65 @@ def format_email_body(data: dict) -> str:
                     parts.append(f"{display_role}: {person_str}")
         elif person_str := _format_person(role_data):
             parts.append(f"{display_role}: {person_str}")
+    return parts
 
-    # Lates Sections
-    manor = data["manor"]
+
+def _format_red_card_late(manor: str, entry: LateEntry) -> str:
+    """Formats a single Red-Card Late line."""
+    person_str = _format_person(entry)
+    bay_mtl = get_mtl_from_room(manor, entry.room)
     
-    # 1. Red-Card Lates (MUST always be present, showing - N/A if empty)
-    parts.append(f"\nRed-Card Lates:")
-    if late_entries := data.get("red_card_lates"):
-        for entry in late_entries:
-            person_str = _format_person(entry)
-            bay_mtl = get_mtl_from_room(manor, entry['room'])
-            
-            # Format the type field - change "Both" to "Sign-in & Turn-in"
-            type_text = entry['type']
-            if type_text == "Both":
-                type_text = "Sign-in & Turn-in"
-            
-            # Handle empty reason
-            reason = entry['reason'].strip() if entry['reason'] else "No reason provided"
-            
-            parts.append(f"- {person_str} - {entry['room']} - {bay_mtl} - Missed {entry['time']} {type_text} - {reason}")
-    else:
-        parts.append("- N/A")
+    # Format the type field - change "Both" to "Sign-in & Turn-in"
+    type_text = entry.type
+    if type_text == "Both":
+        type_text = "Sign-in & Turn-in"
+    
+    # Handle empty reason
+    reason = entry.reason.strip() if entry.reason else "No reason provided"
+    
+    return f"- {person_str} - {entry.room} - {bay_mtl} - Missed {entry.time} {type_text} - {reason}"
 
-    # 2. Standard Lates (MUST always be present, showing - N/A if empty)
-    parts.append(f"\nLates:")
-    if late_entries := data.get("lates"):
-        for entry in late_entries:
-            person_str = _format_person(entry)
-            bay_mtl = get_mtl_from_room(manor, entry['room'])
-            
-            # Type is guaranteed to be an empty string for standard lates, so we omit it from the output
-            # 'type_info' is only included if it has a value (e.g., from Red-Card Lates in the future)
-            type_info = f" {entry['type']}" if entry.get('type') else ""
-            
-            # Handle empty reason
-            reason = entry['reason'].strip() if entry['reason'] else "No reason provided"
-            
-            parts.append(f"- {person_str} - {entry['room']} - {bay_mtl} - Missed {entry['time']}{type_info} - {reason}")
-    else:
-        parts.append("- N/A")
-        
-    # Notes (MUST always be present, showing - N/A if empty)
-    parts.append("\nNotes:")
-    notes_data = data["notes"]
+
+def _format_standard_late(manor: str, entry: LateEntry) -> str:
+    """Formats a single Standard Late line."""
+    person_str = _format_person(entry)
+    bay_mtl = get_mtl_from_room(manor, entry.room)
+    
+    # Type is guaranteed to be an empty string for standard lates, so we omit it from the output
+    # 'type_info' is only included if it has a value (e.g., from Red-Card Lates in the future)
+    type_info = f" {entry.type}" if entry.type else ""
+    
+    # Handle empty reason
+    reason = entry.reason.strip() if entry.reason else "No reason provided"
+    
+    return f"- {person_str} - {entry.room} - {bay_mtl} - Missed {entry.time}{type_info} - {reason}"
+
+
+def _format_lates_section(header: str, lines: list[str]) -> list[str]:
+    """Wraps formatted late lines in their header (MUST always be present, showing - N/A if empty)."""
+    return [f"\n{header}:", *(lines or ["- N/A"])]
+
+
+def _format_notes_section(cac_scanner_unavailable: bool, on_call_mtl: str, additional_notes: list[str]) -> list[str]:
+    """Formats the Notes block (MUST always be present, showing - N/A if empty)."""
+    parts = ["\nNotes:"]
     notes_content = []
-    if notes_data["cac_scanner_unavailable"]:
+    if cac_scanner_unavailable:
         notes_content.append("- CAC System Non-Operational: Manual Accountability Used.")
-    if on_call_mtl := notes_data["on_call_mtl"]:
+    if on_call_mtl:
         notes_content.append(f"- On-Call MTL: {on_call_mtl}")
-    notes_content.extend([f"- {note}" for note in notes_data["additional_notes"]])
+    notes_content.extend([f"- {note}" for note in additional_notes])
     
     if notes_content:
         parts.extend(notes_content)
     else:
         parts.append("- N/A")
+    return parts
+
 
-    # Signature
-    sig = data["signature"]
+def _format_signature_section(sig: dict) -> list[str]:
+    """Formats the signature block, or nothing if the signature is empty."""
+    parts = []
     if any(sig.values()):
         parts.append("\n\nV/r")
         rank_short = RANK_MAPPINGS.get(sig["Rank"], "")
@@ -466,7 +461,96 @@ def format_email_body(data: dict) -> str:
         if sig["Squadron"]:
             parts.append(f"{sig['Squadron']} Training Squadron")
         parts.append("Keesler AFB, MS")
+    return parts
+
+
+def _freeze(value):
+    """Converts nested dicts/lists/models into hashable tuples for use as cache keys."""
+    if isinstance(value, Person):
+        return (type(value), value.astuple())
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
 
-    final_body = "\n".join(parts)
+class EmailRenderer:
+    """
+    Renders the email body section by section, caching each section.
+
+    The body is split into the team block, red-card lates, standard lates,
+    notes and signature. Each section is keyed by a frozen copy of its inputs
+    and only re-rendered when that key changes. Individual late lines are
+    cached as well, so editing one Reason field only re-formats that row.
+    """
+
+    # Upper bound on cached late lines before the row cache is reset
+    MAX_CACHED_LINES = 4096
+
+    def __init__(self):
+        self._sections = {}
+        self._late_lines = {}
+        self._rooms_version = ROOM_DIRECTORY.version
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Drops every cached section and late line."""
+        self._sections.clear()
+        self._late_lines.clear()
+
+    def render(self, data: ShiftReport | dict) -> str:
+        """Formats the collected data into the final email body string."""
+        if isinstance(data, dict):
+            data = ShiftReport.from_dict(data)
+        # Cached late lines carry MTLs from the old bay tables
+        if self._rooms_version != ROOM_DIRECTORY.version:
+            self.clear()
+            self._rooms_version = ROOM_DIRECTORY.version
+        manor = data.manor
+        notes = (data.cac_scanner_unavailable, data.on_call_mtl, data.additional_notes)
+        parts = [
+            *self._section("team", (data.al_team, data.cq_team), _format_team_section),
+            *self._section("red_card_lates", (manor, data.red_card_lates), self._format_red_card_lates),
+            *self._section("lates", (manor, data.lates), self._format_standard_lates),
+            *self._section("notes", notes, _format_notes_section),
+            *self._section("signature", (data.signature,), _format_signature_section),
+        ]
+        return "\n".join(parts)
+
+    def _section(self, name: str, inputs: tuple, formatter: callable) -> list[str]:
+        key = _freeze(inputs)
+        cached = self._sections.get(name)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        lines = formatter(*inputs)
+        self._sections[name] = (key, lines)
+        return lines
+
+    def _late_line(self, formatter: callable, manor: str, entry: LateEntry) -> str:
+        key = (formatter, manor, _freeze(entry))
+        line = self._late_lines.get(key)
+        if line is None:
+            if len(self._late_lines) >= self.MAX_CACHED_LINES:
+                self._late_lines.clear()
+            line = self._late_lines[key] = formatter(manor, entry)
+        return line
+
+    def _format_red_card_lates(self, manor: str, entries: list[LateEntry]) -> list[str]:
+        lines = [self._late_line(_format_red_card_late, manor, entry) for entry in entries]
+        return _format_lates_section("Red-Card Lates", lines)
+
+    def _format_standard_lates(self, manor: str, entries: list[LateEntry]) -> list[str]:
+        lines = [self._late_line(_format_standard_late, manor, entry) for entry in entries]
+        return _format_lates_section("Lates", lines)
+
+
+def format_email_body(data: ShiftReport | dict) -> str:
+    """Formats a report (or its `to_dict` layout) into the final email body string."""
+    log.debug("Formatting email body.")
+    final_body = EmailRenderer().render(data)
     log.debug("Email body formatted successfully.")
     return final_body
@@ -0,0 +1,224 @@
+"""
+Red-card ledger: which holders signed in and turned in at each window.
+
+Each window in `Constants.redcard_late_times` has two bitsets over the
+holders, kept as plain ints: bit i of `signed_in[w]` is set once holder i
+signed in at window w, and likewise `turned_in[w]`. `active` has a bit
+for every trainee currently holding a red card, and `checked[w]` one for
+every holder due at window w (only windows that were not over yet when
+the card was handed out, and a released card stays due at the windows
+that were already over). "Who missed window w" is a few integer
+operations for the whole manor, and the ledger for a shift is
+a couple of hundred bytes besides the holders themselves.
+"""
+import os
+import json
+import logging
+from datetime import date, datetime
+from constants import Constants
+from logic.aggregator import shift_date
+from logic.fuzzy import person_key
+from logic.models import LateEntry, Person
+from logic.roster import RosterEntry
+from logic.scans import RED_CARD_LATE_MINUTES, shift_minute
+from utils import user_data_path
+
+
+log = logging.getLogger('app.redcard')
+
+
+LEDGER_PATH = user_data_path("red_cards.json")
+
+SIGN_IN, TURN_IN, BOTH = Constants.redcard_late_types
+
+
+def _positions(mask: int):
+    """Yields the indexes of the set bits of `mask`, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class RedCardLedger:
+    """
+    Sign-in and turn-in checks of the red-card holders of one shift.
+
+    Holders keep their bit position for the whole shift, also after their
+    card is released, so the checks already made stay attached to them.
+    `version` goes up with every change. `lates_added` holds the
+    (last, first, window) of every late already put in the form, so each
+    one is added only once, also across restarts.
+    """
+
+    def __init__(self, shift_day: date | None = None, windows: list[str] = Constants.redcard_late_times):
+        self.shift_day = shift_day or shift_date()
+        self.windows = list(windows)
+        self.holders = []
+        self.active = 0
+        self.checked = [0] * len(self.windows)
+        self.signed_in = [0] * len(self.windows)
+        self.turned_in = [0] * len(self.windows)
+        self.lates_added = set()
+        self.version = 0
+        self._positions = {}
+
+    def __len__(self):
+        return self.active.bit_count()
+
+    def __contains__(self, person: Person):
+        position = self._positions.get(person_key(person))
+        return position is not None and bool(self.active >> position & 1)
+
+    def _bit(self, person: Person) -> int:
+        position = self._positions.get(person_key(person))
+        if position is None:
+            raise ValueError(f"{person.last}, {person.first} does not hold a red card.")
+        return 1 << position
+
+    def _window(self, window: str) -> int:
+        try:
+            return self.windows.index(window)
+        except ValueError:
+            raise ValueError(f"Red-card window must be one of {', '.join(self.windows)}.") from None
+
+    def active_holders(self) -> list[RosterEntry]:
+        return [self.holders[position] for position in _positions(self.active)]
+
+    def add_holder(self, person: Person, now: datetime | None = None) -> RosterEntry:
+        """
+        Adds a red-card holder (or re-activates a released one) and returns
+        their entry. They are due at the windows that are not over yet.
+        """
+        key = person_key(person)
+        position = self._positions.get(key)
+        if position is None:
+            entry = person if isinstance(person, RosterEntry) else RosterEntry(
+                person.rank, person.last, person.first, person.mi, getattr(person, "room", "")
+            )
+            position = self._positions[key] = len(self.holders)
+            self.holders.append(entry)
+        bit = 1 << position
+        due = set(self.due_windows(now))
+        self.active |= bit
+        self.checked = [
+            checked if window in due else checked | bit for window, checked in zip(self.windows, self.checked)
+        ]
+        self.version += 1
+        return self.holders[position]
+
+    def release(self, person: Person, now: datetime | None = None):
+        """The trainee no longer holds a red card; they are not checked at windows that are not over yet."""
+        bit = self._bit(person)
+        due = set(self.due_windows(now))
+        self.active &= ~bit
+        self.checked = [
+            checked if window in due else checked & ~bit for window, checked in zip(self.windows, self.checked)
+        ]
+        self.version += 1
+
+    def mark(self, person: Person, window: str, signed_in: bool | None = None, turned_in: bool | None = None):
+        """Records (True) or clears (False) a sign-in and/or turn-in; None leaves it as it is."""
+        bit, index = self._bit(person), self._window(window)
+        if signed_in is not None:
+            self.signed_in[index] = self.signed_in[index] | bit if signed_in else self.signed_in[index] & ~bit
+        if turned_in is not None:
+            self.turned_in[index] = self.turned_in[index] | bit if turned_in else self.turned_in[index] & ~bit
+        self.version += 1
+
+    def checks(self, person: Person) -> list[tuple[bool, bool]]:
+        """(signed in, turned in) for each window."""
+        position = self._bit(person).bit_length() - 1
+        return [
+            (bool(signed >> position & 1), bool(turned >> position & 1))
+            for signed, turned in zip(self.signed_in, self.turned_in)
+        ]
+
+    def missed(self, window: str) -> list[tuple[RosterEntry, str]]:
+        """Holders due at `window` who missed part of it, with the red-card late type, in holder order."""
+        index = self._window(window)
+        signed, turned = self.signed_in[index], self.turned_in[index]
+        missed = []
+        for position in _positions(self.checked[index] & ~(signed & turned)):
+            if signed >> position & 1:
+                late_type = TURN_IN
+            else:
+                late_type = SIGN_IN if turned >> position & 1 else BOTH
+            missed.append((self.holders[position], late_type))
+        return missed
+
+    def due_windows(self, now: datetime | None = None) -> list[str]:
+        """Windows that are over (including the grace period) at `now`."""
+        now = now or datetime.now()
+        day = shift_date(now)
+        if day != self.shift_day:
+            return list(self.windows) if day > self.shift_day else []
+        minute = shift_minute(f"{now:%H%M}")
+        return [window for window in self.windows if shift_minute(window) + RED_CARD_LATE_MINUTES <= minute]
+
+    def late_entries(self, now: datetime | None = None) -> list[LateEntry]:
+        """Red-card late rows for every missed window that is over, by window and then holder."""
+        return [
+            LateEntry(holder.rank, holder.last, holder.first, holder.mi, holder.room, window, late_type, "")
+            for window in self.due_windows(now)
+            for holder, late_type in self.missed(window)
+        ]
+
+    def new_late_entries(self, now: datetime | None = None) -> list[LateEntry]:
+        """The `late_entries` not handed out before; they are remembered in `lates_added`."""
+        lates = [
+            late for late in self.late_entries(now) if (late.last, late.first, late.time) not in self.lates_added
+        ]
+        if lates:
+            self.lates_added.update((late.last, late.first, late.time) for late in lates)
+            self.version += 1
+        return lates
+
+    def to_dict(self) -> dict:
+        return {
+            "shift_day": self.shift_day.isoformat(),
+            "windows": self.windows,
+            "holders": [holder.to_dict() for holder in self.holders],
+            "active": self.active,
+            "checked": self.checked,
+            "signed_in": self.signed_in,
+            "turned_in": self.turned_in,
+            "lates_added": sorted(self.lates_added),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RedCardLedger":
+        ledger = cls(date.fromisoformat(data["shift_day"]), data["windows"])
+        for holder in data["holders"]:
+            ledger.add_holder(RosterEntry.from_dict(holder))
+        ledger.active = int(data["active"])
+        ledger.checked = [int(bits) for bits in data["checked"]]
+        ledger.signed_in = [int(bits) for bits in data["signed_in"]]
+        ledger.turned_in = [int(bits) for bits in data["turned_in"]]
+        ledger.lates_added = {tuple(late) for late in data.get("lates_added", ())}
+        ledger.version = 0
+        return ledger
+
+    def save(self, path: str = LEDGER_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_path, path)
+
+
+def load_ledger(path: str = LEDGER_PATH, shift_day: date | None = None) -> RedCardLedger:
+    """The saved ledger if it is for this shift, otherwise a new one."""
+    shift_day = shift_day or shift_date()
+    try:
+        with open(path, encoding="utf-8") as f:
+            ledger = RedCardLedger.from_dict(json.load(f))
+    except FileNotFoundError:
+        return RedCardLedger(shift_day)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        log.warning(f"Failed to load red-card ledger: {e}")
+        return RedCardLedger(shift_day)
+    if ledger.shift_day != shift_day or ledger.windows != Constants.redcard_late_times:
+        log.info(f"Starting a new red-card ledger for {shift_day}.")
+        return RedCardLedger(shift_day)
+    return ledger
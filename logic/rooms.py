@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+from constants import Constants
+from utils import user_data_path
+
+
+log = logging.getLogger('app.rooms')
+
+
+# Rooms are numbered 00-99 on every bay/floor (e.g. C100 - C199)
+ROOMS_PER_FLOOR = 100
+
+ROOM_FORMAT = re.compile(r"[A-D][1-3]\d{2}")
+
+# Manor initial, bay letter and floor (e.g. 'FC2')
+BAY_KEY_FORMAT = re.compile(r"[A-Z][A-D][1-3]")
+
+# Optional override of the bay/MTL tables in Constants, edited without a rebuild
+ROOM_CONFIG_PATH = user_data_path("bays.json")
+
+# Seconds between checks of the config file's modification time
+CONFIG_CHECK_INTERVAL = 2.0
+
+
+class RoomInfo:
+    """A single existing room and the MTL responsible for its bay."""
+    __slots__ = ("manor", "bay_key", "room", "mtl")
+
+    def __init__(self, manor: str, bay_key: str, room: str, mtl: str):
+        self.manor = manor
+        self.bay_key = bay_key
+        self.room = room
+        self.mtl = mtl
+
+    def __repr__(self):
+        return f"RoomInfo({self.manor!r}, {self.bay_key!r}, {self.room!r}, {self.mtl!r})"
+
+
+def normalize_room(room: str) -> str:
+    """Uppercases a room number and strips spaces and dashes ('c-116' -> 'C116')."""
+    return room.upper().strip().replace(" ", "").replace("-", "")
+
+
+class RoomDirectory:
+    """
+    Every valid manor/bay/floor/room, enumerated once from `bay_mtls`.
+
+    Validation and MTL lookup are a single dictionary lookup. Bays without a
+    `bay_mtls` entry (FD1, WD1) do not exist; bays that exist but have no MTL
+    assigned yet ("N/A") are valid rooms whose MTL is "N/A". The bays of each
+    manor and of each MTL are indexed as well.
+    """
+
+    def __init__(self, bay_mtls: dict[str, str], manor_options: list[str], on_call_mtls: list[str] = ()):
+        manors = {manor[0].upper(): manor for manor in manor_options}
+        self.manor_options = list(manor_options)
+        self.on_call_mtls = list(on_call_mtls)
+        self.bay_mtls = dict(bay_mtls)
+        self.bays_by_manor = {manor: [] for manor in manor_options}
+        self.bays_by_mtl = {}
+        self._manor_chars = {bay_key[0] for bay_key in bay_mtls}
+        self._rooms = {}
+        for bay_key, mtl in bay_mtls.items():
+            manor_char, bay_and_floor = bay_key[0], bay_key[1:]
+            manor = manors.get(manor_char, manor_char)
+            self.bays_by_manor.setdefault(manor, []).append(bay_key)
+            self.bays_by_mtl.setdefault(mtl, []).append(bay_key)
+            for number in range(ROOMS_PER_FLOOR):
+                room = f"{bay_and_floor}{number:02d}"
+                self._rooms[(manor_char, room)] = RoomInfo(manor, bay_key, room, mtl)
+        log.debug(f"Room directory built with {len(self._rooms)} rooms in {len(bay_mtls)} bays.")
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def bays_in(self, manor: str) -> list[str]:
+        """Bay keys of a manor, e.g. ['WA1', 'WB1', ...]."""
+        return self.bays_by_manor.get(manor, [])
+
+    def bays_for(self, mtl: str) -> list[str]:
+        """Bay keys assigned to an MTL; 'N/A' gives the bays still without one."""
+        return self.bays_by_mtl.get(mtl, [])
+
+    def lookup(self, manor: str, room: str) -> RoomInfo | None:
+        """Returns the room in the given manor, or None if it does not exist."""
+        if not manor or not room:
+            return None
+        info = self._rooms.get((manor[0].upper(), room))
+        if info is None:
+            info = self._rooms.get((manor[0].upper(), normalize_room(room)))
+        return info
+
+    def exists_in_any_manor(self, room: str) -> bool:
+        """True if the room exists in at least one manor (used before a manor is picked)."""
+        room = normalize_room(room)
+        return any((manor_char, room) in self._rooms for manor_char in self._manor_chars)
+
+    def mtl_for(self, manor: str, room_number: str) -> str:
+        """
+        Returns the MTL for a room.
+
+        Rooms that are not fully valid still resolve by their first two
+        characters (bay and floor), so partially typed rooms show an MTL in
+        the preview.
+        """
+        if not manor or not room_number:
+            return "N/A"
+        if info := self.lookup(manor, room_number):
+            return info.mtl
+
+        cleaned_room = room_number.upper().replace(" ", "").replace("-", "")
+        if len(cleaned_room) < 2:
+            return "N/A"
+        return self.bay_mtls.get(f"{manor[0].upper()}{cleaned_room[:2]}", "<Unknown MTL>")
+
+    def resolve_many(self, manors, rooms) -> list[str]:
+        """
+        Resolves many rooms to MTLs in one call, in input order.
+
+        `manors` is a single manor name or one per room. Each distinct
+        (manor, room) pair is only looked up once.
+        """
+        rooms = list(rooms)
+        manors = [manors] * len(rooms) if isinstance(manors, str) else list(manors)
+        if len(manors) != len(rooms):
+            raise ValueError("resolve_many needs one manor per room.")
+        pairs = list(zip(manors, rooms))
+        mtls = {pair: self.mtl_for(*pair) for pair in dict.fromkeys(pairs)}
+        return [mtls[pair] for pair in pairs]
+
+
+def default_room_config() -> dict:
+    """The tables built into Constants, in the layout of the config file."""
+    return {
+        "manors": list(Constants.manor_options),
+        "on_call_mtls": list(Constants.on_call_mtls),
+        "bay_mtls": dict(Constants.bay_mtls),
+    }
+
+
+def load_room_config(path: str) -> RoomDirectory:
+    """
+    Builds a directory from a JSON config file.
+
+    Keys missing from the file fall back to Constants. Raises OSError or
+    ValueError if the file cannot be read or is malformed.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError("expected a JSON object")
+    defaults = default_room_config()
+    manors = config.get("manors", defaults["manors"])
+    on_call_mtls = config.get("on_call_mtls", defaults["on_call_mtls"])
+    bay_mtls = config.get("bay_mtls", defaults["bay_mtls"])
+    if not isinstance(bay_mtls, dict) or not all(isinstance(mtl, str) for mtl in bay_mtls.values()):
+        raise ValueError("'bay_mtls' must map bay keys to MTL names")
+    bad_keys = [key for key in bay_mtls if not BAY_KEY_FORMAT.fullmatch(key)]
+    if bad_keys:
+        raise ValueError(f"invalid bay key(s): {', '.join(bad_keys)} (expected e.g. 'FC2')")
+    for name, names in (("manors", manors), ("on_call_mtls", on_call_mtls)):
+        if not isinstance(names, list) or not all(isinstance(item, str) and item.strip() for item in names):
+            raise ValueError(f"'{name}' must be a list of non-empty names")
+    return RoomDirectory(bay_mtls, manors, on_call_mtls)
+
+
+class ReloadingRoomDirectory:
+    """
+    A RoomDirectory that follows its config file.
+
+    Lookups are passed through to the current directory. The file's
+    modification time is checked at most every `check_interval` seconds, so
+    lookups stay dictionary lookups; a changed file is reloaded and bumps
+    `version`, which caches built on room data compare against. Without a
+    config file the tables in Constants are used; a broken file is logged
+    and the last good tables are kept.
+    """
+
+    def __init__(self, path: str = ROOM_CONFIG_PATH, check_interval: float = CONFIG_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._version = 0
+        self._mtime = None
+        self._next_check = 0.0
+        self._directory = RoomDirectory(**self._defaults())
+        self.reload_if_changed()
+
+    @staticmethod
+    def _defaults() -> dict:
+        config = default_room_config()
+        return {"bay_mtls": config["bay_mtls"], "manor_options": config["manors"], "on_call_mtls": config["on_call_mtls"]}
+
+    def __len__(self):
+        return len(self.current())
+
+    def lookup(self, manor: str, room: str) -> RoomInfo | None:
+        return self.current().lookup(manor, room)
+
+    def exists_in_any_manor(self, room: str) -> bool:
+        return self.current().exists_in_any_manor(room)
+
+    def mtl_for(self, manor: str, room_number: str) -> str:
+        return self.current().mtl_for(manor, room_number)
+
+    def resolve_many(self, manors, rooms) -> list[str]:
+        return self.current().resolve_many(manors, rooms)
+
+    def bays_in(self, manor: str) -> list[str]:
+        return self.current().bays_in(manor)
+
+    def bays_for(self, mtl: str) -> list[str]:
+        return self.current().bays_for(mtl)
+
+    @property
+    def bay_mtls(self) -> dict[str, str]:
+        return self.current().bay_mtls
+
+    @property
+    def bays_by_mtl(self) -> dict[str, list[str]]:
+        return self.current().bays_by_mtl
+
+    @property
+    def manor_options(self) -> list[str]:
+        return self.current().manor_options
+
+    @property
+    def on_call_mtls(self) -> list[str]:
+        return self.current().on_call_mtls
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever the tables are replaced."""
+        self.current()
+        return self._version
+
+    def current(self) -> RoomDirectory:
+        if time.monotonic() >= self._next_check:
+            self.reload_if_changed()
+        return self._directory
+
+    def reload_if_changed(self) -> bool:
+        """Reloads the tables if the config file changed. Returns True if they were replaced."""
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+
+        if mtime is None:
+            directory = RoomDirectory(**self._defaults())
+            log.info("Bay config %s removed; using built-in MTL assignments.", self.path)
+        else:
+            try:
+                directory = load_room_config(self.path)
+            except (OSError, ValueError) as e:
+                log.warning(f"Ignoring bay config {self.path}: {e}")
+                return False
+            log.info("Loaded bay config from %s (%d bays).", self.path, len(directory.bay_mtls))
+        self._directory = directory
+        self._version += 1
+        return True
+
+
+ROOM_DIRECTORY = ReloadingRoomDirectory()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Show or export the bay/MTL assignments.")
+    parser.add_argument("--config", default=ROOM_CONFIG_PATH, help="Config file to read or write.")
+    parser.add_argument("--export", action="store_true", help="Write the built-in tables to the config file to edit them.")
+    args = parser.parse_args(argv)
+
+    if args.export:
+        if os.path.exists(args.config):
+            print(f"{args.config} already exists; not overwriting it.", file=sys.stderr)
+            return 1
+        os.makedirs(os.path.dirname(args.config) or ".", exist_ok=True)
+        with open(args.config, "w", encoding="utf-8") as f:
+            json.dump(default_room_config(), f, indent=4)
+        print(f"Wrote {args.config}")
+        return 0
+
+    directory = ReloadingRoomDirectory(args.config)
+    print(f"Config: {args.config}" + ("" if os.path.exists(args.config) else " (not found, built-in tables)"))
+    for manor in directory.manor_options:
+        print(f"{manor}: {', '.join(directory.bays_in(manor)) or '-'}")
+    for mtl, bays in sorted(directory.bays_by_mtl.items()):
+        print(f"  {mtl:<20} {', '.join(bays)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import csv
+import logging
+from bisect import bisect_left
+from constants import Constants
+from logic.models import Person
+from logic.rooms import normalize_room
+from utils import user_data_path
+
+
+log = logging.getLogger('app.roster')
+
+
+# The last imported roster, loaded again at startup
+ROSTER_PATH = user_data_path("roster.csv")
+
+# Completions offered at once
+MAX_COMPLETIONS = 8
+
+# Header aliases, lowercased, for each roster field
+COLUMN_ALIASES = {
+    "rank": ("rank", "grade"),
+    "last": ("last", "last name", "lastname", "surname"),
+    "first": ("first", "first name", "firstname"),
+    "mi": ("mi", "middle", "middle initial"),
+    "name": ("name", "full name"),
+    "room": ("room", "room number"),
+    "squadron": ("squadron", "sq", "unit"),
+}
+
+
+def _rank_lookup() -> dict[str, str]:
+    # "E-3 (A1C)", "a1c" and "e-3" all map to "E-3 (A1C)"; where a grade is
+    # shared (E-3 (A1C) / E-3 (Spc3)), the bare grade maps to the first one
+    lookup = {}
+    for option in Constants.rank_options:
+        grade, _, abbreviation = option.partition(" (")
+        for alias in (option, abbreviation.rstrip(")"), grade):
+            lookup.setdefault(alias.casefold(), option)
+    return lookup
+
+
+RANKS = _rank_lookup()
+
+
+class RosterEntry(Person):
+    """One trainee from the manor roster."""
+    __slots__ = ("room", "squadron")
+
+    def __init__(self, rank: str = "", last: str = "", first: str = "", mi: str = "",
+                 room: str = "", squadron: str = ""):
+        super().__init__(rank, last, first, mi)
+        self.room = room
+        self.squadron = squadron
+
+    def label(self) -> str:
+        """'Last, First MI  Rank  Room', as shown in the completion list."""
+        name = f"{self.last}, {self.first}"
+        if self.mi:
+            name += f" {self.mi}"
+        return "  ".join(part for part in (name, self.rank, self.room) if part)
+
+
+def _split_name(name: str) -> tuple[str, str, str]:
+    """Splits 'Last, First M' or 'First M Last' into (last, first, mi)."""
+    if "," in name:
+        last, _, rest = name.partition(",")
+        parts = rest.split()
+    else:
+        parts = name.split()
+        last = parts.pop() if parts else ""
+    first = parts[0] if parts else ""
+    mi = parts[1][0] if len(parts) > 1 else ""
+    return last.strip(), first, mi
+
+
+class Roster:
+    """
+    The trainees of a manor, sorted by name for prefix completion.
+
+    Entries are kept in a list sorted by their casefolded 'last, first mi'
+    key, so a completion is a bisection plus a short scan: typing "smi"
+    matches every Smith, and "smith, j" narrows it to the Johns.
+    """
+
+    def __init__(self, entries: list[RosterEntry]):
+        keyed = sorted(((self.key(entry), entry) for entry in entries), key=lambda item: item[0])
+        self._keys = [key for key, _ in keyed]
+        self.entries = [entry for _, entry in keyed]
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def key(entry: Person) -> str:
+        return f"{entry.last}, {entry.first} {entry.mi}".casefold().strip()
+
+    def complete(self, prefix: str, limit: int = MAX_COMPLETIONS) -> list[RosterEntry]:
+        """Returns up to `limit` entries whose name starts with `prefix`, in name order."""
+        prefix = " ".join(prefix.casefold().split()).replace(" ,", ",")
+        if not prefix:
+            return []
+        keys = self._keys
+        index = bisect_left(keys, prefix)
+        matches = []
+        while index < len(keys) and len(matches) < limit and keys[index].startswith(prefix):
+            matches.append(self.entries[index])
+            index += 1
+        return matches
+
+    @classmethod
+    def from_csv(cls, stream) -> "Roster":
+        """
+        Reads a roster CSV with a header row. Either `last`/`first`/`mi`
+        columns or a single `name` column are accepted; `rank`, `room` and
+        `squadron` are optional.
+        """
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        if header is None:
+            return cls([])
+        columns = {}
+        for index, title in enumerate(header):
+            title = title.strip().lower()
+            for field, aliases in COLUMN_ALIASES.items():
+                if title in aliases:
+                    columns.setdefault(field, index)
+        if "last" not in columns and "name" not in columns:
+            raise ValueError("Roster needs a 'Last' or 'Name' column.")
+
+        def column(row, field):
+            index = columns.get(field)
+            return row[index].strip() if index is not None and index < len(row) else ""
+
+        entries = []
+        for row in reader:
+            if "last" in columns:
+                last, first, mi = column(row, "last"), column(row, "first"), column(row, "mi")[:1]
+            else:
+                last, first, mi = _split_name(column(row, "name"))
+            if not last:
+                continue
+            rank = column(row, "rank")
+            entries.append(RosterEntry(
+                rank=RANKS.get(rank.casefold(), rank),
+                last=last,
+                first=first,
+                mi=mi.upper(),
+                room=normalize_room(column(row, "room")),
+                squadron=column(row, "squadron"),
+            ))
+        log.info(f"Loaded roster with {len(entries)} trainees.")
+        return cls(entries)
+
+    @classmethod
+    def load(cls, path: str = ROSTER_PATH) -> "Roster":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return cls.from_csv(f)
+
+
+def load_saved_roster(path: str = ROSTER_PATH) -> Roster | None:
+    """Loads the last imported roster, or returns None if there is none or it is unreadable."""
+    try:
+        return Roster.load(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, csv.Error) as e:
+        log.warning(f"Failed to load saved roster: {e}")
+        return None
@@ -0,0 +1,255 @@
+"""
+Follows the CAC scanner's log file during a shift.
+
+Usage
+-----
+    CQ_SCANNER_LOG=C:\\Scanner\\scans.csv python app.py
+    python -m logic.scan_tail scans.csv --roster roster.csv
+
+The log is the same CSV as a scanner export (see logic.scans), growing as
+trainees scan. Each poll is one `stat`; only when the file has grown are
+the new bytes read, from the offset where the last complete line ended,
+and fed into the same per-trainee state as a one-shot import. When the
+scanner rotates the log (renames it and starts a new one) the rest of the
+old file is read from wherever it was moved in the same folder, then the
+new file from its start; a file truncated in place is read again from the
+start.
+"""
+import os
+import csv
+import sys
+import time
+import logging
+import argparse
+import threading
+from datetime import date, datetime
+from constants import Constants
+from logic.aggregator import shift_date
+from logic.roster import Roster, load_saved_roster
+from logic.scans import Reconciliation, ScanReconciler, default_curfew, scan_columns
+
+
+log = logging.getLogger('app.scan_tail')
+
+
+# Seconds between polls of the log file
+POLL_INTERVAL = 1.0
+
+# Most bytes read per poll, so a huge backlog is caught up in steps
+READ_CHUNK = 1 << 20
+
+
+def _identity(stat: os.stat_result) -> tuple[int, int] | None:
+    # Some filesystems report no inode; rotation is then only seen as truncation
+    return (stat.st_dev, stat.st_ino) if stat.st_ino else None
+
+
+def _find_moved(path: str, identity: tuple[int, int]) -> str | None:
+    """Where a rotated log went: the file in the same folder with its old identity."""
+    folder = os.path.dirname(os.path.abspath(path))
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file() and _identity(entry.stat()) == identity:
+                    return entry.path
+    except OSError:
+        pass
+    return None
+
+
+class ScanTail:
+    """
+    Reads what was appended to a scanner log since the last poll.
+
+    `offset` is the byte position after the last complete line read, and
+    `columns` the header of the current file; both can be passed in to
+    resume a file that was already partly read. A line still being written
+    is left for the next poll.
+    """
+
+    def __init__(self, path: str, reconciler: ScanReconciler, offset: int = 0,
+                 columns: dict[str, int] | None = None):
+        self.path = path
+        self.reconciler = reconciler
+        self.offset = offset
+        self.columns = columns
+        self.rotations = 0
+        self._identity = None
+        # Where the last read stopped, including any unfinished line
+        self._read_to = -1
+
+    def poll(self) -> bool:
+        """Reads any new lines. Returns True if there were some."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Between the scanner moving the old log away and creating a new one
+            return self._rotated()
+        except OSError as e:
+            log.debug("Cannot stat scanner log: %s", e)
+            return False
+
+        identity = _identity(stat)
+        if self._identity is None:
+            self._identity = identity
+        elif identity != self._identity:
+            read = self._rotated()
+            self._identity = identity
+            return self._read(self.path) or read
+        if stat.st_size < self.offset:
+            log.info("Scanner log was truncated; reading it from the start.")
+            self._restart()
+        if stat.st_size == self._read_to:
+            return False
+        return self._read(self.path)
+
+    def _restart(self):
+        self.offset = 0
+        self.columns = None
+        self._read_to = -1
+
+    def _rotated(self) -> bool:
+        if self._identity is None:
+            return False
+        moved = _find_moved(self.path, self._identity)
+        read = self._read(moved) if moved else False
+        log.info("Scanner log rotated%s.", f" to {os.path.basename(moved)}" if moved else "")
+        self.rotations += 1
+        self._identity = None
+        self._restart()
+        return read
+
+    def _read(self, path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read(READ_CHUNK)
+        except OSError as e:
+            log.debug("Cannot read scanner log: %s", e)
+            return False
+        self._read_to = self.offset + len(data)
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return False
+        lines = data[:end].decode("utf-8", "replace").splitlines()
+        if self.columns is None:
+            try:
+                self.columns = scan_columns(next(csv.reader([lines.pop(0).lstrip("\ufeff")])))
+            except ValueError as e:
+                log.warning(f"Scanner log header not recognized: {e}")
+                return False
+        self.offset += end
+        if lines:
+            self.reconciler.feed(csv.reader(lines), self.columns)
+        return True
+
+
+class ScanFollower:
+    """
+    Polls a scanner log from a daemon thread and keeps the latest result.
+
+    The Tk thread reads `latest` (a Reconciliation, replaced as a whole on
+    every change) and `version`, which goes up with each change, so it can
+    cheaply check for news with `window.after`. `follow` (re)starts from
+    the beginning of the log with a new roster.
+    """
+
+    def __init__(self, path: str, interval: float = POLL_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.latest = None
+        self.updated_at = None
+        self.version = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "ScanFollower | None":
+        """A follower for CQ_SCANNER_LOG, or None if it is not set."""
+        path = os.environ.get("CQ_SCANNER_LOG")
+        return cls(path) if path else None
+
+    def follow(self, roster: Roster, curfew: str | None = None, shift_day: date | None = None):
+        """Starts following the log for this roster (and curfew, by default from the weekday)."""
+        shift_day = shift_day or shift_date()
+        with self._lock:
+            self._pending = ScanReconciler(roster, curfew or default_curfew(shift_day), shift_day)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scan-tail", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def close(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        tail = None
+        while not self._stopping:
+            with self._lock:
+                reconciler, self._pending = self._pending, None
+            if reconciler is not None:
+                tail = ScanTail(self.path, reconciler)
+                self._publish(tail)
+            if tail is not None and tail.poll():
+                # Catch up on a large backlog before publishing
+                while tail.poll():
+                    pass
+                self._publish(tail)
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _publish(self, tail: ScanTail):
+        self.latest = tail.reconciler.result()
+        self.updated_at = datetime.now()
+        self.version += 1
+
+
+def status_text(result: Reconciliation | None, updated_at: datetime | None = None) -> str:
+    """A one-line live accountability status."""
+    if result is None:
+        return "Scanner: waiting for the log"
+    text = (
+        f"Scanner: {result.matched:,} scans, {result.out_now} out, {len(result.lates)} late, "
+        f"{len(result.red_card_lates)} red-card misses"
+    )
+    return f"{text} (as of {updated_at:%H:%M:%S})" if updated_at else text
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Follow a CAC scanner log and print the live status.")
+    parser.add_argument("log", help="Scanner log CSV.")
+    parser.add_argument("--roster", help="Roster CSV (default: the last imported roster).")
+    parser.add_argument("--curfew", choices=Constants.standard_late_times, help="Curfew time (default by weekday).")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Seconds between polls.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, force=True)
+    roster = Roster.load(args.roster) if args.roster else load_saved_roster()
+    if roster is None:
+        print("No roster: pass --roster or import one in the app first.", file=sys.stderr)
+        return 2
+    follower = ScanFollower(args.log, args.interval)
+    follower.follow(roster, args.curfew)
+    version = 0
+    try:
+        while True:
+            time.sleep(args.interval)
+            if follower.version != version:
+                version = follower.version
+                print(status_text(follower.latest, follower.updated_at), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
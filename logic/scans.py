@@ -0,0 +1,364 @@
+"""
+Reconciles a CAC scanner export against the roster to find lates.
+
+Usage
+-----
+    python -m logic.scans scans.csv --curfew 2200
+    python -m logic.scans scans.csv --roster roster.csv --date 2025-06-01
+
+The export is a CSV with a header row: a time (or timestamp) column, the
+cardholder's name (`Name`, or `Last`/`First`/`MI`) and optionally an event
+column. Events are door scans (in/out) and red-card scans (sign-in/turn-in);
+without an event column every scan counts as "in".
+
+A trainee is a standard late if their last door scan before curfew was
+"out". Anyone with a red-card scan is a red-card holder, and is late for
+each window in `Constants.redcard_late_times` (up to the last scan in the
+file) without a sign-in and a turn-in scan close to it. The file is
+streamed row by row into fixed per-trainee state, so memory depends on
+the roster size, not the file size.
+"""
+import re
+import sys
+import csv
+import time
+import logging
+import argparse
+from array import array
+from datetime import date, timedelta
+from constants import Constants
+from logic.aggregator import SHIFT_ROLLOVER_HOUR, shift_date
+from logic.fuzzy import person_key
+from logic.models import LateEntry, Person
+from logic.roster import Roster, load_saved_roster
+
+
+log = logging.getLogger('app.scans')
+
+
+# Header aliases, lowercased, for each scan column
+SCAN_COLUMNS = {
+    "time": ("time", "timestamp", "date/time", "datetime", "scan time", "date time"),
+    "last": ("last", "last name", "lastname", "surname"),
+    "first": ("first", "first name", "firstname"),
+    "mi": ("mi", "middle", "middle initial"),
+    "name": ("name", "full name", "cardholder"),
+    "event": ("event", "direction", "action", "scan type"),
+}
+
+IN, OUT, RC_SIGN_IN, RC_TURN_IN = range(4)
+
+# Event names with spaces, dashes and underscores removed
+EVENTS = {
+    **dict.fromkeys(("in", "signin", "entry", "enter"), IN),
+    **dict.fromkeys(("out", "signout", "exit"), OUT),
+    **dict.fromkeys(("rcsignin", "redcardsignin", "redcardin", "rcin"), RC_SIGN_IN),
+    **dict.fromkeys(("rcturnin", "redcardturnin", "turnin", "rcout"), RC_TURN_IN),
+}
+
+# A red-card scan counts for a window this many minutes before or after it
+RED_CARD_EARLY_MINUTES = 30
+RED_CARD_LATE_MINUTES = 15
+
+MINUTES_PER_DAY = 24 * 60
+
+# Anchored at the start (skipping any date) rather than searched for, which is much faster
+_TIME = re.compile(r"(?:.*[ T])?(\d{1,2}):?(\d{2})(?::\d{2}(?:\.\d+)?)?\s*([AaPp][Mm])?\s*$")
+_DATE = re.compile(r"^\s*(\d{4})-(\d{2})-(\d{2})|^\s*(\d{1,2})/(\d{1,2})/(\d{4})")
+_EVENT_PUNCTUATION = str.maketrans("", "", " -_")
+
+
+def shift_minute(text: str) -> int | None:
+    """
+    Minutes since the start of the shift day for a time like '2105',
+    '21:05', '9:05 PM' or '2025-06-01 21:05:33'. Times before the shift
+    rollover belong to the night before, so '0030' is 24 * 60 + 30.
+    """
+    match = _TIME.match(text)
+    if match is None:
+        return None
+    hour, minute, meridiem = int(match[1]), int(match[2]), match[3]
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem in ("PM", "pm", "Pm", "pM") else 0)
+    if hour > 23 or minute > 59:
+        return None
+    minutes = hour * 60 + minute
+    return minutes + MINUTES_PER_DAY if hour < SHIFT_ROLLOVER_HOUR else minutes
+
+
+def _scan_date(text: str) -> date | None:
+    match = _DATE.match(text)
+    if match is None:
+        return None
+    if match[1]:
+        return date(int(match[1]), int(match[2]), int(match[3]))
+    return date(int(match[6]), int(match[4]), int(match[5]))
+
+
+def _name_keys(person: Person) -> tuple[str, str]:
+    # Scanners often drop the middle initial, so the key without it is indexed too
+    return person_key(person), person_key(Person("", person.last, person.first))
+
+
+class Reconciliation:
+    """Lates found in one scanner export, plus counts for the summary."""
+    __slots__ = (
+        "red_card_lates", "lates", "out_now", "rows", "matched", "unmatched", "skipped", "other_shift", "seconds"
+    )
+
+    def __init__(self):
+        self.red_card_lates = []
+        self.lates = []
+        # Trainees whose latest door scan so far was "out"
+        self.out_now = 0
+        self.rows = 0
+        self.matched = 0
+        self.unmatched = 0
+        self.skipped = 0
+        # Scans dated outside the shift day being reconciled
+        self.other_shift = 0
+        self.seconds = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.rows} scans ({self.matched} matched, {self.unmatched} not on roster, {self.skipped} unreadable, "
+            f"{self.other_shift} from another shift): "
+            f"{len(self.red_card_lates)} red-card and {len(self.lates)} standard lates in {self.seconds * 1000:.0f} ms"
+        )
+
+
+class ScanReconciler:
+    """
+    Hash-joins scans to roster entries and keeps a few numbers per trainee.
+
+    Each trainee has the minute and direction of their last door scan
+    before curfew and of their latest one overall, and a bitset of the red-card checks they made: bit 2*w
+    for a sign-in at window w, bit 2*w + 1 for a turn-in. `feed` can be
+    called with any number of rows before `result`.
+    """
+
+    def __init__(self, roster: Roster, curfew: str, shift_day: date | None = None,
+                 windows: list[str] = Constants.redcard_late_times):
+        if curfew not in Constants.standard_late_times:
+            raise ValueError(f"Curfew must be one of {', '.join(Constants.standard_late_times)}.")
+        self.entries = roster.entries
+        self.curfew = curfew
+        self.curfew_minute = shift_minute(curfew)
+        self.shift_day = shift_day
+        self.windows = list(windows)
+        self._window_minutes = [shift_minute(window) for window in self.windows]
+        # The red-card bits a scan sets, by shift minute: sign-in bits, turn-in bits are one higher
+        self._window_bits = [0] * (2 * MINUTES_PER_DAY)
+        for window, window_minute in enumerate(self._window_minutes):
+            start = max(0, window_minute - RED_CARD_EARLY_MINUTES)
+            for minute in range(start, window_minute + RED_CARD_LATE_MINUTES + 1):
+                self._window_bits[minute] |= 1 << 2 * window
+        self._index = {}
+        for position, entry in enumerate(self.entries):
+            for key in _name_keys(entry):
+                self._index.setdefault(key, position)
+
+        size = len(self.entries)
+        self._last_door = array("i", [-1]) * size
+        self._out_at_curfew = bytearray(size)
+        self._last_scan = array("i", [-1]) * size
+        self._out_now = bytearray(size)
+        self._red_card = array("H", [0]) * size
+        self._holder = bytearray(size)
+        self._latest = -1
+        # Raw scanned names, events and date prefixes seen so far, so each is normalized once
+        self._names = {}
+        self._events = {}
+        self._dates = {}
+        self._counts = Reconciliation()
+
+    def _lookup(self, name: tuple[str, str, str]) -> int | None:
+        last, first, mi = name
+        full, short = _name_keys(Person("", last.strip(), first.strip(), mi.strip()[:1]))
+        position = self._index.get(full)
+        position = self._names[name] = self._index.get(short) if position is None else position
+        return position
+
+    def _event(self, text: str) -> int | None:
+        try:
+            return self._events[text]
+        except KeyError:
+            event = self._events[text] = EVENTS.get(text.casefold().translate(_EVENT_PUNCTUATION))
+            return event
+
+    def _on_shift(self, text: str, minute: int) -> bool:
+        # Exports may cover several days; only scans of the chosen shift count
+        prefix = text[:10]
+        try:
+            day = self._dates[prefix]
+        except KeyError:
+            day = self._dates[prefix] = _scan_date(text)
+        if day is None:
+            return True
+        return day == (self.shift_day + timedelta(days=1) if minute >= MINUTES_PER_DAY else self.shift_day)
+
+    def feed(self, rows, columns: dict[str, int]):
+        """Processes CSV rows, given the column index of each field."""
+        counts = self._counts
+        time_column = columns["time"]
+        event_column = columns.get("event")
+        name_column = columns.get("name")
+        last_column, first_column, mi_column = columns.get("last"), columns.get("first"), columns.get("mi")
+        curfew = self.curfew_minute
+        names = self._names
+        events = self._events
+        window_bits = self._window_bits
+        for row in rows:
+            counts.rows += 1
+            try:
+                stamp = row[time_column]
+                minute = shift_minute(stamp)
+                if event_column is None:
+                    event = IN
+                else:
+                    event = events.get(row[event_column])
+                    if event is None:
+                        event = self._event(row[event_column])
+                if name_column is not None:
+                    last, _, rest = row[name_column].partition(",")
+                    first, _, mi = rest.strip().partition(" ")
+                else:
+                    last, first = row[last_column], row[first_column] if first_column is not None else ""
+                    mi = row[mi_column] if mi_column is not None else ""
+            except IndexError:
+                minute = None
+            if minute is None or event is None:
+                counts.skipped += 1
+                continue
+            if self.shift_day is not None and not self._on_shift(stamp, minute):
+                counts.other_shift += 1
+                continue
+            name = (last, first, mi)
+            position = names.get(name, -1)
+            if position == -1:
+                position = self._lookup(name)
+            if position is None:
+                counts.unmatched += 1
+                continue
+            counts.matched += 1
+            if minute > self._latest:
+                self._latest = minute
+
+            if event <= OUT:
+                if minute >= self._last_scan[position]:
+                    self._last_scan[position] = minute
+                    self._out_now[position] = event == OUT
+                if minute <= curfew and minute >= self._last_door[position]:
+                    self._last_door[position] = minute
+                    self._out_at_curfew[position] = event == OUT
+                continue
+            self._holder[position] = 1
+            self._red_card[position] |= window_bits[minute] << (event == RC_TURN_IN)
+
+    def result(self) -> Reconciliation:
+        """
+        Turns the per-trainee state into late rows, ordered by time and name.
+        Each call returns a new Reconciliation, so `feed` can go on afterwards.
+        """
+        counts = Reconciliation()
+        for name in ("rows", "matched", "unmatched", "skipped", "other_shift"):
+            setattr(counts, name, getattr(self._counts, name))
+        counts.out_now = self._out_now.count(1)
+        red_card_lates = []
+        lates = []
+        due_windows = [
+            (window, name) for window, (name, minute) in enumerate(zip(self.windows, self._window_minutes))
+            if minute <= self._latest
+        ]
+        for position, entry in enumerate(self.entries):
+            if self._out_at_curfew[position]:
+                lates.append(LateEntry(entry.rank, entry.last, entry.first, entry.mi, entry.room, self.curfew, "", ""))
+            if not self._holder[position]:
+                continue
+            bits = self._red_card[position]
+            for window, name in due_windows:
+                signed_in, turned_in = bits >> (2 * window) & 1, bits >> (2 * window + 1) & 1
+                if signed_in and turned_in:
+                    continue
+                missed = "Both" if not (signed_in or turned_in) else ("Turn-in" if signed_in else "Sign-in")
+                red_card_lates.append(LateEntry(entry.rank, entry.last, entry.first, entry.mi, entry.room, name, missed, ""))
+
+        window_order = {name: index for index, name in enumerate(self.windows)}
+        counts.red_card_lates = sorted(red_card_lates, key=lambda late: (window_order[late.time], late.last, late.first))
+        counts.lates = sorted(lates, key=lambda late: (late.last, late.first))
+        return counts
+
+
+def scan_columns(header: list[str]) -> dict[str, int]:
+    columns = {}
+    for index, title in enumerate(header):
+        title = title.strip().lower()
+        for field, aliases in SCAN_COLUMNS.items():
+            if title in aliases:
+                columns.setdefault(field, index)
+    if "time" not in columns:
+        raise ValueError("Scanner export needs a 'Time' or 'Timestamp' column.")
+    if "name" not in columns and "last" not in columns:
+        raise ValueError("Scanner export needs a 'Name' or 'Last' column.")
+    return columns
+
+
+def reconcile(stream, roster: Roster, curfew: str, shift_day: date | None = None) -> Reconciliation:
+    """Reads a scanner export CSV from `stream` and returns the lates it shows."""
+    started = time.perf_counter()
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Scanner export is empty.")
+    reconciler = ScanReconciler(roster, curfew, shift_day)
+    reconciler.feed(reader, scan_columns(header))
+    result = reconciler.result()
+    if result.other_shift and result.other_shift == result.rows - result.skipped:
+        raise ValueError(f"None of the {result.rows} scans are from the shift of {shift_day:%Y-%m-%d}; check the date.")
+    result.seconds = time.perf_counter() - started
+    log.info(result.summary())
+    return result
+
+
+def reconcile_file(path: str, roster: Roster, curfew: str, shift_day: date | None = None) -> Reconciliation:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return reconcile(f, roster, curfew, shift_day)
+
+
+def default_curfew(day: date) -> str:
+    """The Phase 2/3 curfew for a shift day: midnight on Friday and Saturday nights, 2200 otherwise."""
+    return Constants.standard_late_times[2] if day.weekday() in (4, 5) else Constants.standard_late_times[1]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Find lates in a CAC scanner export.")
+    parser.add_argument("scans", help="Scanner export CSV.")
+    parser.add_argument("--roster", help="Roster CSV (default: the last imported roster).")
+    parser.add_argument("--curfew", choices=Constants.standard_late_times, help="Curfew time (default by weekday).")
+    parser.add_argument("--date", help="Only use scans of this shift day (YYYY-MM-DD).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, force=True)
+    roster = Roster.load(args.roster) if args.roster else load_saved_roster()
+    if roster is None:
+        print("No roster: pass --roster or import one in the app first.", file=sys.stderr)
+        return 2
+    shift_day = date.fromisoformat(args.date) if args.date else None
+    curfew = args.curfew or default_curfew(shift_day or shift_date())
+    try:
+        result = reconcile_file(args.scans, roster, curfew, shift_day)
+    except (OSError, ValueError, UnicodeDecodeError, csv.Error) as e:
+        print(f"Could not read {args.scans}: {e}", file=sys.stderr)
+        return 1
+
+    for title, lates in (("Red-Card Lates", result.red_card_lates), (f"Lates (curfew {curfew})", result.lates)):
+        print(f"{title}:")
+        for late in lates:
+            missed = f"{late.time} {late.type}".strip()
+            print(f"- {late.rank} {late.last}, {late.first} {late.mi} - {late.room} - Missed {missed}".replace("  ", " "))
+    print(result.summary(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
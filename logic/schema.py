@@ -0,0 +1,83 @@
+from logic.models import SIGNATURE_FIELDS
+
+
+class RoleSpec:
+    """A team role. `multiple` roles (CQ Runner) hold a list of people."""
+    __slots__ = ("role", "required", "multiple")
+
+    def __init__(self, role: str, required: bool = False, multiple: bool = False):
+        self.role = role
+        self.required = required
+        self.multiple = multiple
+
+    def missing_error(self) -> str:
+        if self.multiple:
+            return f"Required: Please fill out at least one **{self.role}**."
+        return f"Required: Please fill out **{self.role}**."
+
+
+class LateSectionSpec:
+    """A dynamic late section and the row fields it requires besides Rank/Last/Room."""
+    __slots__ = ("key", "title", "required_fields", "has_type")
+
+    def __init__(self, key: str, title: str, required_fields: list[tuple[str, str]], has_type: bool):
+        self.key = key
+        self.title = title
+        # (LateEntry attribute, label used in error messages)
+        self.required_fields = required_fields
+        self.has_type = has_type
+
+
+class FormSchema:
+    """Declares every section of the form and what the validator requires of it."""
+    __slots__ = ("al_roles", "cq_roles", "late_sections", "signature_fields", "required_signature_fields")
+
+    def __init__(self, al_roles: list[RoleSpec], cq_roles: list[RoleSpec], late_sections: list[LateSectionSpec],
+                 signature_fields: list[str], required_signature_fields: list[str]):
+        self.al_roles = {spec.role: spec for spec in al_roles}
+        self.cq_roles = {spec.role: spec for spec in cq_roles}
+        self.late_sections = late_sections
+        self.signature_fields = signature_fields
+        self.required_signature_fields = required_signature_fields
+
+    def role_spec(self, team: str, role: str) -> RoleSpec:
+        """Returns the spec for a role, treating unknown roles as optional."""
+        roles = self.al_roles if team == "al_team" else self.cq_roles
+        return roles.get(role) or RoleSpec(role)
+
+
+FORM_SCHEMA = FormSchema(
+    al_roles=[
+        RoleSpec("ALD (Weekends Only)"),
+        RoleSpec("ALD Shadow (Weekends Only)"),
+        RoleSpec("AL Cards", required=True),
+        RoleSpec("AL Cards Shadow"),
+    ],
+    cq_roles=[
+        RoleSpec("CQ Lead", required=True),
+        RoleSpec("CQ Door Guard", required=True),
+        RoleSpec("CQ Runner", required=True, multiple=True),
+    ],
+    late_sections=[
+        LateSectionSpec(
+            key="red_card_lates",
+            title="Red-Card Lates",
+            required_fields=[("time", "Time"), ("reason", "Reason"), ("type", "Type/Late To")],
+            has_type=True,
+        ),
+        LateSectionSpec(
+            key="lates",
+            title="Standard Lates",
+            required_fields=[("time", "Time"), ("reason", "Reason")],
+            has_type=False,
+        ),
+    ],
+    signature_fields=SIGNATURE_FIELDS,
+    required_signature_fields=[
+        "Rank",
+        "Last", "First", "MI",
+        "AFSC/Job",
+        "Squadron"
+    ],
+)
+
@@ -0,0 +1,195 @@
+"""
+A local SMTP server that accepts every message and keeps it in memory.
+
+Usage
+-----
+    python -m logic.smtp_sink --port 8025       # then CQ_SMTP_HOST=127.0.0.1 CQ_SMTP_PORT=8025
+
+Meant for trying out delivery and for benchmarks, never for real mail: it
+speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+and does no authentication or relaying.
+"""
+import sys
+import asyncio
+import logging
+import argparse
+import threading
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+
+
+log = logging.getLogger('app.smtp_sink')
+
+
+DEFAULT_PORT = 8025
+
+# Messages kept in memory; older ones are dropped
+MAX_MESSAGES = 10_000
+
+
+class ReceivedMessage:
+    """One message as the sink received it."""
+    __slots__ = ("sender", "recipients", "data")
+
+    def __init__(self, sender: str, recipients: list[str], data: bytes):
+        self.sender = sender
+        self.recipients = recipients
+        self.data = data
+
+    def parse(self) -> EmailMessage:
+        return message_from_bytes(self.data, policy=policy.default)
+
+
+class SmtpSink:
+    """
+    Accepts SMTP connections on an asyncio loop.
+
+    Use `start_in_thread()` to run it beside synchronous code (it returns
+    the bound port); received messages collect in `messages`. With
+    `fail_every=n`, every nth message is answered with a temporary 451
+    error, to exercise retries.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, fail_every: int = 0):
+        self.host = host
+        self.port = port
+        self.fail_every = fail_every
+        self.messages = []
+        self.received = 0
+        self.connections = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> int:
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.port
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+            self._thread = None
+
+    def _store(self, message: ReceivedMessage):
+        self.messages.append(message)
+        if len(self.messages) > MAX_MESSAGES:
+            del self.messages[:len(self.messages) - MAX_MESSAGES]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        def reply(line: str):
+            writer.write(line.encode("ascii") + b"\r\n")
+
+        sender, recipients = None, []
+        reply("220 localhost CQ SMTP sink ready")
+        try:
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode("utf-8", "replace").strip().partition(" ")
+                command = command.upper()
+                if command == "EHLO":
+                    reply("250-localhost")
+                    reply("250-PIPELINING")
+                    reply("250-8BITMIME")
+                    reply("250 SIZE 10485760")
+                elif command == "HELO":
+                    reply("250 localhost")
+                elif command == "MAIL":
+                    sender, recipients = argument.partition(":")[2].strip().strip("<>").split(">")[0], []
+                    reply("250 OK")
+                elif command == "RCPT":
+                    if sender is None:
+                        reply("503 MAIL first")
+                        continue
+                    recipients.append(argument.partition(":")[2].strip().strip("<>"))
+                    reply("250 OK")
+                elif command == "DATA":
+                    if not recipients:
+                        reply("503 RCPT first")
+                        continue
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    lines = []
+                    while (data_line := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        # Undo dot-stuffing
+                        lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                    self.received += 1
+                    if self.fail_every and self.received % self.fail_every == 0:
+                        reply("451 Temporary failure, try again")
+                    else:
+                        self._store(ReceivedMessage(sender, recipients, b"".join(lines)))
+                        reply("250 OK queued")
+                    sender, recipients = None, []
+                elif command == "RSET":
+                    sender, recipients = None, []
+                    reply("250 OK")
+                elif command == "NOOP":
+                    reply("250 OK")
+                elif command == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local SMTP server that keeps messages in memory.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT}).")
+    parser.add_argument("--print", action="store_true", help="Print each message's headers as it arrives.")
+    args = parser.parse_args(argv)
+
+    class PrintingSink(SmtpSink):
+        def _store(self, message: ReceivedMessage):
+            super()._store(message)
+            if args.print:
+                parsed = message.parse()
+                print(f"{message.sender} -> {', '.join(message.recipients)}: {parsed['Subject']}", flush=True)
+
+    async def serve():
+        sink = PrintingSink(args.host, args.port)
+        port = await sink.start()
+        print(f"SMTP sink listening on {args.host}:{port}", file=sys.stderr)
+        await sink.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,112 @@
 import os
 import sys
+import queue
+import atexit
 import logging
+import collections
+import logging.handlers
 
 
-def setup_logging():
-    """Configures and returns the root logger for the application."""
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+# Log records kept in memory for `recent_logs()`
+RECENT_LOG_RECORDS = 500
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Default level for the 'app' loggers; override with CQ_LOG_LEVEL=DEBUG
+DEFAULT_LOG_LEVEL = "INFO"
+
+_log_listener = None
+_queue_handler = None
+_recent_handler = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records without formatting them.
+
+    The stock QueueHandler merges the message and arguments on the calling
+    thread; here `%`-style arguments are merged by the writer thread instead,
+    so a log call on the Tk thread costs one queue put.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class RecentLogHandler(logging.Handler):
+    """Keeps the last `capacity` formatted records in memory."""
+
+    def __init__(self, capacity: int = RECENT_LOG_RECORDS):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.records.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def setup_logging(level: str | int | None = None) -> logging.Logger:
+    """
+    Configures and returns the application logger.
+
+    Records from the 'app' loggers go through a queue to a background writer
+    thread, which prints them to stderr (when there is one) and keeps the most
+    recent ones in memory. Calling it again only changes the level.
+    """
+    global _log_listener, _queue_handler, _recent_handler
     logger = logging.getLogger('app')
+    set_log_level(level or os.environ.get("CQ_LOG_LEVEL") or DEFAULT_LOG_LEVEL)
+    if _log_listener is not None:
+        return logger
+
+    formatter = logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    _recent_handler = RecentLogHandler()
+    handlers = [_recent_handler]
+    # Windowed PyInstaller builds have no stderr
+    if sys.stderr is not None:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
+    logger.propagate = False
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    _log_listener.start()
+    atexit.register(shutdown_logging)
+
     logger.info("Logging configured.")
     return logger
 
-log = setup_logging()
+
+def set_log_level(level: str | int):
+    """Changes the level of the 'app' loggers at runtime, e.g. set_log_level("DEBUG")."""
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.getLevelName(DEFAULT_LOG_LEVEL)
+    logging.getLogger('app').setLevel(level)
+
+
+def recent_logs() -> list[str]:
+    """Returns the most recent formatted log lines, oldest first."""
+    return list(_recent_handler.records) if _recent_handler is not None else []
+
+
+def shutdown_logging():
+    """Writes out any queued records and stops the writer thread."""
+    global _log_listener, _queue_handler
+    if _log_listener is not None:
+        logger = logging.getLogger('app')
+        logger.removeHandler(_queue_handler)
+        logger.propagate = True
+        _log_listener.stop()
+        _log_listener = _queue_handler = None
+
 
 def resource_path(relative_path: str):
     """Get absolute path to resource, works for dev and for PyInstaller."""
@@ -25,3 +117,9 @@ def resource_path(relative_path: str):
         base_path = os.path.abspath(".")
 
     return os.path.join(base_path, relative_path)
+
+
+def user_data_path(relative_path: str):
+    """Get absolute path to a per-user data file (archive, drafts, etc.), outside the PyInstaller bundle."""
+    base_path = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base_path, "CQAccountability", relative_path)